@@ -0,0 +1,137 @@
+"""
+Load benchmark for ServerConfig.async_database.
+
+Starts the API server once with the default endpoints (scores written by ScoreWriteQueue) and once with the asyncio
+database engine, then has a number of scout tablets send /api/addScores at the same time while others read
+/api/getAllScores.  Reports throughput and the p50 and p99 latency of each route in each mode.
+Needs the optional async packages: pip install robocompscoutingapp[async]
+
+Run from the repository root:
+    python benchmarks/async_db_benchmark.py --tablets 30 --matches 60
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from robocompscoutingapp.GlobalItems import RCSA_Config
+from robocompscoutingapp.Initialize import Initialize
+from robocompscoutingapp.Integrate import Integrate
+from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
+from robocompscoutingapp.RunAPIServer import RunAPIServer
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB
+from robocompscoutingapp.FirstEventsAPI import FirstMatch, FirstTeam
+from robocompscoutingapp.ScoringData import (
+    getCurrentScoringPageData,
+    getGameModeAndScoringElements,
+    storeMatches,
+    storeTeams
+)
+
+EVENT = "BNCH"
+
+def setUpEvent(tmpdir:str, matches:int, async_database:bool):
+    init = Initialize(tmpdir)
+    init.initialize(overwrite=True)
+    init.updateTOML(["ServerConfig", "scoring_page"], f"{tmpdir}/static/scoring_sample.html", tgt_dir=tmpdir)
+    os.chdir(tmpdir)
+    RCSA_Config.getConfig(reset=True)
+    RCSA_DB.getSQLSession(reset=True)
+    UserHTMLProcessing(f"{tmpdir}/static/scoring_sample.html").validate()
+    Integrate().integrate()
+    RCSA_Config.getConfig().FRCEvents.first_event_id = EVENT
+    RCSA_Config.getConfig().ServerConfig.async_database = async_database
+    storeTeams([FirstTeam(eventCode=EVENT, nameShort=f"Team {t}", teamNumber=t) for t in range(1, 7)])
+    storeMatches([FirstMatch(
+        eventCode=EVENT,
+        description=f"Qualification {m}",
+        matchNumber=m,
+        Red1=1, Red2=2, Red3=3, Blue1=4, Blue2=5, Blue3=6
+    ) for m in range(1, matches + 1)])
+
+def scoreSubmissions(matches:int) -> list:
+    """
+    One submission per team per match, every item in every mode scored
+    """
+    modes_and_items = getGameModeAndScoringElements(getCurrentScoringPageData().scoring_page_id)
+    scores = [{"mode_id":mode.mode_id, "scoring_item_id":item.scoring_item_id, "value":1}
+              for mode in modes_and_items.modes.values() for item in modes_and_items.scoring_items.values()]
+    return [{"matchNumber":m, "teamNumber":t, "scores":scores} for m in range(1, matches + 1) for t in range(1, 7)]
+
+def timedRequest(session:requests.Session, method:str, url:str, **kwargs) -> float:
+    start = time.perf_counter()
+    response = session.request(method, url, **kwargs)
+    elapsed = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+    return elapsed
+
+def runLoad(baseurl:str, submissions:list, tablets:int, readers:int) -> dict:
+    """
+    Tablets split the submissions between them, readers poll the results until the submissions are done
+    """
+    write_timings = []
+    read_timings = []
+    done = False
+
+    def tablet(my_submissions):
+        with requests.Session() as session:
+            for submission in my_submissions:
+                write_timings.append(timedRequest(session, "POST", f"{baseurl}/api/addScores", json=submission))
+
+    def reader():
+        with requests.Session() as session:
+            while not done:
+                read_timings.append(timedRequest(session, "GET", f"{baseurl}/api/getAllScores"))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=tablets + readers) as pool:
+        reads = [pool.submit(reader) for _ in range(readers)]
+        writes = [pool.submit(tablet, submissions[i::tablets]) for i in range(tablets)]
+        try:
+            for w in writes:
+                w.result()
+        finally:
+            done = True
+        elapsed = time.perf_counter() - start
+        for r in reads:
+            r.result()
+    return {"elapsed":elapsed, "writes":write_timings, "reads":read_timings}
+
+def percentile(timings:list, pct:float) -> float:
+    return statistics.quantiles(timings, n=100)[int(pct) - 1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tablets", type=int, default=30, help="Concurrent clients sending scores")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent clients reading /api/getAllScores")
+    parser.add_argument("--matches", type=int, default=60, help="Matches to score, six submissions each")
+    args = parser.parse_args()
+
+    original_wd = os.getcwd()
+    results = {}
+    for async_database in [False, True]:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                setUpEvent(tmpdir, args.matches, async_database)
+                submissions = scoreSubmissions(args.matches)
+                server = RunAPIServer()
+                server.run()
+                config = RCSA_Config.getConfig().ServerConfig
+                try:
+                    results[async_database] = runLoad(f"http://{config.IP_Address}:{config.port}", submissions, args.tablets, args.readers)
+                finally:
+                    server.stop()
+                    RCSA_DB.closeAll()
+            finally:
+                os.chdir(original_wd)
+
+    print(f"{args.tablets} tablets, {args.readers} readers, {args.matches * 6} submissions")
+    for async_database, name in [(False, "write queue"), (True, "async database")]:
+        r = results[async_database]
+        print(f"{name}: {len(r['writes'])/r['elapsed']:.1f} submissions/s, "
+              f"addScores p50 {percentile(r['writes'], 50):.1f} ms p99 {percentile(r['writes'], 99):.1f} ms, "
+              f"getAllScores p50 {percentile(r['reads'], 50):.1f} ms p99 {percentile(r['reads'], 99):.1f} ms")
@@ -0,0 +1,79 @@
+"""
+Benchmark for response compression.
+
+Builds the same event as json_response_benchmark.py, then for the /api/getAllScores response (nested and ?format=columnar)
+and for the default static files reports the bytes sent with no compression, gzip and Brotli (if installed,
+pip install robocompscoutingapp[brotli]), and the time to compress with the per request settings.
+The static files are compressed once before the server starts with the smallest settings, that time is reported too.
+
+Run from the repository root:
+    python benchmarks/compression_benchmark.py --teams 60 --items 30 --repeat 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from robocompscoutingapp.GlobalItems import RCSA_Config
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB
+from robocompscoutingapp.web.FastJSONResponse import FastJSONResponse
+from robocompscoutingapp.web.Compression import (
+    availableEncodings,
+    compressBytes,
+    copyPath,
+    precompressStaticFiles,
+    precompressed_suffixes,
+    staticCacheFolder
+)
+from robocompscoutingapp.ScoringData import (
+    getAggregrateResultsForAllTeamsAsDict,
+    getAggregrateResultsForAllTeamsColumnar
+)
+
+from json_response_benchmark import EVENT, setUpEvent, timeCall
+
+def report(name:str, body:bytes, repeat:int):
+    sizes = [f"{len(body)/1024:.1f} KiB plain"]
+    for encoding in availableEncodings():
+        compressed = compressBytes(body, encoding)
+        sizes.append(f"{encoding} {len(compressed)/1024:.1f} KiB in {timeCall(lambda encoding=encoding: compressBytes(body, encoding), repeat):.1f} ms")
+    print(f"{name}: {', '.join(sizes)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=60, help="Teams at the event")
+    parser.add_argument("--items", type=int, default=30, help="Scoring items on the page, at least 6")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs of each, the median is reported")
+    args = parser.parse_args()
+
+    if "br" not in availableEncodings():
+        print("brotli is not installed, gzip only")
+    original_wd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            scoring_page_id = setUpEvent(tmpdir, args.teams, args.items)
+            report("getAllScores", FastJSONResponse(content=getAggregrateResultsForAllTeamsAsDict(EVENT, scoring_page_id)).body, args.repeat)
+            report("getAllScores?format=columnar", FastJSONResponse(content=getAggregrateResultsForAllTeamsColumnar(EVENT, scoring_page_id)).body, args.repeat)
+
+            static_folder = Path(RCSA_Config.getConfig().ServerConfig.user_static_folder)
+            cache_folder = staticCacheFolder(RCSA_Config.getConfig().ServerConfig.scoring_database)
+            static_files = [p for p in static_folder.rglob("*") if p.suffix in precompressed_suffixes]
+            plain = sum(p.stat().st_size for p in static_files)
+            start = time.perf_counter()
+            written = precompressStaticFiles(static_folder, cache_folder)
+            took = (time.perf_counter() - start) * 1000
+            copies = {encoding:0 for encoding in availableEncodings()}
+            for p in static_files:
+                for encoding in copies:
+                    copy_path = copyPath(cache_folder, p.relative_to(static_folder), encoding)
+                    # Files too small to be worth a copy are sent as they are
+                    copies[encoding] += copy_path.stat().st_size if copy_path.exists() else p.stat().st_size
+            print(f"static files: {plain/1024:.1f} KiB plain, " + ", ".join(f"{e} {size/1024:.1f} KiB" for e, size in copies.items()) +
+                  f", {written} copies written in {took:.0f} ms")
+            start = time.perf_counter()
+            precompressStaticFiles(static_folder, cache_folder)
+            print(f"static files already compressed: checked in {(time.perf_counter() - start) * 1000:.1f} ms")
+        finally:
+            RCSA_DB.closeAll()
+            os.chdir(original_wd)
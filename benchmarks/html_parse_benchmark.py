@@ -0,0 +1,78 @@
+"""
+Benchmark for validating a large scoring page.
+
+Builds a scoring page from the sample with extra scoring items and times:
+    - the old validation, which parsed the page once for each of the three parsers
+    - one shared ParsedHTMLDocument for all three parsers, with html.parser
+    - the same with lxml, if it is installed (pip install robocompscoutingapp[lxml])
+
+Run from the repository root:
+    python benchmarks/html_parse_benchmark.py --items 2000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+import warnings
+from importlib.util import find_spec
+
+from importlib_resources import files
+
+from robocompscoutingapp.ScoringPageParser import ScoringPageParser
+from robocompscoutingapp.MatchAndTeamSelectionParser import MatchAndTeamSelectionParser
+from robocompscoutingapp.JSScriptParser import JSScriptParser
+from robocompscoutingapp.ParsedHTMLDocument import ParsedHTMLDocument
+
+def largeScoringPage(items:int) -> str:
+    """
+    The sample scoring page with extra tally and flag items added above the submit button
+    """
+    html = files("robocompscoutingapp.initialize").joinpath("static/scoring_sample.html").read_text()
+    extra = "\n".join(
+        f'<div class="row"><div class="six columns text-center">'
+        f'<button data-scorename="Extra item {i}" class="{"score_tally" if i % 2 else "score_flag"} button-primary">Item {i}</button>'
+        f'</div></div>'
+        for i in range(items)
+    )
+    submit_row = html.rfind('<div class="row">', 0, html.index("report_submit"))
+    return html[:submit_row] + extra + "\n" + html[submit_row:]
+
+def parseSeparately(html:str):
+    ScoringPageParser(html).parseScoringElement()
+    MatchAndTeamSelectionParser(html).parseElement()
+    JSScriptParser(html).parseElement()
+
+def parseShared(html:str, html_parser:str):
+    document = ParsedHTMLDocument(html, html_parser=html_parser)
+    ScoringPageParser(document).parseScoringElement()
+    MatchAndTeamSelectionParser(document).parseElement()
+    JSScriptParser(document).parseElement()
+
+def timeCall(func, repeat:int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000, help="Extra scoring items added to the sample page")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each, the median is reported")
+    args = parser.parse_args()
+
+    html = largeScoringPage(args.items)
+    runs = [
+        ("three parses, html.parser", lambda: parseSeparately(html)),
+        ("shared document, html.parser", lambda: parseShared(html, "html.parser")),
+    ]
+    if find_spec("lxml") is not None:
+        runs.append(("shared document, lxml", lambda: parseShared(html, "lxml")))
+
+    print(f"Scoring page with {args.items} extra items, {len(html)/1024:.0f} KiB")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for name, func in runs:
+            print(f"{name}: {timeCall(func, args.repeat):.1f} ms")
+    if find_spec("lxml") is None:
+        print("lxml is not installed, skipped")
@@ -0,0 +1,164 @@
+"""
+Benchmark for building and serializing the /api/getAllScores response.
+
+Makes an event with a scoring page of 3 modes and 30 scoring items, 60 teams and a dozen scored matches per team, then times:
+    - the previous path: AllTeamResults models, validated and serialized by FastAPI's response_model handling
+    - the current path: plain dictionaries sent with FastJSONResponse (orjson if installed, pip install robocompscoutingapp[orjson])
+    - the same with the standard json module, as used when orjson is not installed
+    - the ?format=columnar response, which sends each team, mode and item name once
+Each is timed end to end (database reads included) and for the serialization step on its own.
+
+Run from the repository root:
+    python benchmarks/json_response_benchmark.py --teams 60 --items 30 --repeat 20
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.routing import serialize_response
+
+from robocompscoutingapp.GlobalItems import RCSA_Config
+from robocompscoutingapp.Initialize import Initialize
+from robocompscoutingapp.Integrate import Integrate
+from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB
+from robocompscoutingapp.FirstEventsAPI import FirstMatch, FirstTeam
+from robocompscoutingapp.web.FastJSONResponse import FastJSONResponse
+from robocompscoutingapp.ScoringData import (
+    AllTeamResults,
+    Score,
+    ScoredMatchForTeam,
+    addScoresBatchToDB,
+    getAggregrateResultsForAllTeams,
+    getAggregrateResultsForAllTeamsAsDict,
+    getAggregrateResultsForAllTeamsColumnar,
+    getCurrentScoringPageData,
+    getGameModeAndScoringElements,
+    storeMatches,
+    storeTeams
+)
+
+from html_parse_benchmark import largeScoringPage
+
+EVENT = "BNCH"
+MATCHES_PER_TEAM = 12
+
+def setUpEvent(tmpdir:str, teams:int, items:int) -> int:
+    """
+    Builds the event and returns the scoring page id
+    """
+    init = Initialize(tmpdir)
+    init.initialize(overwrite=True)
+    # The sample has 2 modes and 6 items
+    html = largeScoringPage(items - 6)
+    endgame = '<i id="endgame_icon" data-modename="Endgame" class="fa-solid fa-flag-checkered fa-4x game_mode"></i>'
+    html = html.replace('data-modename="Teleop" class="fa-solid fa-gamepad fa-4x game_mode"></i>', f'data-modename="Teleop" class="fa-solid fa-gamepad fa-4x game_mode"></i>{endgame}')
+    page = Path(tmpdir)/"static/large_scoring.html"
+    page.write_text(html)
+    init.updateTOML(["ServerConfig", "scoring_page"], str(page), tgt_dir=tmpdir)
+    os.chdir(tmpdir)
+    RCSA_Config.getConfig(reset=True)
+    RCSA_DB.getSQLSession(reset=True)
+    UserHTMLProcessing(str(page)).validate()
+    Integrate().integrate()
+    scoring_page_id = getCurrentScoringPageData().scoring_page_id
+
+    team_numbers = list(range(1, teams + 1))
+    storeTeams([FirstTeam(eventCode=EVENT, nameShort=f"Team {t}", teamNumber=t) for t in team_numbers])
+    matches = teams * MATCHES_PER_TEAM // 6
+    storeMatches([FirstMatch(
+        eventCode=EVENT,
+        description=f"Qualification {m}",
+        matchNumber=m,
+        Red1=team_numbers[(m*6) % teams], Red2=team_numbers[(m*6 + 1) % teams], Red3=team_numbers[(m*6 + 2) % teams],
+        Blue1=team_numbers[(m*6 + 3) % teams], Blue2=team_numbers[(m*6 + 4) % teams], Blue3=team_numbers[(m*6 + 5) % teams]
+    ) for m in range(1, matches + 1)])
+    modes_and_items = getGameModeAndScoringElements(scoring_page_id)
+    scores = [Score(mode_id=mode.mode_id, scoring_item_id=item.scoring_item_id, value=1)
+              for mode in modes_and_items.modes.values() for item in modes_and_items.scoring_items.values()]
+    addScoresBatchToDB(EVENT, [
+        ScoredMatchForTeam(matchNumber=m, teamNumber=team_numbers[(m*6 + slot) % teams], scoring_page_id=scoring_page_id, scores=scores)
+        for m in range(1, matches + 1) for slot in range(6)
+    ])
+    return scoring_page_id
+
+def responseField():
+    """
+    The response_model field FastAPI made for an endpoint returning AllTeamResults
+    """
+    app = FastAPI()
+
+    @app.get("/api/getAllScores")
+    def getAllScores() -> AllTeamResults:
+        pass
+
+    return app.routes[-1].response_field
+
+def timeCall(func, repeat:int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=60, help="Teams at the event")
+    parser.add_argument("--items", type=int, default=30, help="Scoring items on the page, at least 6")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs of each, the median is reported")
+    args = parser.parse_args()
+
+    fast_json_module = importlib.import_module("robocompscoutingapp.web.FastJSONResponse")
+    orjson = fast_json_module.orjson
+    original_wd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            scoring_page_id = setUpEvent(tmpdir, args.teams, args.items)
+            field = responseField()
+
+            def modelPath(results=None):
+                if results is None:
+                    results = getAggregrateResultsForAllTeams(EVENT, scoring_page_id)
+                return asyncio.run(serialize_response(field=field, response_content=results, dump_json=True))
+
+            def dictPath(results=None):
+                if results is None:
+                    results = getAggregrateResultsForAllTeamsAsDict(EVENT, scoring_page_id)
+                return FastJSONResponse(content=results).body
+
+            def columnarPath(results=None):
+                if results is None:
+                    results = getAggregrateResultsForAllTeamsColumnar(EVENT, scoring_page_id)
+                return FastJSONResponse(content=results).body
+
+            models = getAggregrateResultsForAllTeams(EVENT, scoring_page_id)
+            dicts = getAggregrateResultsForAllTeamsAsDict(EVENT, scoring_page_id)
+            columnar = getAggregrateResultsForAllTeamsColumnar(EVENT, scoring_page_id)
+            result_objects = sum(1 + len(team.by_mode_results) + len(team.totals) + sum(len(m.scores) for m in team.by_mode_results.values()) for team in models.data.values())
+            print(f"{len(models.data)} teams, {len(models.data[1].by_mode_results)} modes, {len(models.data[1].totals)} items: "
+                  f"{result_objects} result objects, {len(dictPath())/1024:.0f} KiB of JSON, {len(columnarPath())/1024:.0f} KiB columnar")
+
+            # (name, orjson module to use, path, already built results)
+            runs = [("AllTeamResults models, FastAPI response_model", orjson, modelPath, models)]
+            if orjson is not None:
+                runs.append(("dictionaries, FastJSONResponse with orjson", orjson, dictPath, dicts))
+            else:
+                print("orjson is not installed, skipped")
+            runs.append(("dictionaries, FastJSONResponse with json", None, dictPath, dicts))
+            runs.append(("columnar, FastJSONResponse", orjson, columnarPath, columnar))
+            try:
+                for name, orjson_module, func, built in runs:
+                    fast_json_module.orjson = orjson_module
+                    print(f"{name}: {timeCall(func, args.repeat):.1f} ms end to end, {timeCall(lambda func=func, built=built: func(built), args.repeat):.1f} ms serializing")
+            finally:
+                fast_json_module.orjson = orjson
+        finally:
+            RCSA_DB.closeAll()
+            os.chdir(original_wd)
@@ -0,0 +1,104 @@
+"""
+Benchmark for the in-memory read model behind /api/getMatchesAndTeams and /api/getMatches.
+
+Simulates a number of scout tablets asking for the match list at the same time and reports the p50 and p99 latency
+of building the response body the old way (query SQLite, validate every row, let FastAPI encode it) and from EventReadModel.
+A match is scored between rounds, as happens during an event.
+
+Run from the repository root:
+    python benchmarks/match_list_benchmark.py --tablets 30 --rounds 50
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from robocompscoutingapp.GlobalItems import RCSA_Config, temp_chdir
+from robocompscoutingapp.Initialize import Initialize
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB, MatchesForEvent, TeamsForEvent
+from robocompscoutingapp.FirstEventsAPI import FirstMatch, FirstTeam
+from robocompscoutingapp.ScoringData import (
+    EventReadModel,
+    MatchesAndTeams,
+    storeMatches,
+    storeTeams,
+    setMatchToScored
+)
+
+EVENT = "BNCH"
+
+def fillDatabase(matches:int, teams:int):
+    storeTeams([FirstTeam(eventCode=EVENT, nameShort=f"Team {t}", teamNumber=t) for t in range(1, teams + 1)])
+    storeMatches([FirstMatch(
+        eventCode=EVENT,
+        description=f"Qualification {m}",
+        matchNumber=m,
+        Red1=(m * 6) % teams + 1,
+        Red2=(m * 6 + 1) % teams + 1,
+        Red3=(m * 6 + 2) % teams + 1,
+        Blue1=(m * 6 + 3) % teams + 1,
+        Blue2=(m * 6 + 4) % teams + 1,
+        Blue3=(m * 6 + 5) % teams + 1
+    ) for m in range(1, matches + 1)])
+
+def responseFromDatabase() -> bytes:
+    """
+    What the endpoint did before the read model
+    """
+    with RCSA_DB.getSQLSession() as db:
+        matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=EVENT, scored=False).order_by(MatchesForEvent.matchNumber)).all()
+        matches = { int(m.matchNumber):FirstMatch.model_validate(m) for m in matches_db }
+        teams_db = db.scalars(select(TeamsForEvent).filter_by(eventCode=EVENT)).all()
+        teams = { int(t.teamNumber): FirstTeam.model_validate(t) for t in teams_db }
+        data = MatchesAndTeams(matches=matches, teams=teams, eventCode=EVENT)
+    return JSONResponse(jsonable_encoder(data)).body
+
+def responseFromReadModel() -> bytes:
+    return EventReadModel.getSerialized(EVENT)
+
+def timeCall(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def runTablets(func, tablets:int, rounds:int, first_match_to_score:int) -> list:
+    """
+    Every round all tablets ask at once, then the next match is scored
+    """
+    timings = []
+    with ThreadPoolExecutor(max_workers=tablets) as pool:
+        for round_number in range(rounds):
+            timings.extend(pool.map(lambda _: timeCall(func), range(tablets)))
+            setMatchToScored(EVENT, first_match_to_score + round_number)
+    return timings
+
+def percentile(timings:list, pct:float) -> float:
+    return statistics.quantiles(timings, n=100)[int(pct) - 1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tablets", type=int, default=30, help="Concurrent requests per round")
+    parser.add_argument("--rounds", type=int, default=50, help="Rounds of requests, a match is scored after each")
+    parser.add_argument("--matches", type=int, default=120, help="Matches in the event")
+    parser.add_argument("--teams", type=int, default=60, help="Teams in the event")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Initialize(tmpdir).initialize(overwrite=True)
+        with temp_chdir(tmpdir):
+            RCSA_Config.getConfig(reset=True)
+            RCSA_DB.getSQLSession(reset=True)
+            fillDatabase(args.matches, args.teams)
+            assert responseFromDatabase() == responseFromReadModel()
+            before = runTablets(responseFromDatabase, args.tablets, args.rounds, 1)
+            after = runTablets(responseFromReadModel, args.tablets, args.rounds, args.rounds + 1)
+            RCSA_DB.closeAll()
+
+    print(f"{args.tablets} tablets, {args.rounds} rounds, {args.matches} matches, {args.teams} teams")
+    for name, timings in [("database", before), ("read model", after)]:
+        print(f"{name}: p50 {percentile(timings, 50):.3f} ms, p99 {percentile(timings, 99):.3f} ms")
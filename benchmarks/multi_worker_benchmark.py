@@ -0,0 +1,96 @@
+"""
+Read throughput benchmark for 'run --workers'.
+
+Fills an event with scores, then starts the API server with each number of worker processes and has reader
+processes request /api/getAllScores (without ETags, so every request is built) for a fixed time while a few
+tablets keep sending /api/addScores.  Reports the reads per second and the p50 and p99 read latency for each worker count.
+Scaling needs free CPU cores: with fewer cores than workers plus readers the numbers stay flat.
+
+Run from the repository root:
+    python benchmarks/multi_worker_benchmark.py --workers 1 2 4 --readers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from robocompscoutingapp.GlobalItems import RCSA_Config
+from robocompscoutingapp.RunAPIServer import RunAPIServer
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB
+from robocompscoutingapp.ScoringData import ScoredMatchForTeam, addScoresBatchToDB, getCurrentScoringPageData
+
+from async_db_benchmark import EVENT, setUpEvent, scoreSubmissions, percentile
+
+def reader(baseurl:str, seconds:float) -> list:
+    """
+    Runs in its own process so the client side is not held up by one GIL
+    """
+    timings = []
+    with requests.Session() as session:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = session.get(f"{baseurl}/api/getAllScores")
+            response.raise_for_status()
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def tablet(baseurl:str, submissions:list, done:threading.Event):
+    with requests.Session() as session:
+        for submission in submissions:
+            if done.is_set():
+                return
+            session.post(f"{baseurl}/api/addScores", json=submission).raise_for_status()
+
+def runReads(baseurl:str, readers:int, seconds:float, live_submissions:list, tablets:int) -> list:
+    done = threading.Event()
+    writers = [threading.Thread(target=tablet, args=(baseurl, live_submissions[i::tablets], done)) for i in range(tablets)]
+    for w in writers:
+        w.start()
+    try:
+        with multiprocessing.get_context("spawn").Pool(readers) as pool:
+            results = pool.starmap(reader, [(baseurl, seconds)] * readers)
+    finally:
+        done.set()
+        for w in writers:
+            w.join()
+    return [t for timings in results for t in timings]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--readers", type=int, default=8, help="Reader processes requesting /api/getAllScores")
+    parser.add_argument("--tablets", type=int, default=2, help="Threads sending scores during the reads")
+    parser.add_argument("--matches", type=int, default=80, help="Matches in the event, six submissions each.  Half are scored before the reads start")
+    parser.add_argument("--seconds", type=float, default=10, help="How long the readers run for each worker count")
+    args = parser.parse_args()
+
+    original_wd = os.getcwd()
+    results = {}
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                setUpEvent(tmpdir, args.matches, async_database=False)
+                submissions = scoreSubmissions(args.matches)
+                split = len(submissions) // 2
+                scoring_page_id = getCurrentScoringPageData().scoring_page_id
+                addScoresBatchToDB(EVENT, [ScoredMatchForTeam(scoring_page_id=scoring_page_id, **s) for s in submissions[:split]])
+                server = RunAPIServer(workers=workers)
+                server.run()
+                config = RCSA_Config.getConfig().ServerConfig
+                try:
+                    results[workers] = runReads(f"http://{config.IP_Address}:{config.port}", args.readers, args.seconds, submissions[split:], args.tablets)
+                finally:
+                    server.stop()
+                    RCSA_DB.closeAll()
+            finally:
+                os.chdir(original_wd)
+
+    print(f"{args.readers} readers, {args.tablets} tablets, {os.cpu_count()} CPUs, {args.seconds:.0f} s each")
+    for workers, timings in results.items():
+        print(f"{workers} worker(s): {len(timings)/args.seconds:.1f} reads/s, "
+              f"getAllScores p50 {percentile(timings, 50):.1f} ms p99 {percentile(timings, 99):.1f} ms")
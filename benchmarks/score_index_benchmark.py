@@ -0,0 +1,123 @@
+"""
+Benchmark for the secondary indexes on ScoresForEvent and MatchesForEvent.
+
+Builds a throwaway database at several sizes, then shows the query plan and median latency of the hot queries
+with the indexes dropped (as in databases made by older versions) and again after RCSA_DB.upgradeDatabase adds them.
+
+Run from the repository root:
+    python benchmarks/score_index_benchmark.py --rows 10000 100000 500000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import rcsa_scoring_tables, RCSA_DB
+
+EVENT = "BNCH"
+SCORING_PAGE_ID = 1
+MODES = 3
+ITEMS = 30
+TEAMS = 60
+INDEX_NAMES = [
+    "ScoresForEvent_event_page_team",
+    "ScoresForEvent_event_team_match",
+    "MatchesForEvent_event_scored_match",
+]
+
+# Same shapes as the queries in ScoringData.py
+QUERIES = {
+    "scores for one team": (
+        'SELECT * FROM "ScoresForEvent" WHERE "teamNumber" = :team AND "eventCode" = :event AND scoring_page_id = :page',
+        {"team": 7, "event": EVENT, "page": SCORING_PAGE_ID},
+    ),
+    "team already scored for match": (
+        'SELECT score_id FROM "ScoresForEvent" WHERE "eventCode" = :event AND "teamNumber" = :team AND "matchNumber" = :match LIMIT 1',
+        {"team": 7, "event": EVENT, "match": 3},
+    ),
+    "sums for all teams": (
+        'SELECT "teamNumber", mode_id, scoring_item_id, sum(CAST(value AS INTEGER)) FROM "ScoresForEvent" '
+        'WHERE "eventCode" = :event AND scoring_page_id = :page GROUP BY "teamNumber", mode_id, scoring_item_id',
+        {"event": EVENT, "page": SCORING_PAGE_ID},
+    ),
+    "unscored matches": (
+        'SELECT * FROM "MatchesForEvent" WHERE "eventCode" = :event AND scored = 0 ORDER BY "matchNumber"',
+        {"event": EVENT},
+    ),
+}
+
+def fillDatabase(engine, rows:int):
+    """
+    Adds about the requested number of score rows plus matching MatchesForEvent rows
+    """
+    rows_per_team_match = MODES * ITEMS
+    team_matches = max(1, rows // rows_per_team_match)
+    matches = team_matches // TEAMS + 1
+    with engine.begin() as conn:
+        conn.execute(
+            text('INSERT INTO "MatchesForEvent" ("eventCode", description, "matchNumber", "Red1", "Red2", "Red3", "Blue1", "Blue2", "Blue3", scored) '
+                 'VALUES (:event, :desc, :match, 1, 2, 3, 4, 5, 6, :scored)'),
+            [{"event": EVENT, "desc": f"Match {m}", "match": m, "scored": m <= matches // 2} for m in range(1, matches + 1)]
+        )
+        score_rows = []
+        for pair in range(team_matches):
+            team = pair % TEAMS + 1
+            match = pair // TEAMS + 1
+            for mode in range(1, MODES + 1):
+                for item in range(1, ITEMS + 1):
+                    score_rows.append({"page": SCORING_PAGE_ID, "mode": mode, "match": match, "event": EVENT,
+                                       "team": team, "item": item, "value": str((pair + item) % 4)})
+        conn.execute(
+            text('INSERT INTO "ScoresForEvent" (scoring_page_id, mode_id, "matchNumber", "eventCode", "teamNumber", scoring_item_id, value) '
+                 'VALUES (:page, :mode, :match, :event, :team, :item, :value)'),
+            score_rows
+        )
+        conn.execute(text("ANALYZE"))
+
+def timeQueries(engine, repeats:int) -> dict:
+    """
+    Returns {query name: (query plan, median milliseconds)}
+    """
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            plan = " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params))
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = (plan, statistics.median(timings))
+    return results
+
+def runForSize(rows:int, repeats:int):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f"sqlite:///{Path(tmpdir)/'bench.db'}")
+        rcsa_scoring_tables.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for index_name in INDEX_NAMES:
+                conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+        fillDatabase(engine, rows)
+        before = timeQueries(engine, repeats)
+        RCSA_DB.upgradeDatabase(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        after = timeQueries(engine, repeats)
+        engine.dispose()
+
+    print(f"\n=== {rows} score rows ===")
+    for name in QUERIES:
+        print(f"{name}: {before[name][1]:.3f} ms -> {after[name][1]:.3f} ms")
+        print(f"    before: {before[name][0]}")
+        print(f"    after:  {after[name][0]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000], help="Score table sizes to test")
+    parser.add_argument("--repeats", type=int, default=20, help="Runs per query, the median is reported")
+    args = parser.parse_args()
+    for rows in args.rows:
+        runForSize(rows, args.repeats)
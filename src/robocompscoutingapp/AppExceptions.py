@@ -48,3 +48,21 @@ class JavaScriptParseWarning(RCSAWarning):
 class IntegrationPageNotValidated(Exception):
     pass
 
+#### FRC Events API ##############
+
+class OfflineResponseNotCached(Exception):
+    """
+    Raised in offline mode when a FRC Events API response was never saved
+    """
+    pass
+
+class FirstEventsAPIUnavailable(Exception):
+    """
+    Raised when the FRC Events API is still busy or failing after the retries and there is no saved response to use
+    """
+    pass
+
+#### Scoring ##############
+
+class ScoresAlreadySubmitted(Exception):
+    pass
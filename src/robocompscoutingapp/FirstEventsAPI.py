@@ -1,11 +1,19 @@
 from pathlib import Path
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Union, List
+from typing import Union, List, Dict, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import hashlib
+import json
+import threading
 
 from robocompscoutingapp.GlobalItems import RCSAConfig
+from robocompscoutingapp.GlobalItems import FancyText as ft
+from robocompscoutingapp.AppExceptions import OfflineResponseNotCached, FirstEventsAPIUnavailable
 
 # Defining all these Pydantic models so I don't have to guess at key values later
 class FirstEventsConfig(BaseModel):
@@ -47,38 +55,235 @@ class FirstMatch(BaseModel):
 class NoAPIKeyProvided(Exception):
     pass
 
+class CachedResponse(BaseModel):
+    """
+    A saved API response.  Has the parts of requests.Response the API calls use
+    """
+    url:str
+    params:Dict[str, str] = Field(default={})
+    status_code:int
+    text:str
+    etag:Union[str, None] = Field(default=None)
+    last_modified:Union[str, None] = Field(default=None)
+    fetched:datetime.datetime
+
+    def json(self):
+        return json.loads(self.text)
+
+class FirstEventsResponseCache:
+    """
+    Disk cache of FRC Events API responses, one JSON file per URL and parameters.  Can be shared between threads
+    """
+
+    def __init__(self, folder:Path) -> None:
+        self.folder = Path(folder)
+        # Two threads saving the same request would share the temp file
+        self.store_lock = threading.Lock()
+
+    def pathFor(self, url:str, params:dict = None) -> Path:
+        """
+        Returns the file for this request.  The name is the SHA256 of the URL and sorted parameters
+        """
+        key = json.dumps([url, sorted((params or {}).items())])
+        return self.folder/f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, url:str, params:dict = None) -> CachedResponse:
+        """
+        Returns the saved response, None if there isn't one
+        """
+        path = self.pathFor(url, params)
+        if not path.exists():
+            return None
+        try:
+            return CachedResponse.model_validate_json(path.read_text())
+        except ValueError:
+            # Damaged file, fetch again
+            return None
+
+    def store(self, response:CachedResponse):
+        """
+        Saves a response.  Written to a temp file first so a crash can't leave half a file
+        """
+        path = self.pathFor(response.url, response.params)
+        tmp_path = path.with_suffix(".tmp")
+        with self.store_lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(response.model_dump_json())
+            tmp_path.replace(path)
+
 class FirstEventsAPI:
     """
     Interface to the First Events API
     """
 
+    # Seconds to connect and to wait for a response.  Venue internet is often slow, but a dead link shouldn't hang the CLI
+    request_timeout = (5, 30)
+    # Retries for connection errors and busy server responses, waiting backoff_factor * 2^(retry - 1) seconds between them
+    retries = 3
+    backoff_factor = 0.5
+    # Not 500, the API answers an invalid event code with a 500 that getTeamsAtEvent and getMatchesAtEvent turn into a ValueError
+    retry_statuses = [429, 502, 503, 504]
+
     def __init__(self, config:RCSAConfig, season:int = None) -> None:
         """
         Set up session and common headers        
         """
         self.config = config.FRCEvents
-        self.api_session = requests.Session()
         # basic = HTTPBasicAuth(config.Secrets.FRC_Events_API_Username, config.Secrets.FRC_Events_API_Auth_Token)
         # Check the API key values
         if config.Secrets.FRC_Events_API_Username == "sampleuser":
             raise(NoAPIKeyProvided(f"you did not update the default FRC Events API key username in {config.Secrets.secrets_file}"))
         if config.Secrets.FRC_Events_API_Auth_Token == "7eaa6338-a097-4221-ac04-b6120fcc4d49":
             raise(NoAPIKeyProvided(f"you did not update the default FRC Events API auth token in {config.Secrets.secrets_file}"))
-        self.api_session.auth = (config.Secrets.FRC_Events_API_Username, config.Secrets.FRC_Events_API_Auth_Token)
-        self.api_session.headers.update({"Accept":"application/json"})
+        self.auth = (config.Secrets.FRC_Events_API_Username, config.Secrets.FRC_Events_API_Auth_Token)
+        # requests does not promise a Session can be shared between threads, so each thread gets its own, see api_session
+        self.thread_sessions = threading.local()
         if season is None:
             season = datetime.date.today().year
         self.URL_Root = self.config.URL_Root + f"{season}/"
+        self.offline = self.config.offline
+        self.response_cache = None
+        response_cache_folder = config.responseCacheFolder()
+        if response_cache_folder is not None:
+            self.response_cache = FirstEventsResponseCache(response_cache_folder)
+        if self.offline:
+            if self.response_cache is None:
+                raise OfflineResponseNotCached("Offline mode needs the FRCEvents response_cache setting")
+            # No network, so nothing to check the API key against
+            return
         # Try the API key out and raise exception if no good
-        r = self.api_session.get(self.URL_Root)
+        r = self.getResponse(self.URL_Root)
         if r.status_code == 401:
             raise Exception("Your FRC Events user name and authentication token did not work, please check your settings")
         
+    def makeSession(self) -> requests.Session:
+        """
+        Returns a new Session with the API key, headers and retries set up
+        """
+        session = requests.Session()
+        session.auth = self.auth
+        session.headers.update({"Accept":"application/json"})
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.retry_statuses,
+            allowed_methods=["GET"],
+            # Hand back the last response instead of raising, getResponse decides what to do with it
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def api_session(self) -> requests.Session:
+        """
+        The calling thread's Session, made the first time the thread uses it
+        """
+        session = getattr(self.thread_sessions, "session", None)
+        if session is None:
+            session = self.makeSession()
+            self.thread_sessions.session = session
+        return session
+
+    def closeThreadSession(self):
+        """
+        Closes the calling thread's Session, if it has one.  For threads that are about to finish
+        """
+        session = getattr(self.thread_sessions, "session", None)
+        if session is not None:
+            session.close()
+            self.thread_sessions.session = None
+
+    def inThreadSession(self, func, *args):
+        """
+        Runs func(*args) on a pool thread, then closes the Session the thread used
+        """
+        try:
+            return func(*args)
+        finally:
+            self.closeThreadSession()
+
+    def getResponse(self, url:str, params:dict = None) -> Union[requests.Response, CachedResponse]:
+        """
+        GETs from the API through the response cache.  A saved response is re-checked with If-None-Match/If-Modified-Since
+        and reused if the API says it has not changed, if the API can't be reached, or if it is still busy or failing after
+        the retries.  In offline mode only saved responses are used
+
+        Parameters
+        ----------
+        url:str
+            Full URL
+        params:dict
+            Query parameters
+
+        Returns
+        -------
+        Union[requests.Response, CachedResponse]
+            The response, either live or saved
+
+        Raises
+        ------
+        OfflineResponseNotCached
+            Offline and this request was never saved
+        FirstEventsAPIUnavailable
+            Still busy or failing after the retries, and this request was never saved
+        """
+        if self.response_cache is None:
+            r = self.api_session.get(url, params=params, timeout=self.request_timeout)
+            if r.status_code in self.retry_statuses:
+                raise self.unavailable(r, url)
+            return r
+        params = {k:str(v) for k, v in (params or {}).items()}
+        cached = self.response_cache.get(url, params)
+        if self.offline:
+            if cached is None:
+                raise OfflineResponseNotCached(f"No saved response for {url} {params}.  Load the event data while online first")
+            return cached
+        headers = {}
+        if cached is not None:
+            if cached.etag is not None:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified is not None:
+                headers["If-Modified-Since"] = cached.last_modified
+        try:
+            r = self.api_session.get(url, params=params, headers=headers, timeout=self.request_timeout)
+        except (requests.ConnectionError, requests.Timeout) as badnews:
+            if cached is None:
+                raise badnews
+            ft.warning(f"Unable to reach the FRC Events API, using the response saved {cached.fetched:%Y-%m-%d %H:%M}")
+            return cached
+        if (r.status_code == 304) and (cached is not None):
+            return cached
+        if r.status_code in self.retry_statuses:
+            if cached is None:
+                raise self.unavailable(r, url)
+            ft.warning(f"The FRC Events API answered {r.status_code}, using the response saved {cached.fetched:%Y-%m-%d %H:%M}")
+            return cached
+        if r.status_code == 200:
+            self.response_cache.store(CachedResponse(
+                url=url,
+                params=params,
+                status_code=r.status_code,
+                text=r.text,
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+                fetched=datetime.datetime.now()
+            ))
+        return r
+
+    def unavailable(self, r:requests.Response, url:str) -> FirstEventsAPIUnavailable:
+        """
+        The error for a busy or failing response that is left after the retries
+        """
+        return FirstEventsAPIUnavailable(f"The FRC Events API answered {r.status_code} for {url} after {self.retries} retries.  Try again later")
+
 
 
     def getDistricts(self) -> List[FirstDistrict]:
         url = self.URL_Root + "districts"
-        r = self.api_session.get(url).json()
+        r = self.getResponse(url).json()
         toreturn = [FirstDistrict.model_validate(d) for d in r["districts"]]
         return toreturn
 
@@ -102,7 +307,7 @@ class FirstEventsAPI:
                 "districtCode":districtCode
             }
         url = self.URL_Root + "events"
-        r = self.api_session.get(url, params=params).json()
+        r = self.getResponse(url, params=params).json()
         toreturn = [FirstEvent.model_validate(e) for e in r["Events"]]
         return toreturn
         
@@ -124,7 +329,7 @@ class FirstEventsAPI:
             "eventCode":eventCode
         }
         url = self.URL_Root + "teams"
-        r = self.api_session.get(url, params=params)
+        r = self.getResponse(url, params=params)
         if "Invalid Event Requested" in r.text:
             raise ValueError(f"{eventCode} is not valid")
         r = r.json()
@@ -153,7 +358,7 @@ class FirstEventsAPI:
             "tournamentLevel":"qual"
         }
         url = self.URL_Root + f"schedule/{eventCode}"
-        r = self.api_session.get(url, params=params)
+        r = self.getResponse(url, params=params)
         if "Invalid Event Requested" in r.text:
             raise ValueError(f"{eventCode} is not valid")
         r = r.json()
@@ -173,4 +378,24 @@ class FirstEventsAPI:
     
 
 
-    
\ No newline at end of file
+    
+
+    def getTeamsAndMatchesAtEvent(self, eventCode:str) -> Tuple[List[FirstTeam], List[FirstMatch]]:
+        """
+        Gets the teams and the match schedule for an event at the same time, so a slow connection is only waited on once
+
+        Parameters
+        ----------
+        eventCode:str
+            Valid event code we are scoring
+
+        Returns
+        -------
+        Tuple[List[FirstTeam], List[FirstMatch]]
+            Teams and matches at the event
+        """
+        # Each pool thread uses its own Session.  The response cache is safe to share
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            teams = pool.submit(self.inThreadSession, self.getTeamsAtEvent, eventCode)
+            matches = pool.submit(self.inThreadSession, self.getMatchesAtEvent, eventCode)
+            return teams.result(), matches.result()
@@ -3,7 +3,6 @@ Collection of configuration items that are used across many parts of application
 """
 #from rich import print
 from enum import Enum
-from time import sleep
 import rich
 import pytest
 from pathlib import Path
@@ -71,6 +70,9 @@ rcsa_database_name = "rcsa_scoring.db"
 # name for the primary config file
 rcsa_config_filename = "rcsa_config.toml"
 
+# Environment variable that hands the running configuration to server worker processes
+rcsa_worker_config_env = "RCSA_WORKER_CONFIG"
+
 # Models to store the information from the TOML config
 # I do this so I get better coding hints and autofill across files. I'm a bit lazy
 class SecretsConfig(BaseModel):
@@ -83,6 +85,10 @@ class SecretsConfig(BaseModel):
 class FRCEventsConfig(BaseModel):
     first_event_id:Union[str,bool] 
     URL_Root:str 
+    # Folder for saved API responses, False turns the cache off.  A relative folder is kept next to the scoring database
+    response_cache:Union[bool, Path] = Path("frc_events_cache")
+    # Only use saved responses, for venues without internet
+    offline:bool = False
 
 class ServerConfig(BaseModel):
     IP_Address:str  
@@ -96,6 +102,23 @@ class ServerConfig(BaseModel):
     log_level:str
     scoring_page:Path
     FQDN:str 
+    # SQLite performance profile, applied to every new database connection
+    # Defaults are tuned for many scouts writing while the analysis page reads
+    sqlite_journal_mode:str = "WAL"
+    sqlite_synchronous:str = "NORMAL"
+    sqlite_mmap_size:int = 67108864     # bytes
+    sqlite_cache_size:int = -16000      # Negative is KiB, positive is pages
+    sqlite_temp_store:str = "MEMORY"
+    sqlite_busy_timeout:int = 5000      # ms a connection waits for another process's write to finish
+    # Server worker processes.  More than one spreads requests over several CPUs, they share the database file
+    workers:int = 1
+    # Use the asyncio database engine (aiosqlite) and async endpoints for the busy routes
+    async_database:bool = False
+    # BeautifulSoup parser for the scoring page, lxml is faster on large pages
+    html_parser:str = "html.parser"
+    # Compress API responses of at least compression_minimum_size bytes.  Static files are always served from compressed copies
+    compress_responses:bool = True
+    compression_minimum_size:int = 1024
 
     @field_validator("log_level")
     @classmethod
@@ -104,11 +127,68 @@ class ServerConfig(BaseModel):
             raise ValueError(f'{v} must be "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"')
         return v
 
+    @field_validator("html_parser")
+    @classmethod
+    def html_parser_validator(cls, v:str):
+        if v not in ["html.parser", "lxml"]:
+            raise ValueError(f'{v} must be "html.parser", "lxml"')
+        return v
+
+    @field_validator("workers")
+    @classmethod
+    def workers_validator(cls, v:int):
+        if v < 1:
+            raise ValueError(f"{v} must be at least 1")
+        return v
+
+    @field_validator("sqlite_journal_mode")
+    @classmethod
+    def sqlite_journal_mode_validator(cls, v:str):
+        if v.upper() not in ["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]:
+            raise ValueError(f'{v} must be "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"')
+        return v.upper()
+
+    @field_validator("sqlite_synchronous")
+    @classmethod
+    def sqlite_synchronous_validator(cls, v:str):
+        if v.upper() not in ["OFF", "NORMAL", "FULL", "EXTRA"]:
+            raise ValueError(f'{v} must be "OFF", "NORMAL", "FULL", "EXTRA"')
+        return v.upper()
+
+    @field_validator("sqlite_temp_store")
+    @classmethod
+    def sqlite_temp_store_validator(cls, v:str):
+        if v.upper() not in ["DEFAULT", "FILE", "MEMORY"]:
+            raise ValueError(f'{v} must be "DEFAULT", "FILE", "MEMORY"')
+        return v.upper()
+
 class RCSAConfig(BaseModel):
     Secrets:SecretsConfig
     FRCEvents:FRCEventsConfig
     ServerConfig:ServerConfig    
 
+    def responseCacheFolder(self) -> Union[Path, None]:
+        """
+        Where the FRC Events API responses are saved.  A relative response_cache (including the default) is put next to the
+        scoring database, not in whatever folder the CLI was started from
+
+        Returns
+        -------
+        Union[Path, None]
+            The folder, or None if the cache is off or there is no scoring database to put it next to
+        """
+        response_cache = self.FRCEvents.response_cache
+        if response_cache is False:
+            return None
+        if response_cache is True:
+            response_cache = FRCEventsConfig.model_fields["response_cache"].default
+        response_cache = Path(response_cache).expanduser()
+        if response_cache.is_absolute():
+            return response_cache
+        if not self.ServerConfig.scoring_database:
+            return None
+        return Path(self.ServerConfig.scoring_database).absolute().parent/response_cache
+
 class ValidTestMessageTypes(str, Enum):
     error = "error"
     warning = "warning"
@@ -201,6 +281,32 @@ class RCSA_Config:
             ServerConfig=serverConfig
         )
     
+    @classmethod
+    def shareWithWorkers(cls):
+        """
+        Puts the current configuration, including changes made since the TOML was read (i.e. the test database or the IP address),
+        in the environment so server worker processes started after this use the same settings.  See getWorkerConfig
+        """
+        os.environ[rcsa_worker_config_env] = cls.getConfig().model_dump_json()
+
+    @classmethod
+    def getWorkerConfig(cls) -> RCSAConfig:
+        """
+        Loads the configuration shared by shareWithWorkers.  Called once when a server worker process starts
+
+        Returns
+        -------
+        RCSAConfig
+            The configuration of the process that started this worker, or the TOML file if none was shared
+        """
+        shared_config = os.environ.get(rcsa_worker_config_env)
+        if shared_config is None:
+            return cls.getConfig()
+        cls._RCSAConfig = RCSAConfig.model_validate_json(shared_config)
+        # Stops getConfig reading the TOML file over the shared settings
+        cls._TOMLDocument = TOMLDocument()
+        return cls._RCSAConfig
+
     @classmethod
     def storeTestMessage(cls, msg:AutomatedTestMessage):
         """
@@ -242,23 +348,71 @@ def temp_chdir(tgt_dir):
 
 # From: https://gist.github.com/nonZero/2907502
 import signal
+import threading
+
+class ShutdownRequest:
+    """
+    Class level event that wakes GracefulInterruptHandler.wait, so the CLI sleeps until it is needed instead of polling.
+    Set by the interrupt signals and by the /test/testingComplete endpoint
+    """
+    _event = threading.Event()
+
+    @classmethod
+    def request(cls):
+        """
+        Asks the waiting CLI to stop the server.  Safe to call from any thread or a signal handler
+        """
+        cls._event.set()
+
+    @classmethod
+    def clear(cls):
+        cls._event.clear()
+
+    @classmethod
+    def isRequested(cls) -> bool:
+        return cls._event.is_set()
+
+    @classmethod
+    def wait(cls, timeout:float = None) -> bool:
+        """
+        Blocks until a shutdown is requested
+
+        Parameters
+        ----------
+        timeout:float
+            Seconds to wait, None waits forever
+
+        Returns
+        -------
+        bool
+            True if a shutdown was requested, False if the timeout ran out
+        """
+        return cls._event.wait(timeout)
 
 class GracefulInterruptHandler:
+
+    # Python only runs signal handlers on the main thread between bytecodes, so the wait is split into slices
+    # of this many seconds.  Otherwise a signal delivered to another thread would not wake it
+    signal_check_interval = 0.5
     
-    def __init__(self, sig=signal.SIGINT):
-        self.sig = sig
+    def __init__(self, sig=signal.SIGINT, extra_sigs=(signal.SIGTERM,)):
+        # SIGTERM too so a service manager stopping the app gets a clean shutdown
+        self.sigs = [sig] + [s for s in extra_sigs if s != sig]
         
     def __enter__(self):
         
         self.interrupted = False
         self.released = False
-        self.original_handler = signal.getsignal(self.sig)
+        ShutdownRequest.clear()
+        self.original_handlers = {sig:signal.getsignal(sig) for sig in self.sigs}
         
         def handler(signum, frame):
             self.release()
             self.interrupted = True
+            ShutdownRequest.request()
             
-        signal.signal(self.sig, handler)
+        for sig in self.sigs:
+            signal.signal(sig, handler)
         
         return self
         
@@ -270,11 +424,15 @@ class GracefulInterruptHandler:
         if self.released:
             return False
 
-        signal.signal(self.sig, self.original_handler)
+        for sig, original_handler in self.original_handlers.items():
+            signal.signal(sig, original_handler)
         self.released = True
         
         return True
     
     def wait(self):
-        while not (self.interrupted or RCSA_Config.getConfig().ServerConfig.testing_complete):
-            sleep(0.05)
\ No newline at end of file
+        """
+        Sleeps until interrupted or automated testing is complete
+        """
+        while not ShutdownRequest.wait(self.signal_check_interval):
+            pass
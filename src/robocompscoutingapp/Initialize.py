@@ -64,6 +64,7 @@ class Initialize:
         rcsa_config["ServerConfig"]["user_static_folder"] = str(self.dst_path.absolute()/"static")
         rcsa_config["ServerConfig"]["scoring_database"] = str(self.dst_path.absolute()/"rcsa_scoring.db")
         rcsa_config["ServerConfig"]["log_filename"] = str(self.dst_path.absolute()/"logs/rcsa_logs.log")
+        rcsa_config["FRCEvents"]["response_cache"] = str(self.dst_path.absolute()/"frc_events_cache")
         
         rcsa_config_file.write(rcsa_config)
    
@@ -1,14 +1,15 @@
 """
 Functions to ensure databases are ready to receive scoring information
 """
-from pathlib import Path
+from contextlib import contextmanager
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, insert
 
 from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
 from robocompscoutingapp.GlobalItems import RCSA_Config
 from robocompscoutingapp.AppExceptions import IntegrationPageNotValidated
-from robocompscoutingapp.ScoringPageParser import ScoringPageParser, ScoringParseResult
+from robocompscoutingapp.ScoringPageParser import ScoringParseResult
+from robocompscoutingapp.ScoringData import CurrentScoringPageCache, DataVersion
 from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     ScoringPageStatus,
     ModesForScoringPage,
@@ -36,12 +37,28 @@ class Integrate:
         """
         We need the game modes and scoring activities in order to add to the database
         """
-        with Path(self.scoring_page).open() as f:
-            spp = ScoringPageParser(f)
-            spr = spp.parseScoringElement()
-            return spr
+        # Stored by hash when the page was validated, so usually no parsing is needed
+        return UserHTMLProcessing(self.scoring_page).getScoringParseResult()
 
-    def addGameModesToDatabase(self, scoring_page_id:int, game_modes:list) -> dict:
+    @contextmanager
+    def sessionFor(self, db=None):
+        """
+        Yields the caller's session so work joins the caller's transaction.  If no session is given, yields a new one
+        that is committed when the work completes.
+
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session or None
+        """
+        if db is not None:
+            yield db
+            return
+        with RCSA_DB.getSQLSession() as new_db:
+            yield new_db
+            new_db.commit()
+
+    def addGameModesToDatabase(self, scoring_page_id:int, game_modes:list, db=None) -> dict:
         """
         Stores the discovered game modes in the data base so we have accurate indices
 
@@ -53,22 +70,26 @@ class Integrate:
         game_modes:list
             List of the game_modes from a ScoringPageResult
 
+        db:session
+            Optional session to do the insert in.  The caller is then responsible for the commit
+
         Returns
         -------
         dict
             Dictionary of the game modes with their primary key in the data base
         """
-        game_mode_dict = {}
-        with RCSA_DB.getSQLSession() as dbsession:
-            for game_mode in game_modes:
-                gm = ModesForScoringPage(scoring_page_id=scoring_page_id, mode_name=game_mode)
-                dbsession.add(gm)
-                dbsession.commit()
-                game_mode_dict[game_mode] = gm.mode_id
-            
-        return game_mode_dict
-
-    def addScoringItemsToDatabase(self, scoring_page_id:int, scoring_items:dict) -> dict:
+        if len(game_modes) == 0:
+            return {}
+        rows = [{"scoring_page_id":scoring_page_id, "mode_name":game_mode} for game_mode in game_modes]
+        with self.sessionFor(db) as dbsession:
+            # All modes in one statement, RETURNING gives back the generated ids
+            new_modes = dbsession.execute(
+                insert(ModesForScoringPage).returning(ModesForScoringPage.mode_name, ModesForScoringPage.mode_id),
+                rows
+            ).all()
+        return {mode_name:mode_id for mode_name, mode_id in new_modes}
+
+    def addScoringItemsToDatabase(self, scoring_page_id:int, scoring_items:dict, db=None) -> dict:
         """
         Stores the discovered scoring items in the data base so we have accurate IDs
 
@@ -80,32 +101,33 @@ class Integrate:
         scoring_items:dict
             Dictionary of the scoring_elements from a ScoringPageResult
 
+        db:session
+            Optional session to do the insert in.  The caller is then responsible for the commit
+
         Returns
         -------
         dict
             Dictionary of the scoring items with their primary key in the data base
         """
-        to_return = {}
-        with RCSA_DB.getSQLSession() as db:
-            for index, (key, value) in enumerate(scoring_items.items()):
-                if isinstance(value, str):
-                    # Prevent issues, single item instead of list as expected
-                    si = ScoringItemsForScoringPage(scoring_page_id=scoring_page_id, name=value, type=key)
-                    db.add(si)
-                    db.commit()
-                    to_return[value] = si.scoring_item_id
-                elif isinstance(value, list):
-                    for an_item in value:
-                        si = ScoringItemsForScoringPage(scoring_page_id=scoring_page_id, name=an_item, type=key)
-                        db.add(si)
-                        db.commit()
-                        to_return[an_item] = si.scoring_item_id
-                else:
-                    raise TypeError(f"I don't know how to handle a {type(value)} object")
-        
-        return to_return
-
-    def updateToIntegrated(self, scoring_page_id:int):
+        rows = []
+        for key, value in scoring_items.items():
+            if isinstance(value, str):
+                # Prevent issues, single item instead of list as expected
+                rows.append({"scoring_page_id":scoring_page_id, "name":value, "type":key})
+            elif isinstance(value, list):
+                rows.extend([{"scoring_page_id":scoring_page_id, "name":an_item, "type":key} for an_item in value])
+            else:
+                raise TypeError(f"I don't know how to handle a {type(value)} object")
+        if len(rows) == 0:
+            return {}
+        with self.sessionFor(db) as dbsession:
+            new_items = dbsession.execute(
+                insert(ScoringItemsForScoringPage).returning(ScoringItemsForScoringPage.name, ScoringItemsForScoringPage.scoring_item_id),
+                rows
+            ).all()
+        return {name:scoring_item_id for name, scoring_item_id in new_items}
+
+    def updateToIntegrated(self, scoring_page_id:int, db=None):
         """
         Updates the record for this page in the database to indicate it has been successfully integrated
 
@@ -113,11 +135,18 @@ class Integrate:
         ----------
         scoring_page_id:int
             The primary key for this page
+
+        db:session
+            Optional session to do the update in.  The caller is then responsible for the commit, and for invalidating
+            CurrentScoringPageCache and bumping DataVersion after it
         """
-        with RCSA_DB.getSQLSession() as db:
-            this_page = db.scalars(select(ScoringPageStatus).where(ScoringPageStatus.scoring_page_id==scoring_page_id)).one()
+        with self.sessionFor(db) as dbsession:
+            this_page = dbsession.scalars(select(ScoringPageStatus).where(ScoringPageStatus.scoring_page_id==scoring_page_id)).one()
             this_page.integrated = True
-            db.commit()
+        if db is None:
+            # Committed by sessionFor
+            CurrentScoringPageCache.invalidate()
+            DataVersion.bump()
 
     def getModeIDDict(self, scoring_page_id:int) -> dict:
         """
@@ -168,11 +197,14 @@ class Integrate:
         if not db_result.integrated:
             # Get the scoring page result
             spr = self.getScoringPageResult()
-            # Store items in db
-            mode_id_dict = self.addGameModesToDatabase(scoring_page_id, spr.game_modes)
-            scoring_item_id_dict = self.addScoringItemsToDatabase(scoring_page_id, spr.scoring_elements)
-            # Update the database
-            self.updateToIntegrated(scoring_page_id)
+            # Store items and mark the page integrated in one transaction, so a failure leaves nothing half added
+            with RCSA_DB.getSQLSession() as db:
+                mode_id_dict = self.addGameModesToDatabase(scoring_page_id, spr.game_modes, db=db)
+                scoring_item_id_dict = self.addScoringItemsToDatabase(scoring_page_id, spr.scoring_elements, db=db)
+                self.updateToIntegrated(scoring_page_id, db=db)
+                db.commit()
+            CurrentScoringPageCache.invalidate()
+            DataVersion.bump()
         else:
             mode_id_dict = self.getModeIDDict(scoring_page_id)
             scoring_item_id_dict = self.getScoringItemIDDict(scoring_page_id)
@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 from typing import List, Dict
 import warnings
 from pydantic import Field
@@ -6,6 +5,7 @@ from typing_extensions import Annotated
 
 from robocompscoutingapp.AppExceptions import JavaScriptParseError, JavaScriptParseWarning
 from robocompscoutingapp.BaseParsingModel import BaseParsingModel, ParsingFunctionToCall
+from robocompscoutingapp.ParsedHTMLDocument import soupFor
 from robocompscoutingapp.GlobalItems import rcsa_js_loader
 from robocompscoutingapp.GlobalItems import FancyText as ft
 
@@ -18,7 +18,8 @@ class JSScriptParser:
     """
 
     def __init__(self, input_html_or_file_handle) -> None:
-        self.soup = BeautifulSoup(input_html_or_file_handle, features="html.parser")
+        # A ParsedHTMLDocument is shared with the other parsers instead of parsing the page again
+        self.soup = soupFor(input_html_or_file_handle)
 
     def jSScriptPresent(self) -> bool:
         """
@@ -0,0 +1,137 @@
+"""
+Fan out of small live update messages (match scored, new team aggregates, schedule refreshed) to the clients connected to /api/events/stream
+"""
+import asyncio
+import json
+import threading
+from typing import Set
+
+class LiveUpdateSubscriber:
+    """
+    One connected client.  Messages wait in a bounded queue, a client that falls too far behind is dropped so it can't hold memory
+    """
+
+    def __init__(self, max_queued:int) -> None:
+        self.queue = asyncio.Queue(maxsize=max_queued)
+        self.dropped = False
+
+class LiveUpdateBroadcaster:
+    """
+    Class level broadcaster that fans messages out to every subscriber from the server's event loop, so no thread is needed per client.
+    publish() can be called from any thread (the sync endpoints run in a thread pool).  Nothing is sent until the server attaches its loop.
+    """
+
+    _loop = None
+    _subscribers:Set[LiveUpdateSubscriber] = set()
+    _lock = threading.Lock()
+    max_queued = 100
+
+    @classmethod
+    def attach(cls, loop:asyncio.AbstractEventLoop):
+        """
+        Sets the event loop messages are delivered on.  Called when the server starts
+
+        Parameters
+        ----------
+        loop:asyncio.AbstractEventLoop
+            The server's running event loop
+        """
+        with cls._lock:
+            cls._loop = loop
+            cls._subscribers = set()
+
+    @classmethod
+    def hasSubscribers(cls) -> bool:
+        """
+        Returns True if any clients are connected.  Used to skip building messages nobody will receive
+        """
+        return cls._loop is not None and len(cls._subscribers) > 0
+
+    @classmethod
+    def subscribe(cls) -> LiveUpdateSubscriber:
+        """
+        Adds a subscriber.  Call from the event loop
+
+        Returns
+        -------
+        LiveUpdateSubscriber
+            New subscriber, read messages from its queue.  A None message means the stream is closed
+        """
+        subscriber = LiveUpdateSubscriber(cls.max_queued)
+        with cls._lock:
+            cls._subscribers.add(subscriber)
+        return subscriber
+
+    @classmethod
+    def unsubscribe(cls, subscriber:LiveUpdateSubscriber):
+        """
+        Removes a subscriber
+        """
+        with cls._lock:
+            cls._subscribers.discard(subscriber)
+
+    @classmethod
+    def publish(cls, event:str, data:dict):
+        """
+        Sends a message to every subscriber.  Safe to call from any thread, does nothing if the server is not running
+
+        Parameters
+        ----------
+        event:str
+            SSE event name
+        data:dict
+            JSON serializable message body
+        """
+        loop = cls._loop
+        if loop is None or len(cls._subscribers) == 0:
+            return
+        message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+        try:
+            loop.call_soon_threadsafe(cls._fanOut, message)
+        except RuntimeError:
+            # Loop already closed, the server is gone
+            pass
+
+    @classmethod
+    def _fanOut(cls, message:str):
+        """
+        Queues the message for every subscriber.  Runs on the event loop
+        """
+        with cls._lock:
+            subscribers = list(cls._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber.dropped = True
+                cls.unsubscribe(subscriber)
+
+    @classmethod
+    def close(cls):
+        """
+        Ends every open stream and stops delivering messages.  Streams never finish on their own, so call this before stopping the server
+        """
+        with cls._lock:
+            loop = cls._loop
+            cls._loop = None
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(cls._closeAll)
+        except RuntimeError:
+            pass
+
+    @classmethod
+    def _closeAll(cls):
+        """
+        Sends the end of stream marker to every subscriber.  Runs on the event loop
+        """
+        with cls._lock:
+            subscribers = list(cls._subscribers)
+            cls._subscribers = set()
+        for subscriber in subscribers:
+            subscriber.dropped = True
+            # Make room for the marker
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
@@ -6,6 +6,7 @@ from typing_extensions import Annotated
 
 from robocompscoutingapp.AppExceptions import MatchAndTeamSelectionParseError, MatchAndTeamSelectionParseWarning
 from robocompscoutingapp.BaseParsingModel import BaseParsingModel, ParsingFunctionToCall
+from robocompscoutingapp.ParsedHTMLDocument import soupFor
 from robocompscoutingapp.GlobalItems import FancyText as ft
 
 class MatchAndTeamSelectionParseResult(BaseParsingModel):
@@ -14,7 +15,8 @@ class MatchAndTeamSelectionParseResult(BaseParsingModel):
 class MatchAndTeamSelectionParser:
 
     def __init__(self, input_html_or_file_handle) -> None:
-        self.soup = BeautifulSoup(input_html_or_file_handle, features="html.parser")
+        # A ParsedHTMLDocument is shared with the other parsers instead of parsing the page again
+        self.soup = soupFor(input_html_or_file_handle)
 
     def matchDivPresent(self) -> bool:
         """
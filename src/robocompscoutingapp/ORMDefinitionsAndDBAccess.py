@@ -1,3 +1,4 @@
+import importlib.util
 from pathlib import Path
 from typing import List
 from datetime import datetime
@@ -6,9 +7,17 @@ from sqlalchemy import (
     ForeignKey, 
     DateTime, 
     create_engine,
+    event,
+    inspect,
+    Index,
     Integer,
-    UniqueConstraint
+    UniqueConstraint,
+    select,
+    delete,
+    cast,
+    distinct
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -50,6 +59,16 @@ class ScoringPageStatus(rcsa_scoring_tables):
     # Has this page passed rcsa automatic testing
     tested: Mapped[bool] = mapped_column(default=False)
 
+class ScoringPageParseResults(rcsa_scoring_tables):
+    __tablename__ = "ScoringPageParseResults"
+
+    # SHA256 of the page, same as ScoringPageStatus.scoring_page_hash
+    scoring_page_hash: Mapped[str] = mapped_column(primary_key=True)
+    # Version of the app that parsed the page.  Results from another version are parsed again in case the rules changed
+    parser_version: Mapped[str]
+    # ScoringParseResult as JSON
+    parse_result: Mapped[str]
+
 class ModesForScoringPage(rcsa_scoring_tables):
     __tablename__ = "ModesForScoringPage"
     __table_args__ = (
@@ -88,6 +107,8 @@ class MatchesForEvent(rcsa_scoring_tables):
     __tablename__ = "MatchesForEvent"
     __table_args__ = (
         UniqueConstraint("eventCode", "matchNumber", name="MatchesForEvent_uniq_match_per_event"),
+        # Unscored matches for the event in match order
+        Index("MatchesForEvent_event_scored_match", "eventCode", "scored", "matchNumber"),
     )
 
     match_per_event: Mapped[int] = mapped_column(primary_key=True, autoincrement=True) 
@@ -107,6 +128,10 @@ class ScoresForEvent(rcsa_scoring_tables):
     __table_args__ = (
         UniqueConstraint("scoring_page_id", "eventCode", "teamNumber", "scoring_item_id", "matchNumber", "mode_id",
                          name="ScoresForEvent_uniq_score_item_per_team_per_event"),
+        # Scores for one team or all teams at an event on a scoring page, already in GROUP BY order for the analytics
+        Index("ScoresForEvent_event_page_team", "eventCode", "scoring_page_id", "teamNumber", "mode_id", "scoring_item_id"),
+        # Has this team been scored for this match yet
+        Index("ScoresForEvent_event_team_match", "eventCode", "teamNumber", "matchNumber"),
     )
 
     score_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -118,9 +143,157 @@ class ScoresForEvent(rcsa_scoring_tables):
     scoring_item_id:Mapped[int]
     value:Mapped[str] # Strings are most flexible here, interpretation up to the code that handles "type" of scoring item
 
+class TeamAggregatesForEvent(rcsa_scoring_tables):
+    # Materialized per team, mode and scoring item totals of ScoresForEvent.  Updated in the same transaction that stores scores
+    __tablename__ = "TeamAggregatesForEvent"
+    __table_args__ = (
+        UniqueConstraint("eventCode", "scoring_page_id", "teamNumber", "mode_id", "scoring_item_id",
+                         name="TeamAggregatesForEvent_uniq_item_per_team_per_event"),
+    )
+
+    team_aggregate_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    eventCode:Mapped[str]
+    scoring_page_id: Mapped[int]
+    teamNumber:Mapped[int]
+    mode_id: Mapped[int]
+    scoring_item_id:Mapped[int]
+    count_of_scores:Mapped[int] = mapped_column(default=0)
+    total:Mapped[int] = mapped_column(default=0)
+    sum_of_squares:Mapped[int] = mapped_column(default=0)
+
+class TeamMatchCountsForEvent(rcsa_scoring_tables):
+    # Materialized number of distinct matches scored per team
+    __tablename__ = "TeamMatchCountsForEvent"
+    __table_args__ = (
+        UniqueConstraint("eventCode", "scoring_page_id", "teamNumber", name="TeamMatchCountsForEvent_uniq_team_per_event"),
+    )
+
+    team_match_count_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    eventCode:Mapped[str]
+    scoring_page_id: Mapped[int]
+    teamNumber:Mapped[int]
+    scored_matches:Mapped[int] = mapped_column(default=0)
+
+######### MATERIALIZED AGGREGATES ############
+
+def addToTeamAggregates(db, *score_conditions):
+    """
+    Adds the ScoresForEvent rows matching score_conditions to TeamAggregatesForEvent.  Only pass conditions matching newly added rows,
+    rows already counted would be counted twice.
+
+    Parameters
+    ----------
+    db:session
+        Open session or connection.  The caller commits
+    score_conditions
+        Where clauses on ScoresForEvent
+    """
+    # Values are stored as strings in db for flexibility.  Convert here, the score paths only accept whole numbers (see checkForNonIntegerScores)
+    value = cast(ScoresForEvent.value, Integer)
+    new_rows = select(
+            ScoresForEvent.eventCode,
+            ScoresForEvent.scoring_page_id,
+            ScoresForEvent.teamNumber,
+            ScoresForEvent.mode_id,
+            ScoresForEvent.scoring_item_id,
+            func.count(),
+            func.sum(value),
+            func.sum(value * value)
+        ).where(*score_conditions).group_by(
+            ScoresForEvent.eventCode,
+            ScoresForEvent.scoring_page_id,
+            ScoresForEvent.teamNumber,
+            ScoresForEvent.mode_id,
+            ScoresForEvent.scoring_item_id
+        )
+    stmt = sqlite_insert(TeamAggregatesForEvent).from_select(
+        ["eventCode", "scoring_page_id", "teamNumber", "mode_id", "scoring_item_id", "count_of_scores", "total", "sum_of_squares"],
+        new_rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["eventCode", "scoring_page_id", "teamNumber", "mode_id", "scoring_item_id"],
+        set_={
+            "count_of_scores":TeamAggregatesForEvent.count_of_scores + stmt.excluded.count_of_scores,
+            "total":TeamAggregatesForEvent.total + stmt.excluded.total,
+            "sum_of_squares":TeamAggregatesForEvent.sum_of_squares + stmt.excluded.sum_of_squares
+        }
+    )
+    db.execute(stmt)
+
+def refreshTeamMatchCounts(db, *score_conditions):
+    """
+    Recounts the distinct scored matches for the teams with ScoresForEvent rows matching score_conditions
+
+    Parameters
+    ----------
+    db:session
+        Open session or connection.  The caller commits
+    score_conditions
+        Where clauses on ScoresForEvent picking the teams to recount, include every score for those teams
+    """
+    counts = select(
+            ScoresForEvent.eventCode,
+            ScoresForEvent.scoring_page_id,
+            ScoresForEvent.teamNumber,
+            func.count(distinct(ScoresForEvent.matchNumber))
+        ).where(*score_conditions).group_by(
+            ScoresForEvent.eventCode,
+            ScoresForEvent.scoring_page_id,
+            ScoresForEvent.teamNumber
+        )
+    stmt = sqlite_insert(TeamMatchCountsForEvent).from_select(
+        ["eventCode", "scoring_page_id", "teamNumber", "scored_matches"],
+        counts
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["eventCode", "scoring_page_id", "teamNumber"],
+        set_={"scored_matches":stmt.excluded.scored_matches}
+    )
+    db.execute(stmt)
+
+def rebuildTeamAggregates(db, eventCode:str = None, scoring_page_id:int = None):
+    """
+    Throws away and recalculates the materialized aggregates from ScoresForEvent
+
+    Parameters
+    ----------
+    db:session
+        Open session or connection.  The caller commits
+    eventCode:str
+        Only rebuild this event.  All events if None
+    scoring_page_id:int
+        Only rebuild this scoring page.  All pages if None
+    """
+    def conditionsFor(table) -> list:
+        conditions = []
+        if eventCode is not None:
+            conditions.append(table.eventCode == eventCode)
+        if scoring_page_id is not None:
+            conditions.append(table.scoring_page_id == scoring_page_id)
+        return conditions
+
+    db.execute(delete(TeamAggregatesForEvent).where(*conditionsFor(TeamAggregatesForEvent)))
+    db.execute(delete(TeamMatchCountsForEvent).where(*conditionsFor(TeamMatchCountsForEvent)))
+    addToTeamAggregates(db, *conditionsFor(ScoresForEvent))
+    refreshTeamMatchCounts(db, *conditionsFor(ScoresForEvent))
 
 ######### DB ACCESS ############    
 
+def setSQLitePerformancePragmas(dbapi_connection, connection_record):
+    """
+    SQLAlchemy "connect" event handler that applies the SQLite performance profile from [ServerConfig] to each new connection.
+    Values are checked by the ServerConfig validators before they get here.
+    """
+    server_config = RCSA_Config.getConfig().ServerConfig
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={server_config.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={server_config.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(server_config.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA cache_size={int(server_config.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA temp_store={server_config.sqlite_temp_store}")
+    cursor.execute(f"PRAGMA busy_timeout={int(server_config.sqlite_busy_timeout)}")
+    cursor.close()
+
 class RCSA_DB:
     """
     Class that connects to the database file, ensures all the required tables are built, and provides ready access to session
@@ -128,6 +301,10 @@ class RCSA_DB:
 
     _sqlASessionMaker = None
     _sqlAConnectionStr = None
+    _sqlAEngine = None
+    _sqlAAsyncSessionMaker = None
+    _sqlAAsyncEngine = None
+    _sqlAAsyncConnectionStr = None
 
     @classmethod
     def getSQLSession(cls, reset:bool = False) -> session:
@@ -148,6 +325,7 @@ class RCSA_DB:
         if reset:
             cls._sqlASessionMaker = None
             cls._sqlAConnectionStr = None
+            cls._sqlAEngine = None
 
         if cls._sqlASessionMaker is None:
             database_file = Path(RCSA_Config.getConfig().ServerConfig.scoring_database)
@@ -155,7 +333,90 @@ class RCSA_DB:
             database_file.parent.mkdir(parents=True, exist_ok=True)
             cls._sqlAConnectionStr = f"sqlite:///{database_file}"
             sqlAEngine = create_engine(cls._sqlAConnectionStr)
+            event.listen(sqlAEngine, "connect", setSQLitePerformancePragmas)
+            cls._sqlAEngine = sqlAEngine
             cls._sqlASessionMaker = sessionmaker(bind=sqlAEngine)
+            existing_tables = set(inspect(sqlAEngine).get_table_names())
             rcsa_scoring_tables.metadata.create_all(sqlAEngine)
+            cls.upgradeDatabase(sqlAEngine, existing_tables)
         return cls._sqlASessionMaker()
 
+    @classmethod
+    def getAsyncSQLSession(cls):
+        """
+        Class method to access the singleton asyncio SQL Alchemy session maker, used by the async endpoints when ServerConfig.async_database is set.
+        Use like 'async with RCSA_DB.getAsyncSQLSession() as dbsession:'.  Needs the optional aiosqlite package.
+        The tables are made (and upgraded) by the synchronous engine first, both engines use the same database file.
+
+        Returns
+        -------
+        AsyncSession
+            SQLAlchemy AsyncSession object
+        """
+        # Make sure the database is built and pick up a changed database file
+        cls.getSQLSession().close()
+        if cls._sqlAAsyncSessionMaker is None or cls._sqlAAsyncConnectionStr != cls._sqlAConnectionStr:
+            if importlib.util.find_spec("aiosqlite") is None:
+                raise ImportError("async_database needs the optional async packages.  Install with 'pip install robocompscoutingapp[async]' (No module named 'aiosqlite')")
+            try:
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            except ImportError as badnews:
+                raise ImportError(f"async_database needs the optional async packages.  Install with 'pip install robocompscoutingapp[async]' ({badnews})") from badnews
+            sqlAAsyncEngine = create_async_engine(cls._sqlAConnectionStr.replace("sqlite://", "sqlite+aiosqlite://", 1))
+            event.listen(sqlAAsyncEngine.sync_engine, "connect", setSQLitePerformancePragmas)
+            cls._sqlAAsyncEngine = sqlAAsyncEngine
+            cls._sqlAAsyncConnectionStr = cls._sqlAConnectionStr
+            # Objects are used after commit to build responses, don't expire them
+            cls._sqlAAsyncSessionMaker = async_sessionmaker(bind=sqlAAsyncEngine, expire_on_commit=False)
+        return cls._sqlAAsyncSessionMaker()
+
+    @classmethod
+    async def disposeAsync(cls):
+        """
+        Closes the pooled async connections.  Call from the event loop they were made on, before it stops
+        """
+        if cls._sqlAAsyncEngine is not None:
+            await cls._sqlAAsyncEngine.dispose()
+        cls._sqlAAsyncEngine = None
+        cls._sqlAAsyncSessionMaker = None
+        cls._sqlAAsyncConnectionStr = None
+
+    @classmethod
+    def upgradeDatabase(cls, engine, existing_tables:set = None):
+        """
+        Brings a database made by an older version up to date.  create_all only makes missing tables, so indexes added
+        to existing tables are created here, and the materialized aggregates are filled if their tables were just made.
+
+        Parameters
+        ----------
+        engine
+            SQLAlchemy engine for the database
+        existing_tables:set
+            Names of the tables in the database before create_all.  If None the aggregates are left alone
+        """
+        for table in rcsa_scoring_tables.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        if existing_tables is not None and ScoresForEvent.__tablename__ in existing_tables:
+            if not {TeamAggregatesForEvent.__tablename__, TeamMatchCountsForEvent.__tablename__}.issubset(existing_tables):
+                with engine.begin() as conn:
+                    rebuildTeamAggregates(conn)
+
+    @classmethod
+    def closeAll(cls):
+        """
+        Closes all pooled connections and forgets the session maker.  The next getSQLSession call reconnects.
+        Used before deleting a database file so SQLite can clean up the WAL files.
+        """
+        if cls._sqlAEngine is not None:
+            cls._sqlAEngine.dispose()
+        if cls._sqlAAsyncEngine is not None:
+            # Can't await here, the connections close when they are garbage collected
+            cls._sqlAAsyncEngine.sync_engine.dispose(close=False)
+        cls._sqlAAsyncEngine = None
+        cls._sqlAAsyncSessionMaker = None
+        cls._sqlAAsyncConnectionStr = None
+        cls._sqlAEngine = None
+        cls._sqlASessionMaker = None
+        cls._sqlAConnectionStr = None
+
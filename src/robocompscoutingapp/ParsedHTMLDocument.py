@@ -0,0 +1,55 @@
+"""
+One parsed copy of the user's HTML that every parser can share
+"""
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from robocompscoutingapp.GlobalItems import FancyText as ft
+
+# BeautifulSoup tree builders we allow.  lxml is much faster on large pages but is an optional install
+html_parser_backends = ["html.parser", "lxml"]
+
+class ParsedHTMLDocument:
+    """
+    Holds the BeautifulSoup tree for one page.  The parsers only search the tree, they never change it,
+    so the same document can be handed to ScoringPageParser, MatchAndTeamSelectionParser and JSScriptParser.
+    """
+
+    def __init__(self, input_html_or_file_handle, html_parser:str = "html.parser") -> None:
+        """
+        Parameters
+        ----------
+        input_html_or_file_handle
+            HTML string or open file
+        html_parser:str
+            BeautifulSoup tree builder, one of html_parser_backends.  Falls back to html.parser with a warning if lxml is not installed
+        """
+        if html_parser not in html_parser_backends:
+            raise ValueError(f"{html_parser} must be one of {html_parser_backends}")
+        try:
+            self.soup = BeautifulSoup(input_html_or_file_handle, features=html_parser)
+        except FeatureNotFound:
+            ft.warning(f"The {html_parser} HTML parser is not installed, using html.parser.  Install with 'pip install robocompscoutingapp[lxml]'")
+            html_parser = "html.parser"
+            if hasattr(input_html_or_file_handle, "seek"):
+                input_html_or_file_handle.seek(0)
+            self.soup = BeautifulSoup(input_html_or_file_handle, features=html_parser)
+        self.html_parser = html_parser
+
+def soupFor(input_html_or_file_handle_or_document) -> BeautifulSoup:
+    """
+    Returns the tree to search.  Shared documents are used as they are, anything else is parsed with html.parser
+
+    Parameters
+    ----------
+    input_html_or_file_handle_or_document
+        ParsedHTMLDocument, HTML string or open file
+
+    Returns
+    -------
+    BeautifulSoup
+        Parsed tree
+    """
+    if isinstance(input_html_or_file_handle_or_document, ParsedHTMLDocument):
+        return input_html_or_file_handle_or_document.soup
+    return BeautifulSoup(input_html_or_file_handle_or_document, features="html.parser")
@@ -3,13 +3,16 @@ from string import Template
 from uvicorn import Config
 import uvicorn
 
-from robocompscoutingapp.GlobalItems import RCSA_Config
-from robocompscoutingapp.web.ThreadedUvicorn import ThreadedUvicorn
+from robocompscoutingapp.GlobalItems import RCSA_Config, FancyText as ft
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB
+from robocompscoutingapp.web.ThreadedUvicorn import ThreadedUvicorn, ThreadedMultiprocessUvicorn
+from robocompscoutingapp.web.Compression import precompressStaticFiles, staticCacheFolder
 class RunAPIServer:
 
     def __init__(self, yaml_file_template:Path = Path("logs/.template.rcsa_log_config.yaml"),
                  destination_yaml_file:Path = Path("logs/rcsa_log_config.yaml"),
-                 daemon:bool = False
+                 daemon:bool = False,
+                 workers:int = None
                  ) -> None:
         """
         Make a RunAPIServer instance
@@ -21,11 +24,14 @@ class RunAPIServer:
             Initialize
         daemon:bool
             Will this server run as daemon?
+        workers:int
+            Number of server worker processes.  If None, uses workers from the config file
         """
         self.yaml_file_template = Path(yaml_file_template)
         self.destination_yaml_file = Path(destination_yaml_file)
         self.server_config = RCSA_Config.getConfig().ServerConfig
         self.daemon = daemon
+        self.workers = self.server_config.workers if workers is None else workers
 
     def setupLoggingYAML(self):
         """
@@ -56,10 +62,24 @@ class RunAPIServer:
         Runs the server
         """
         self.setupLoggingYAML()
+        # Compress the static files here, once, rather than on every request.  Only new and changed files are compressed
+        precompressStaticFiles(self.server_config.user_static_folder, staticCacheFolder(self.server_config.scoring_database))
         host = self.server_config.IP_Address
         port = self.server_config.port
-        config = Config("robocompscoutingapp.web:rcsa_api_app", host=host, port=port, reload=False, log_config=str(self.destination_yaml_file))
-        self.server = ThreadedUvicorn(config)
+        if self.workers > 1:
+            if self.server_config.sqlite_journal_mode != "WAL":
+                ft.warning(f"sqlite_journal_mode is {self.server_config.sqlite_journal_mode}.  With {self.workers} workers, WAL is strongly recommended so analytics reads do not wait on score writes")
+            # Make or upgrade the tables of the configured database here, once.  Workers doing it at the same time
+            # fail with "table already exists"
+            RCSA_DB.closeAll()
+            RCSA_DB.getSQLSession().close()
+            # Each worker is a new process, it gets the settings from here rather than re-reading the TOML
+            RCSA_Config.shareWithWorkers()
+            config = Config("robocompscoutingapp.web:workerApp", factory=True, host=host, port=port, reload=False, log_config=str(self.destination_yaml_file))
+            self.server = ThreadedMultiprocessUvicorn(config, self.workers)
+        else:
+            config = Config("robocompscoutingapp.web:rcsa_api_app", host=host, port=port, reload=False, log_config=str(self.destination_yaml_file))
+            self.server = ThreadedUvicorn(config)
         self.server.start()
 
     def stop(self):
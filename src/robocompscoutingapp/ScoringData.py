@@ -1,10 +1,21 @@
-from sqlalchemy import select, distinct, func, delete, desc
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, func, delete, desc, insert, case, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Dict, List, Union
-
-from robocompscoutingapp.GlobalItems import RCSA_Config
+from typing import Callable, Dict, List, Union
+from enum import Enum
+import asyncio
+from concurrent.futures import Future
+import queue
+import re
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from robocompscoutingapp.GlobalItems import RCSA_Config, ScoringClassTypes, FancyText as ft
+from robocompscoutingapp.AppExceptions import ScoresAlreadySubmitted
 from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
+from robocompscoutingapp.LiveUpdates import LiveUpdateBroadcaster
 from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     ScoringPageStatus,
     ModesForScoringPage,
@@ -12,7 +23,12 @@ from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     TeamsForEvent,
     MatchesForEvent,
     ScoresForEvent,
-    RCSA_DB
+    RCSA_DB,
+    TeamAggregatesForEvent,
+    TeamMatchCountsForEvent,
+    addToTeamAggregates,
+    refreshTeamMatchCounts,
+    rebuildTeamAggregates
 )
 
 _scoring_page_id = None
@@ -25,20 +41,133 @@ class ScoringPageStatus_pyd(BaseModel):
     integrated:bool
     tested:bool
 
+class DataVersion:
+    """
+    Monotonically increasing version of the scoring data, bumped after every committed write.  Read APIs use it as their
+    ETag so an unchanged response can be answered with 304 without touching the database.
+    The version starts from the process start time so ETags from an earlier run of the server are never reused.
+    With several server worker processes each one also watches the database for commits made by the others, see watchDatabase.
+    """
+
+    _start = format(time.time_ns(), "x")
+    _version = 0
+    _lock = threading.Lock()
+    # Read only connection whose PRAGMA data_version changes when any other connection commits
+    _watch_connection = None
+    _watched_data_version = None
+
+    @classmethod
+    def current(cls) -> str:
+        """
+        Returns the current version as a string, suitable for an ETag
+        """
+        if cls._watch_connection is not None:
+            cls.checkForOtherWriters()
+        return f"{cls._start}-{cls._version}"
+
+    @classmethod
+    def watchDatabase(cls, database_file:Path):
+        """
+        Follows writes made to the database by other processes.  Used by server worker processes, which only hear about their own writes.
+        Each worker still has its own ETags, a client that moves to another worker gets one full response
+
+        Parameters
+        ----------
+        database_file:Path
+            The scoring database
+        """
+        with cls._lock:
+            cls._watch_connection = sqlite3.connect(database_file, check_same_thread=False)
+            cls._watched_data_version = cls._watch_connection.execute("PRAGMA data_version").fetchone()[0]
+
+    @classmethod
+    def checkForOtherWriters(cls) -> bool:
+        """
+        Moves to a new version and drops the in-memory copies of database rows if anything was committed since the last check.
+        The watch connection never writes, so this includes this process's own commits
+
+        Returns
+        -------
+        bool
+            True if the database changed
+        """
+        with cls._lock:
+            data_version = cls._watch_connection.execute("PRAGMA data_version").fetchone()[0]
+            changed = data_version != cls._watched_data_version
+            cls._watched_data_version = data_version
+        if changed:
+            EventReadModel.invalidate()
+            CurrentScoringPageCache.invalidate()
+            cls.bump()
+        return changed
+
+    @classmethod
+    def bump(cls):
+        """
+        Moves to a new version.  Call after the change is committed
+        """
+        with cls._lock:
+            cls._version += 1
+
+class CurrentScoringPageCache:
+    """
+    Keeps the status of the configured scoring page in memory so the request paths don't open a session and
+    re-hash the scoring page every call.  The cached status is dropped when the scoring page file changes (mtime or size),
+    when a different database is configured, or when invalidate() is called after the status row is updated.
+    """
+
+    _cache_key = None
+    _status = None
+
+    @classmethod
+    def currentKey(cls) -> tuple:
+        """
+        Returns the tuple that identifies the scoring page file version and database the cached status belongs to
+        """
+        server_config = RCSA_Config.getConfig().ServerConfig
+        file_stat = Path(server_config.scoring_page).stat()
+        return (str(server_config.scoring_page), file_stat.st_mtime_ns, file_stat.st_size, str(server_config.scoring_database))
+
+    @classmethod
+    def getStatus(cls) -> ScoringPageStatus_pyd:
+        """
+        Returns the cached status, reloading it from the database if the cache is stale
+
+        Returns
+        -------
+        ScoringPageStatus_pyd
+            Status of the configured scoring page, None if the page has not been validated
+        """
+        key = cls.currentKey()
+        if (cls._status is not None) and (cls._cache_key == key):
+            return cls._status
+        uhp = UserHTMLProcessing(RCSA_Config.getConfig().ServerConfig.scoring_page)
+        sps = uhp.checkForValidatedPageEntry()
+        if sps is None:
+            # Not cached so a later validation is picked up
+            cls.invalidate()
+            return None
+        cls._status = ScoringPageStatus_pyd.model_validate(sps)
+        cls._cache_key = key
+        return cls._status
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drops the cached status.  Call this after changing the ScoringPageStatus row
+        """
+        cls._cache_key = None
+        cls._status = None
+
 def getCurrentScoringPageData() -> ScoringPageStatus_pyd:
     """
     Returns the current scoring page status
     """
-    # global _scoring_page_id
-    # if _scoring_page_id is None:
-    sp = RCSA_Config.getConfig().ServerConfig.scoring_page
-    uhp = UserHTMLProcessing(sp)
-    sps = uhp.checkForValidatedPageEntry()
-    if sps is None:
+    status = CurrentScoringPageCache.getStatus()
+    if status is None:
         return None
-    to_return = ScoringPageStatus_pyd.model_validate(sps)
-    # _scoring_page_id = sps.scoring_page_id
-    return to_return
+    # Hand back a copy so callers can't change the cached object
+    return status.model_copy()
 
 def setScoringPageTestResult(success:bool, scoring_page_id:int):
     """
@@ -55,6 +184,8 @@ def setScoringPageTestResult(success:bool, scoring_page_id:int):
         sps = db.scalars(select(ScoringPageStatus).where(ScoringPageStatus.scoring_page_id==scoring_page_id)).one()
         sps.tested = success
         db.commit()
+    CurrentScoringPageCache.invalidate()
+    DataVersion.bump()
 
 class GameMode(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -117,49 +248,82 @@ def deleteMatchesFromEvent(eventCode:str, delete_only_unscored:bool = False):
         else:
             db.execute(delete(MatchesForEvent).filter_by(eventCode=eventCode))
         db.commit()
+    EventReadModel.invalidate(eventCode)
+    DataVersion.bump()
+    publishScheduleRefreshed(eventCode)
 
     
-def storeTeams(team_list:List[FirstTeam]):
+class StoredRowCounts(BaseModel):
+    inserted:int = Field(default=0)
+    skipped:int = Field(default=0)      # Already in the database
+
+def bulkInsertIgnoringDuplicates(table, rows:List[dict]) -> StoredRowCounts:
+    """
+    Inserts all rows in one transaction with INSERT ... ON CONFLICT DO NOTHING, so rows that break a unique constraint are skipped
+
+    Parameters
+    ----------
+    table
+        ORM class for the target table
+    rows:List[dict]
+        Column values for each row
+
+    Returns
+    -------
+    StoredRowCounts
+        Count of inserted and skipped rows
+    """
+    if len(rows) == 0:
+        return StoredRowCounts()
+    with RCSA_DB.getSQLSession() as db:
+        # Core level executemany so the rowcount of inserted rows is available
+        result = db.connection().execute(sqlite_insert(table.__table__).on_conflict_do_nothing(), rows)
+        inserted = max(result.rowcount, 0)
+        db.commit()
+    return StoredRowCounts(inserted=inserted, skipped=len(rows) - inserted)
+
+def storeTeams(team_list:List[FirstTeam]) -> StoredRowCounts:
     """
-    Saves the list of teams to the database
+    Saves the list of teams to the database.  Teams already stored for the event are skipped.
 
     Parameters
     ----------
     team_list:List[FirstTeam]
         List of FirstTeam objects (Directly from FirstAPI.getTeamsAtEvent)
+
+    Returns
+    -------
+    StoredRowCounts
+        Count of inserted and skipped teams
     """
-    with RCSA_DB.getSQLSession() as db:
-        for team in team_list:
-            try:
-                new_db_team = TeamsForEvent(**team.model_dump())
-                db.add(new_db_team)
-                db.commit()
-            except IntegrityError:
-                # Already added for this event
-                db.rollback()
-            except Exception as badnews:
-                raise(f"Unable to add team {team.teamNumber} for event {team.eventCode} because {badnews}")
+    counts = bulkInsertIgnoringDuplicates(TeamsForEvent, [team.model_dump() for team in team_list])
+    for eventCode in {team.eventCode for team in team_list}:
+        EventReadModel.invalidate(eventCode)
+    DataVersion.bump()
+    return counts
         
-def storeMatches(match_list:List[FirstMatch]):
+def storeMatches(match_list:List[FirstMatch]) -> StoredRowCounts:
     """
-    Saves the list of teams to the database
+    Saves the list of matches to the database.  Matches already stored for the event are skipped, so scored matches are not overwritten.
 
     Parameters
     ----------
     match_list:List[FirstMatch]
         List of FirstMatch objects (Directly from FirstAPI.getMatchesAtEvent)
+
+    Returns
+    -------
+    StoredRowCounts
+        Count of inserted and skipped matches
     """
-    with RCSA_DB.getSQLSession() as db:
-        for match in match_list:
-            try:
-                new_db_team = MatchesForEvent(**match.model_dump())
-                db.add(new_db_team)
-                db.commit()
-            except IntegrityError:
-                # Already added for this event
-                db.rollback()
-            except Exception as badnews:
-                raise(f"Unable to add team {match.matchNumber} for event {match.eventCode} because {badnews}")
+    counts = bulkInsertIgnoringDuplicates(MatchesForEvent, [match.model_dump() for match in match_list])
+    for eventCode in {match.eventCode for match in match_list}:
+        EventReadModel.invalidate(eventCode)
+    DataVersion.bump()
+    if counts.inserted > 0:
+        for eventCode in {match.eventCode for match in match_list}:
+            publishScheduleRefreshed(eventCode)
+    return counts
 
 class MatchesAndTeams(BaseModel):
     # using dicts here to help with finding info from the scoring page later
@@ -167,6 +331,166 @@ class MatchesAndTeams(BaseModel):
     teams:Dict[int, FirstTeam]      # int is the teamNumber
     eventCode:str
 
+class EventReadModel:
+    """
+    In-memory copy of the matches and teams for each event, so the match selection endpoints don't query SQLite and
+    re-validate every row on each call.  An event is loaded by loadEventData (or the first time it is asked for),
+    matches are updated in place when they are scored, and the event is dropped when its match or team rows are stored or deleted.
+    JSON responses are serialized once and kept until the event data changes.
+    """
+
+    _database = None
+    _events:Dict[str, MatchesAndTeams] = {}
+    _serialized:Dict[tuple, bytes] = {}
+    _generation = 0     # Bumped on every change so a response serialized during a change is not kept
+    _lock = threading.Lock()
+
+    @classmethod
+    def _checkDatabase(cls):
+        """
+        Drops everything if a different database is configured.  Call with the lock held
+        """
+        database = str(RCSA_Config.getConfig().ServerConfig.scoring_database)
+        if database != cls._database:
+            cls._events = {}
+            cls._serialized = {}
+            cls._generation += 1
+            cls._database = database
+
+    @classmethod
+    def load(cls, eventCode:str) -> MatchesAndTeams:
+        """
+        (Re)loads all matches (ordered by ascending match number) and teams for the event from the database
+
+        Parameters
+        ----------
+        eventCode:str
+            Official eventCode for this event
+
+        Returns
+        -------
+        MatchesAndTeams
+            The stored event data.  Do not change it
+        """
+        with RCSA_DB.getSQLSession() as db:
+            matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode).order_by(MatchesForEvent.matchNumber)).all()
+            teams_db = db.scalars(select(TeamsForEvent).filter_by(eventCode=eventCode)).all()
+            event_data = MatchesAndTeams(
+                matches={ int(m.matchNumber):FirstMatch.model_validate(m) for m in matches_db },
+                teams={ int(t.teamNumber): FirstTeam.model_validate(t) for t in teams_db },
+                eventCode=eventCode
+            )
+        with cls._lock:
+            cls._checkDatabase()
+            cls._events[eventCode] = event_data
+            cls._dropSerialized(eventCode)
+        return event_data
+
+    @classmethod
+    def getEvent(cls, eventCode:str) -> MatchesAndTeams:
+        """
+        Returns the stored event data, loading it if needed.  Do not change the returned object
+        """
+        with cls._lock:
+            cls._checkDatabase()
+            event_data = cls._events.get(eventCode)
+        if event_data is None:
+            event_data = cls.load(eventCode)
+        return event_data
+
+    @classmethod
+    def getMatchesAndTeams(cls, eventCode:str, unscored_only:bool = True, include_teams:bool = True) -> MatchesAndTeams:
+        """
+        Returns a copy of the event data
+
+        Parameters
+        ----------
+        eventCode:str
+            Official eventCode for this event
+        unscored_only:bool
+            Only report matches that have yet to be scored.
+        include_teams:bool
+            Set to False to leave teams empty
+
+        Returns
+        -------
+        MatchesAndTeams
+            MatchesAndTeams object
+        """
+        event_data = cls.getEvent(eventCode)
+        with cls._lock:
+            matches = { number:m.model_copy() for number, m in event_data.matches.items() if not (unscored_only and m.scored) }
+            teams = { number:t.model_copy() for number, t in event_data.teams.items() } if include_teams else {}
+        return MatchesAndTeams(matches=matches, teams=teams, eventCode=eventCode)
+
+    @classmethod
+    def getSerialized(cls, eventCode:str, unscored_only:bool = True, include_teams:bool = True) -> bytes:
+        """
+        Same as getMatchesAndTeams, but returns the JSON response body.  The body is only built again after the event data changes
+        """
+        key = (eventCode, unscored_only, include_teams)
+        # Make sure the event is loaded first, loading counts as a change
+        cls.getEvent(eventCode)
+        with cls._lock:
+            cls._checkDatabase()
+            body = cls._serialized.get(key)
+            generation = cls._generation
+        if body is None:
+            body = cls.getMatchesAndTeams(eventCode, unscored_only=unscored_only, include_teams=include_teams).model_dump_json().encode("utf-8")
+            with cls._lock:
+                # Only keep it if nothing changed while serializing
+                if generation == cls._generation and eventCode in cls._events:
+                    cls._serialized[key] = body
+        return body
+
+    @classmethod
+    def matchScored(cls, eventCode:str, matchNumber:int):
+        """
+        Marks a loaded match as scored.  Call after the change is committed to the database
+
+        Parameters
+        ----------
+        eventCode:str
+            Event code for the scored event
+        matchNumber:int
+            Match number for the event
+        """
+        with cls._lock:
+            cls._checkDatabase()
+            event_data = cls._events.get(eventCode)
+            if event_data is None:
+                return
+            match = event_data.matches.get(matchNumber)
+            if match is None:
+                # Not a match we know about, reload on next use
+                del cls._events[eventCode]
+            elif not match.scored:
+                # Replace rather than change so copies handed out are not affected
+                event_data.matches[matchNumber] = match.model_copy(update={"scored":True})
+            cls._dropSerialized(eventCode)
+
+    @classmethod
+    def invalidate(cls, eventCode:str = None):
+        """
+        Drops the stored data for one event, or all events if no eventCode is given.  Call this after changing match or team rows
+        """
+        with cls._lock:
+            if eventCode is None:
+                cls._events = {}
+                cls._serialized = {}
+                cls._generation += 1
+            else:
+                cls._events.pop(eventCode, None)
+                cls._dropSerialized(eventCode)
+
+    @classmethod
+    def _dropSerialized(cls, eventCode:str):
+        """
+        Drops the serialized responses for the event.  Call with the lock held
+        """
+        cls._generation += 1
+        cls._serialized = {key:body for key, body in cls._serialized.items() if key[0] != eventCode}
+
 def getMatchesAndTeams(eventCode:str, unscored_only:bool = True) -> MatchesAndTeams:
     """
     Returns matches (ordered by ascending match number) and teams for the event
@@ -183,22 +507,7 @@ def getMatchesAndTeams(eventCode:str, unscored_only:bool = True) -> MatchesAndTe
     MatchesAndTeams
         MatchesAndTeams object
     """
-    with RCSA_DB.getSQLSession() as db:
-        # get all the matches
-        if unscored_only:
-            matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode, scored=False).order_by(MatchesForEvent.matchNumber)).all()
-        else:
-            matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode).order_by(MatchesForEvent.matchNumber)).all()
-        # matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode)).all()
-        matches = { int(m.matchNumber):FirstMatch.model_validate(m) for m in matches_db }
-        # get all the teams
-        teams_db = db.scalars(select(TeamsForEvent).filter_by(eventCode=eventCode)).all()
-        teams = { int(t.teamNumber): FirstTeam.model_validate(t) for t in teams_db }
-        return MatchesAndTeams(
-            matches=matches,
-            teams=teams, 
-            eventCode=eventCode
-        )
+    return EventReadModel.getMatchesAndTeams(eventCode, unscored_only=unscored_only)
 
 def getMatches(eventCode:str, unscored_only:bool = True) -> MatchesAndTeams:
     """
@@ -216,21 +525,7 @@ def getMatches(eventCode:str, unscored_only:bool = True) -> MatchesAndTeams:
     MatchesAndTeams
         MatchesAndTeams object (but teams will be empty {})
     """
-    with RCSA_DB.getSQLSession() as db:
-        # get all the matches
-        if unscored_only:
-            matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode, scored=False).order_by(MatchesForEvent.matchNumber)).all()
-        else:
-            matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode).order_by(MatchesForEvent.matchNumber)).all()
-        # matches_db = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode)).all()
-        matches = { m.matchNumber:FirstMatch.model_validate(m) for m in matches_db }
-        # get all the teams
-        teams = {}
-        return MatchesAndTeams(
-            matches=matches,
-            teams=teams,
-            eventCode=eventCode
-        )
+    return EventReadModel.getMatchesAndTeams(eventCode, unscored_only=unscored_only, include_teams=False)
 
 class MatchesAndTeamsLoaded(BaseModel):
     matches_are_loaded:bool
@@ -283,12 +578,12 @@ def loadEventData(
     already_loaded = isEventAlreadyLoaded(eventCode)
     if not (already_loaded.matches_are_loaded and already_loaded.teams_are_loaded):
         # There's no data load all of it
-        allTeams = fapi.getTeamsAtEvent(eventCode=eventCode)
+        allTeams, allMatches = fapi.getTeamsAndMatchesAtEvent(eventCode=eventCode)
         storeTeams(allTeams)
-        allMatches = fapi.getMatchesAtEvent(eventCode=eventCode)
         storeMatches(allMatches)
         # Just make sure the scoring data is empty for this event
         deleteScoresFromDB(eventCode)
+        EventReadModel.load(eventCode)
         return
     
     # If we are here, there is data already
@@ -297,23 +592,25 @@ def loadEventData(
     if reset_all_data:
         deleteMatchesFromEvent(eventCode)
         deleteScoresFromDB(eventCode)
-        allTeams = fapi.getTeamsAtEvent(eventCode=eventCode)
+        allTeams, allMatches = fapi.getTeamsAndMatchesAtEvent(eventCode=eventCode)
         storeTeams(allTeams)
-        allMatches = fapi.getMatchesAtEvent(eventCode=eventCode)
         storeMatches(allMatches)
+        EventReadModel.load(eventCode)
         return
     
     if refresh_match_data:
         deleteMatchesFromEvent(eventCode=eventCode, delete_only_unscored=True)
         # There may have been new teams added?
         # storeTeams prevents attempts to add same team to same event multiple times
-        allTeams = fapi.getTeamsAtEvent(eventCode=eventCode)
+        allTeams, allMatches = fapi.getTeamsAndMatchesAtEvent(eventCode=eventCode)
         storeTeams(allTeams)
         # storeMatches will prevent overwriting already scored events
-        allMatches = fapi.getMatchesAtEvent(eventCode=eventCode)
         storeMatches(allMatches)
+        EventReadModel.load(eventCode)
         return
 
+    EventReadModel.load(eventCode)
+
 ################## Scoring Functions #################
 
 def teamAlreadyScoredForThisMatch(teamNumber:int, matchNumber:int, eventCode:str) -> bool:
@@ -366,12 +663,141 @@ def deleteScoresFromDB(eventCode:str):
     """
     with RCSA_DB.getSQLSession() as db:
         db.execute(delete(ScoresForEvent).filter_by(eventCode=eventCode))
+        db.execute(delete(TeamAggregatesForEvent).filter_by(eventCode=eventCode))
+        db.execute(delete(TeamMatchCountsForEvent).filter_by(eventCode=eventCode))
         db.commit()
+    DataVersion.bump()
+
+def addScoresToAggregates(db, eventCode:str, stored:List[ScoredMatchForTeam], score_ids:List[int]):
+    """
+    Adds newly stored scores to the materialized team aggregates inside the caller's transaction
+
+    Parameters
+    ----------
+    db:session
+        Open SQLAlchemy session the scores were added in.  The caller commits
+    eventCode:str
+        Event code for the scored event
+    stored:List[ScoredMatchForTeam]
+        The stored submissions, with scoring_page_id set
+    score_ids:List[int]
+        score_id of the added score rows
+    """
+    if len(stored) == 0:
+        return
+    if len(score_ids) > 0:
+        addToTeamAggregates(db, ScoresForEvent.score_id.in_(score_ids))
+    for scoring_page_id, teamNumbers in teamsByScoringPage(stored).items():
+        refreshTeamMatchCounts(db,
+            ScoresForEvent.eventCode == eventCode,
+            ScoresForEvent.scoring_page_id == scoring_page_id,
+            ScoresForEvent.teamNumber.in_(teamNumbers)
+        )
+
+def rebuildAggregates(eventCode:str = None):
+    """
+    Recalculates the materialized team aggregates from the stored scores.  Only needed if scores were changed outside the app
+
+    Parameters
+    ----------
+    eventCode:str
+        Only rebuild this event.  All events if None
+    """
+    with RCSA_DB.getSQLSession() as db:
+        rebuildTeamAggregates(db, eventCode=eventCode)
+        db.commit()
+    DataVersion.bump()
+
+
+non_integer_scores_detail = "Your submitted scoring had a score that is not a whole number, please check.  No scoring data saved."
+# Score values sent as text, i.e. "3" from a form field
+whole_number_pattern = re.compile(r"\s*[+-]?[0-9]+\s*")
+
+def checkForRepeatedScores(match_score:ScoredMatchForTeam) -> bool:
+    """
+    Returns True if the submission has more than one score for the same mode and scoring item
+    """
+    score_keys = [(a_score.mode_id, a_score.scoring_item_id) for a_score in match_score.scores]
+    return len(score_keys) != len(set(score_keys))
+
+def checkForNonIntegerScores(match_score:ScoredMatchForTeam) -> bool:
+    """
+    Returns True if any score value is not a whole number.  Tally and flag scores are summed as integers, so a value
+    like 1.5 or "abc" would otherwise be cut down or counted as 0 when it is added to the aggregates
+    """
+    for a_score in match_score.scores:
+        if isinstance(a_score.value, int):
+            continue
+        if isinstance(a_score.value, str) and whole_number_pattern.fullmatch(a_score.value):
+            continue
+        return True
+    return False
+
+def insertScoresInSession(db, eventCode:str, match_score:ScoredMatchForTeam) -> Union[List[int], None]:
+    """
+    Inserts the recorded scores inside the caller's session.  This is the duplicate rule for every score path: a submission
+    is already submitted if any of its scores breaks the ScoresForEvent unique constraint.  The insert skips those rows
+    (ON CONFLICT DO NOTHING), so the check and the insert are one statement and nothing else in the transaction is undone.
+    Plain synchronous session code, so the async paths run it with AsyncSession.run_sync
+
+    Parameters
+    ----------
+    db:session
+        Open SQLAlchemy session
+    eventCode:str
+        Event code for the scored event
+    match_score:ScoredMatchForTeam
+        ScoredMatchForTeam object with scoring_page_id set and no repeated scores (see checkForRepeatedScores)
+
+    Returns
+    -------
+    Union[List[int], None]
+        score_id of the inserted rows, or None if the submission was already submitted.  Then nothing is left inserted
+    """
+    rows = [a_score.model_dump() | {
+        "scoring_page_id":match_score.scoring_page_id,
+        "eventCode":eventCode,
+        "matchNumber":match_score.matchNumber,
+        "teamNumber":match_score.teamNumber
+    } for a_score in match_score.scores]
+    if len(rows) == 0:
+        return []
+    score_ids = list(db.scalars(sqlite_insert(ScoresForEvent).values(rows).on_conflict_do_nothing().returning(ScoresForEvent.score_id)).all())
+    if len(score_ids) < len(rows):
+        if len(score_ids) > 0:
+            db.execute(delete(ScoresForEvent).where(ScoresForEvent.score_id.in_(score_ids)))
+        return None
+    return score_ids
+
+def storeScoresInSession(db, eventCode:str, match_score:ScoredMatchForTeam):
+    """
+    Adds the recorded scores, updates the aggregates and marks the match as scored inside the caller's session.  The caller commits.
+    Plain synchronous session code, so the async path runs it with AsyncSession.run_sync
+
+    Parameters
+    ----------
+    db:session
+        Open SQLAlchemy session
+    eventCode:str
+        Event code for the scored event
+    match_score:ScoredMatchForTeam
+        ScoredMatchForTeam object with scoring_page_id set
 
+    Raises
+    ------
+    ScoresAlreadySubmitted
+        Scores for this team and match were already saved (see insertScoresInSession).  Nothing was added
+    """
+    score_ids = insertScoresInSession(db, eventCode, match_score)
+    if score_ids is None:
+        raise ScoresAlreadySubmitted(f"Match #{match_score.matchNumber} data for team {match_score.teamNumber} already submitted for this match")
+    addScoresToAggregates(db, eventCode, [match_score], score_ids)
+    markMatchScored(db, eventCode=eventCode, matchNumber=match_score.matchNumber)
 
 def addScoresToDB(eventCode:str, match_score:ScoredMatchForTeam):
     """
-    Saves the recorded scores to the DB
+    Saves the recorded scores to the DB and marks the match as scored in a single transaction.
+    Scores already submitted for this team and match are detected by the ScoresForEvent unique constraint, the same as addScoresBatchToDB.
 
     Parameters
     ----------
@@ -379,25 +805,261 @@ def addScoresToDB(eventCode:str, match_score:ScoredMatchForTeam):
         Event code for the scored event
     match_score:ScoredMatchForTeam
         ScoredMatchForTeam object
+
+    Raises
+    ------
+    ScoresAlreadySubmitted
+        Scores for this team and match were already saved
     """
+    # Repeats inside the submission would also break the unique constraint, so catch those first
+    if checkForRepeatedScores(match_score):
+        raise ValueError("Your submitted scoring had multiple score entries for the same scoring item, please check.  No scoring data saved.")
+    if checkForNonIntegerScores(match_score):
+        raise ValueError(non_integer_scores_detail)
     if match_score.scoring_page_id is None:
         match_score.scoring_page_id = getCurrentScoringPageData().scoring_page_id
     with RCSA_DB.getSQLSession() as db:
-        try:
-            to_add = [ScoresForEvent(**a_score.model_dump() | {
-                "scoring_page_id":match_score.scoring_page_id,
-                "eventCode":eventCode,
-                "matchNumber":match_score.matchNumber,
-                "teamNumber":match_score.teamNumber
-            }) for a_score in match_score.scores]
-            db.add_all(to_add)
-            db.commit()
-        except IntegrityError:
-            raise IntegrityError(f"Your submitted scoring had multiple score entries for the same scoring item, please check.  No scoring data saved.")
-        # except Exception as badnews:
-        #     raise Exception(f"Unable to add scores to DB because {badnews}")
+        storeScoresInSession(db, eventCode, match_score)
+        db.commit()
+    scoresStored(eventCode, [match_score])
+
+async def addScoresToDBAsync(eventCode:str, match_score:ScoredMatchForTeam):
+    """
+    addScoresToDB for the async endpoints, using the asyncio database engine
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    match_score:ScoredMatchForTeam
+        ScoredMatchForTeam object
+
+    Raises
+    ------
+    ScoresAlreadySubmitted
+        Scores for this team and match were already saved
+    """
+    if checkForRepeatedScores(match_score):
+        raise ValueError("Your submitted scoring had multiple score entries for the same scoring item, please check.  No scoring data saved.")
+    if checkForNonIntegerScores(match_score):
+        raise ValueError(non_integer_scores_detail)
+    if match_score.scoring_page_id is None:
+        match_score.scoring_page_id = (await asyncio.to_thread(getCurrentScoringPageData)).scoring_page_id
+    async with RCSA_DB.getAsyncSQLSession() as db:
+        await db.run_sync(storeScoresInSession, eventCode, match_score)
+        await db.commit()
+    scoresStored(eventCode, [match_score], publish_team_results=False)
+    await publishTeamResultsAsync(eventCode, [match_score])
+
+def markMatchScored(db, eventCode:str, matchNumber:int):
+    """
+    Sets a given match to scored inside the caller's session.  The caller commits.
+    Right now set to after a single team is scored, but here to allow more complicated logic
+
+    Parameters
+    ----------
+    db:session
+        Open SQLAlchemy session
+    eventCode:str
+        Event code for the scored event
+    matchNumber:int
+        Match number for the event
+    """
+    m = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode, matchNumber=matchNumber)).one()
+    m.scored = True
+
+def scoresStored(eventCode:str, stored:List[ScoredMatchForTeam], publish_team_results:bool = True):
+    """
+    Updates the in-memory state and tells connected clients after scores are committed
 
-    setMatchToScored(eventCode=eventCode, matchNumber=match_score.matchNumber) 
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    stored:List[ScoredMatchForTeam]
+        The submissions that were stored, with scoring_page_id set
+    publish_team_results:bool
+        Send the new team aggregates too.  The async path sends them itself so the query doesn't block the event loop
+    """
+    match_numbers = sorted({ms.matchNumber for ms in stored})
+    for matchNumber in match_numbers:
+        EventReadModel.matchScored(eventCode, matchNumber)
+    DataVersion.bump()
+    if not LiveUpdateBroadcaster.hasSubscribers():
+        return
+    for matchNumber in match_numbers:
+        publishMatchScored(eventCode, matchNumber)
+    if publish_team_results:
+        for scoring_page_id, teamNumbers in teamsByScoringPage(stored).items():
+            publishTeamResults(eventCode, teamNumbers, scoring_page_id)
+
+def teamsByScoringPage(stored:List[ScoredMatchForTeam]) -> Dict[int, List[int]]:
+    """
+    Returns scoring_page_id:sorted team numbers for the stored submissions
+    """
+    teams_by_page = {}
+    for ms in stored:
+        teams_by_page.setdefault(ms.scoring_page_id, set()).add(ms.teamNumber)
+    return {scoring_page_id:sorted(teams) for scoring_page_id, teams in teams_by_page.items()}
+
+class ScoreSubmissionStatus(str, Enum):
+    stored = "stored"
+    duplicate = "duplicate"     # Same meaning as the 409 from /api/addScores, the scores were already saved
+    error = "error"
+
+class ScoreSubmissionResult(BaseModel):
+    matchNumber:int
+    teamNumber:int
+    status:ScoreSubmissionStatus
+    detail:str = Field(default=None)
+
+class BatchScoreSubmissionResult(BaseModel):
+    # In the same order as the submitted scores
+    results:List[ScoreSubmissionResult]
+
+def storeScoresBatchInSession(db, eventCode:str, match_scores:List[ScoredMatchForTeam]) -> List[ScoreSubmissionResult]:
+    """
+    Checks each submission and adds the good ones inside the caller's session.  The caller commits.
+    Plain synchronous session code, so the async path runs it with AsyncSession.run_sync
+
+    Parameters
+    ----------
+    db:session
+        Open SQLAlchemy session
+    eventCode:str
+        Event code for the scored event
+    match_scores:List[ScoredMatchForTeam]
+        List of ScoredMatchForTeam objects with scoring_page_id set
+
+    Returns
+    -------
+    List[ScoreSubmissionResult]
+        Per submission status, in the order submitted
+    """
+    results = []
+    # Look up the matches for all submissions at once
+    matches = {m.matchNumber:m for m in db.scalars(select(MatchesForEvent).where(
+        MatchesForEvent.eventCode == eventCode,
+        MatchesForEvent.matchNumber.in_({ms.matchNumber for ms in match_scores})
+    )).all()}
+    stored = []
+    added_score_ids = []
+    for match_score in match_scores:
+        result = ScoreSubmissionResult(
+            matchNumber=match_score.matchNumber,
+            teamNumber=match_score.teamNumber,
+            status=ScoreSubmissionStatus.stored
+        )
+        results.append(result)
+        if checkForRepeatedScores(match_score):
+            result.status = ScoreSubmissionStatus.error
+            result.detail = "Your submitted scoring had multiple score entries for the same scoring item, please check.  No scoring data saved."
+            continue
+        if checkForNonIntegerScores(match_score):
+            result.status = ScoreSubmissionStatus.error
+            result.detail = non_integer_scores_detail
+            continue
+        if match_score.matchNumber not in matches:
+            result.status = ScoreSubmissionStatus.error
+            result.detail = f"Match #{match_score.matchNumber} is not a match for event {eventCode}"
+            continue
+        # Also catches the same team and match sent twice in one batch
+        score_ids = insertScoresInSession(db, eventCode, match_score)
+        if score_ids is None:
+            result.status = ScoreSubmissionStatus.duplicate
+            result.detail = f"Match #{match_score.matchNumber} data for team {match_score.teamNumber} already submitted for this match"
+            continue
+        stored.append(match_score)
+        added_score_ids.extend(score_ids)
+        matches[match_score.matchNumber].scored = True
+    addScoresToAggregates(db, eventCode, stored, added_score_ids)
+    return results
+
+def addScoresBatchToDB(eventCode:str, match_scores:List[ScoredMatchForTeam]) -> BatchScoreSubmissionResult:
+    """
+    Saves a list of recorded scores to the DB in a single transaction.  Each submission is checked first so one bad
+    submission does not stop the others from being saved.
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    match_scores:List[ScoredMatchForTeam]
+        List of ScoredMatchForTeam objects
+
+    Returns
+    -------
+    BatchScoreSubmissionResult
+        Per submission status, in the order submitted
+    """
+    if len(match_scores) == 0:
+        return BatchScoreSubmissionResult(results=[])
+    results = commitScoresBatch(eventCode, match_scores)
+    scoresStored(eventCode, storedSubmissions(match_scores, results))
+    return BatchScoreSubmissionResult(results=results)
+
+def commitScoresBatch(eventCode:str, match_scores:List[ScoredMatchForTeam]) -> List[ScoreSubmissionResult]:
+    """
+    The database half of addScoresBatchToDB.  Stores and commits the submissions, the caller runs scoresStored for the stored ones
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    match_scores:List[ScoredMatchForTeam]
+        List of ScoredMatchForTeam objects, scoring_page_id is set on any that do not have one
+
+    Returns
+    -------
+    List[ScoreSubmissionResult]
+        Per submission status, in the order submitted
+    """
+    if any(ms.scoring_page_id is None for ms in match_scores):
+        current_scoring_page_id = getCurrentScoringPageData().scoring_page_id
+        for ms in match_scores:
+            if ms.scoring_page_id is None:
+                ms.scoring_page_id = current_scoring_page_id
+    with RCSA_DB.getSQLSession() as db:
+        results = storeScoresBatchInSession(db, eventCode, match_scores)
+        db.commit()
+    return results
+
+def storedSubmissions(match_scores:List[ScoredMatchForTeam], results:List[ScoreSubmissionResult]) -> List[ScoredMatchForTeam]:
+    """
+    The submissions with a stored status
+    """
+    return [ms for ms, result in zip(match_scores, results) if result.status == ScoreSubmissionStatus.stored]
+
+async def addScoresBatchToDBAsync(eventCode:str, match_scores:List[ScoredMatchForTeam]) -> BatchScoreSubmissionResult:
+    """
+    addScoresBatchToDB for the async endpoints, using the asyncio database engine
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    match_scores:List[ScoredMatchForTeam]
+        List of ScoredMatchForTeam objects
+
+    Returns
+    -------
+    BatchScoreSubmissionResult
+        Per submission status, in the order submitted
+    """
+    if len(match_scores) == 0:
+        return BatchScoreSubmissionResult(results=[])
+    if any(ms.scoring_page_id is None for ms in match_scores):
+        current_scoring_page_id = (await asyncio.to_thread(getCurrentScoringPageData)).scoring_page_id
+        for ms in match_scores:
+            if ms.scoring_page_id is None:
+                ms.scoring_page_id = current_scoring_page_id
+    async with RCSA_DB.getAsyncSQLSession() as db:
+        results = await db.run_sync(storeScoresBatchInSession, eventCode, match_scores)
+        await db.commit()
+    stored = storedSubmissions(match_scores, results)
+    scoresStored(eventCode, stored, publish_team_results=False)
+    await publishTeamResultsAsync(eventCode, stored)
+    return BatchScoreSubmissionResult(results=results)
 
 def setMatchToScored(eventCode:str, matchNumber:int):
     """
@@ -411,9 +1073,273 @@ def setMatchToScored(eventCode:str, matchNumber:int):
         Match number for the event
     """    
     with RCSA_DB.getSQLSession() as db:
-        m = db.scalars(select(MatchesForEvent).filter_by(eventCode=eventCode, matchNumber=matchNumber)).one()
-        m.scored = True
+        markMatchScored(db, eventCode=eventCode, matchNumber=matchNumber)
         db.commit()
+    EventReadModel.matchScored(eventCode, matchNumber)
+    DataVersion.bump()
+    publishMatchScored(eventCode, matchNumber)
+
+################## Score Write Queue #################
+
+class ScoreWriteJob:
+    """
+    Submissions from one request waiting for the writer.  The future gets the BatchScoreSubmissionResult for just these submissions
+    """
+
+    def __init__(self, eventCode:str, match_scores:List[ScoredMatchForTeam]) -> None:
+        self.eventCode = eventCode
+        self.match_scores = match_scores
+        self.future = Future()
+
+class ScoreWriteQueue:
+    """
+    Class level single writer for score submissions.  SQLite only allows one writer at a time, so instead of every request
+    thread fighting for the lock one writer thread drains the queue and commits whatever has arrived in one transaction
+    (group commit).  Each request waits on its own future, so the API answers are the same as writing directly.
+    When the writer is not running submissions are written directly by the calling thread.
+    """
+
+    _queue:queue.Queue = None
+    _thread:threading.Thread = None
+    _lock = threading.Lock()
+    max_batch = 64      # Submissions per commit
+
+    @classmethod
+    def start(cls):
+        """
+        Starts the writer thread.  Called when the server starts
+        """
+        with cls._lock:
+            if cls._thread is not None:
+                return
+            cls._queue = queue.Queue()
+            cls._thread = threading.Thread(target=cls._writer, args=(cls._queue,), name="ScoreWriteQueue", daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def stop(cls):
+        """
+        Writes anything still queued, then stops the writer thread
+        """
+        with cls._lock:
+            thread = cls._thread
+            write_queue = cls._queue
+            cls._thread = None
+            cls._queue = None
+        if thread is None:
+            return
+        write_queue.put(None)
+        thread.join()
+
+    @classmethod
+    def submit(cls, eventCode:str, match_scores:List[ScoredMatchForTeam]) -> Future:
+        """
+        Queues submissions for the writer
+
+        Parameters
+        ----------
+        eventCode:str
+            Event code for the scored event
+        match_scores:List[ScoredMatchForTeam]
+            List of ScoredMatchForTeam objects
+
+        Returns
+        -------
+        Future
+            Resolves to the BatchScoreSubmissionResult for these submissions, or the exception that stopped the write
+        """
+        job = ScoreWriteJob(eventCode, match_scores)
+        with cls._lock:
+            if cls._queue is not None:
+                cls._queue.put(job)
+                return job.future
+        cls._writeJobs([job])
+        return job.future
+
+    @classmethod
+    def _writer(cls, write_queue:queue.Queue):
+        """
+        Writer thread.  Blocks for the first job, then takes whatever else is already waiting up to max_batch submissions.  None stops it
+        """
+        while True:
+            job = write_queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            submissions = len(job.match_scores)
+            stopping = False
+            while submissions < cls.max_batch:
+                try:
+                    job = write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                jobs.append(job)
+                submissions += len(job.match_scores)
+            cls._writeJobs(jobs)
+            if stopping:
+                return
+
+    @classmethod
+    def _writeJobs(cls, jobs:List[ScoreWriteJob]):
+        """
+        Commits the jobs for each event in one transaction and hands each job its own results as soon as they are committed.
+        Only a failed write fails the jobs.  The scores are saved by then, so a problem updating the in-memory state or
+        telling connected clients is logged instead
+        """
+        jobs_by_event = {}
+        for job in jobs:
+            jobs_by_event.setdefault(job.eventCode, []).append(job)
+        for eventCode, event_jobs in jobs_by_event.items():
+            match_scores = [ms for job in event_jobs for ms in job.match_scores]
+            try:
+                all_results = commitScoresBatch(eventCode, match_scores)
+            except Exception as badnews:
+                for job in event_jobs:
+                    job.future.set_exception(badnews)
+                continue
+            results = iter(all_results)
+            for job in event_jobs:
+                job.future.set_result(BatchScoreSubmissionResult(results=[next(results) for _ in job.match_scores]))
+            try:
+                scoresStored(eventCode, storedSubmissions(match_scores, all_results))
+            except Exception as badnews:
+                ft.error(f"Scores for event {eventCode} were saved, but updating the server state after saving failed because {badnews}")
+
+async def addScoresQueued(eventCode:str, match_score:ScoredMatchForTeam):
+    """
+    addScoresToDB through the ScoreWriteQueue, for the server's endpoints
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    match_score:ScoredMatchForTeam
+        ScoredMatchForTeam object
+
+    Raises
+    ------
+    ScoresAlreadySubmitted
+        Scores for this team and match were already saved
+    """
+    batch_result = await asyncio.wrap_future(ScoreWriteQueue.submit(eventCode, [match_score]))
+    result = batch_result.results[0]
+    if result.status == ScoreSubmissionStatus.duplicate:
+        raise ScoresAlreadySubmitted(result.detail)
+    if result.status == ScoreSubmissionStatus.error:
+        raise ValueError(result.detail)
+
+async def addScoresBatchQueued(eventCode:str, match_scores:List[ScoredMatchForTeam]) -> BatchScoreSubmissionResult:
+    """
+    addScoresBatchToDB through the ScoreWriteQueue, for the server's endpoints
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    match_scores:List[ScoredMatchForTeam]
+        List of ScoredMatchForTeam objects
+
+    Returns
+    -------
+    BatchScoreSubmissionResult
+        Per submission status, in the order submitted
+    """
+    if len(match_scores) == 0:
+        return BatchScoreSubmissionResult(results=[])
+    return await asyncio.wrap_future(ScoreWriteQueue.submit(eventCode, match_scores))
+
+################## Live Updates #################
+
+def publishMatchScored(eventCode:str, matchNumber:int):
+    """
+    Tells connected clients a match is now scored, so match selectors can drop it
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    matchNumber:int
+        Match number for the event
+    """
+    LiveUpdateBroadcaster.publish("match_scored", {
+        "eventCode":eventCode,
+        "matchNumber":matchNumber,
+        "version":DataVersion.current()
+    })
+
+def sendTeamResults(eventCode:str, scoring_page_id:int, results):
+    """
+    Publishes one team_results message per team
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    scoring_page_id:int
+        Scoring page the scores were recorded with
+    results:AllTeamResults
+        Results for the teams that were just scored
+    """
+    version = DataVersion.current()
+    for team_results in results.data.values():
+        LiveUpdateBroadcaster.publish("team_results", {
+            "eventCode":eventCode,
+            "scoring_page_id":scoring_page_id,
+            "results":team_results.model_dump(mode="json"),
+            "version":version
+        })
+
+def publishTeamResults(eventCode:str, teamNumbers:List[int], scoring_page_id:int):
+    """
+    Sends the new aggregate results for teams that were just scored.  Only calculated if a client is connected
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    teamNumbers:List[int]
+        Teams with new scores
+    scoring_page_id:int
+        Scoring page the scores were recorded with
+    """
+    if not LiveUpdateBroadcaster.hasSubscribers():
+        return
+    results = GenerateResultsForAllTeams(eventCode, scoring_page_id, teamNumbers=teamNumbers).getAggregrateResults()
+    sendTeamResults(eventCode, scoring_page_id, results)
+
+async def publishTeamResultsAsync(eventCode:str, stored:List[ScoredMatchForTeam]):
+    """
+    publishTeamResults for the async path, the aggregates are read with the asyncio database engine
+
+    Parameters
+    ----------
+    eventCode:str
+        Event code for the scored event
+    stored:List[ScoredMatchForTeam]
+        The submissions that were stored, with scoring_page_id set
+    """
+    if not LiveUpdateBroadcaster.hasSubscribers():
+        return
+    for scoring_page_id, teamNumbers in teamsByScoringPage(stored).items():
+        results = await GenerateResultsForAllTeams(eventCode, scoring_page_id, teamNumbers=teamNumbers).getAggregrateResultsAsync()
+        sendTeamResults(eventCode, scoring_page_id, results)
+
+def publishScheduleRefreshed(eventCode:str):
+    """
+    Tells connected clients the match schedule changed and should be fetched again
+
+    Parameters
+    ----------
+    eventCode:str
+        The FRC Event Code
+    """
+    LiveUpdateBroadcaster.publish("schedule_refreshed", {
+        "eventCode":eventCode,
+        "version":DataVersion.current()
+    })
     
 class ScoredItemAggregateResult(BaseModel):
     mode_name:str
@@ -422,8 +1348,8 @@ class ScoredItemAggregateResult(BaseModel):
     total:Union[int, float] = Field(default=0)
     average:float = Field(default=0)
     # These are here for future expansion, and are meant to to be interepreted by mode_name
-    agg_result1:Union[int, str, float] = Field(default=None)
-    agg_result2:Union[int, str, float] = Field(default=None)
+    agg_result1:Union[int, str, float, None] = Field(default=None)
+    agg_result2:Union[int, str, float, None] = Field(default=None)
 
 class ScoresForMode(BaseModel):
     mode_name:str
@@ -441,117 +1367,361 @@ class AllTeamResults(BaseModel):
     # int is teamNumber
     data:Dict[int, ResultsForTeam]
 
-class GenerateResultsForTeam:
+class ColumnarTeamResults(BaseModel):
+    """
+    The same results as AllTeamResults with every name sent once.  total and average are flat lists with one entry per
+    team, mode slot and item, at index (team_index*(len(modes) + 1) + mode_index)*len(items) + item_index.
+    The mode slot after the last mode holds the totals across all modes
+    """
+    teams:List[int]
+    modes:List[str]
+    items:List[str]
+    # One per team, every result for a team has the same count
+    count_of_scored_events:List[int]
+    total:List[Union[int, float]]
+    average:List[float]
+
+class AllScoresFormat(str, Enum):
+    nested = "nested"           # AllTeamResults
+    columnar = "columnar"       # ColumnarTeamResults, smaller and faster for clients to read
+
+class GenerateResultsForAllTeams:
+    """
+    Builds the results for every team at once.  Loads the modes and scoring items once and reads the counts and sums for
+    every team from the materialized aggregate tables, so the cost is teams x items instead of every stored score.
+    """
 
-    def __init__(self, eventCode:str, teamNumber:int, scoring_page_id:int) -> None:
+    def __init__(self, eventCode:str, scoring_page_id:int, teamNumbers:List[int] = None) -> None:
         self.eventCode = eventCode
-        self.teamNumber = teamNumber
         self.scoring_page_id = scoring_page_id
+        # Only these teams if set, otherwise every team at the event
+        self.teamNumbers = teamNumbers
         self.modes_by_mode_id = {}
         self.scoring_items_by_id = {}
-        self.by_mode_results = {}
-        self.totals = {}
-        self.list_of_totalled_match_numbers = []
-        pass
-
-    def initializeDataStructures(self):
-        """
-        Sets up empty ScoredItemAggregateResult objects for all score types
-        """
-        modes_and_items = getGameModeAndScoringElements(self.scoring_page_id)
-        for a_mode in modes_and_items.modes.values():
-            this_mode_scores = {i.name:ScoredItemAggregateResult(
-                mode_name=a_mode.mode_name,
-                name=i.name, 
-                count_of_scored_events=self.count_of_scored_events
-            ) for i in modes_and_items.scoring_items.values()}
-            self.by_mode_results[a_mode.mode_name] = ScoresForMode(
-                mode_name=a_mode.mode_name,
-                scores = this_mode_scores
+
+    def loadModesAndItems(self, db):
+        """
+        Loads the modes and scoring items for this scoring page into id indexed dictionaries
+
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session
+        """
+        modes = db.scalars(select(ModesForScoringPage).filter_by(scoring_page_id=self.scoring_page_id)).all()
+        self.modes_by_mode_id = {m.mode_id:GameMode.model_validate(m) for m in modes}
+        items = db.scalars(select(ScoringItemsForScoringPage).filter_by(scoring_page_id=self.scoring_page_id)).all()
+        self.scoring_items_by_id = {i.scoring_item_id:ScoringItem.model_validate(i) for i in items}
+
+    def getCountsOfScoredEvents(self, db) -> Dict[int, int]:
+        """
+        Returns the number of distinct scored matches per team, from the materialized TeamMatchCountsForEvent
+
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session
+
+        Returns
+        -------
+        Dict[int, int]
+            teamNumber:count of distinct matches scored
+        """
+        stmt = select(
+                TeamMatchCountsForEvent.teamNumber,
+                TeamMatchCountsForEvent.scored_matches
+            ).where(
+                TeamMatchCountsForEvent.eventCode == self.eventCode,
+                TeamMatchCountsForEvent.scoring_page_id == self.scoring_page_id,
+                *self.teamFilter(TeamMatchCountsForEvent.teamNumber)
             )
-        self.totals = {i.name:ScoredItemAggregateResult(
-            mode_name="Total",
-            name=i.name,
-            count_of_scored_events=self.count_of_scored_events
-        ) for i in modes_and_items.scoring_items.values()}
+        return {row[0]:row[1] for row in db.execute(stmt).all()}
+
+    def getSumsByTeamModeAndItem(self, db) -> list:
+        """
+        Returns the summed score values for every team, mode and scoring item combination that has scores,
+        from the materialized TeamAggregatesForEvent
 
-        # Also repackage modes and items into id indexed dictionaries for easier reference later
-        self.modes_by_mode_id = {m.mode_id:m for m in modes_and_items.modes.values()}
-        self.scoring_items_by_id = {i.scoring_item_id:i for i in modes_and_items.scoring_items.values()}
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session
 
-    def processTallyScore(self, score:ScoresForEvent):
+        Returns
+        -------
+        list
+            Rows of (teamNumber, mode_id, scoring_item_id, total)
         """
-        Process a tally score type.
-        
+        stmt = select(
+                TeamAggregatesForEvent.teamNumber,
+                TeamAggregatesForEvent.mode_id,
+                TeamAggregatesForEvent.scoring_item_id,
+                TeamAggregatesForEvent.total
+            ).where(
+                TeamAggregatesForEvent.eventCode == self.eventCode,
+                TeamAggregatesForEvent.scoring_page_id == self.scoring_page_id,
+                *self.teamFilter(TeamAggregatesForEvent.teamNumber)
+            )
+        return db.execute(stmt).all()
+
+    def teamFilter(self, teamNumber_column) -> list:
+        """
+        Returns the extra where clauses limiting a query to the requested teams
+
         Parameters
         ----------
-        score:ScoresForEvent
-            The specific score to add to the team's data
-        """
-        # Score this mode and score item name
-        mode_name = self.modes_by_mode_id[score.mode_id].mode_name
-        score_item_name = self.scoring_items_by_id[score.scoring_item_id].name
-        # Get the "reference" to the current object.  Changes to this will propagate to the actual object
-        current = self.by_mode_results[mode_name].scores[score_item_name]
-        # Values are stored as strings in db for flexibility.  Convert here
-        current.total += int(score.value)
-        if current.count_of_scored_events > 0:
-            current.average = current.total/current.count_of_scored_events
-
-        # Score the totals
-        total_current = self.totals[score_item_name]
-        # Since there are different entries for different modes for the same match number, we need to see if we already counted this match
-        # if score.matchNumber not in self.list_of_totalled_match_numbers:
-        #     total_current.count_of_scored_events += 1
-        #     self.list_of_totalled_match_numbers.append(score.matchNumber)
-
-        total_current.total += int(score.value)
-        if total_current.count_of_scored_events > 0:
-            total_current.average = total_current.total/total_current.count_of_scored_events
-
-    def processFlagScore(self, score:ScoresForEvent):
-        """
-        Process a flag score.  Flag scores are either 0 or 1 so we make those changes to the provided score.
-        The actual mechanics behind the scoring are the same as Tally so we forward it on.
+        teamNumber_column
+            Team number column of the queried table
+
+        Returns
+        -------
+        list
+            Empty if all teams are wanted
+        """
+        if self.teamNumbers is None:
+            return []
+        return [teamNumber_column.in_(self.teamNumbers)]
+
+    def getAggregrateResults(self) -> AllTeamResults:
+        """
+        Produces the results for all teams at the event
+
+        Returns
+        -------
+        AllTeamResults
+            All Team Results object
+        """
+        with RCSA_DB.getSQLSession() as db:
+            return self.aggregateResultsInSession(db)
+
+    async def getAggregrateResultsAsync(self) -> AllTeamResults:
+        """
+        getAggregrateResults using the asyncio database engine
+
+        Returns
+        -------
+        AllTeamResults
+            All Team Results object
+        """
+        async with RCSA_DB.getAsyncSQLSession() as db:
+            return await db.run_sync(self.aggregateResultsInSession)
+
+    def aggregateResultsInSession(self, db) -> AllTeamResults:
+        """
+        Produces the results for all teams at the event with the caller's session
 
         Parameters
         ----------
-        score:ScoresForEvent
-            The specific score to add to the team's data
+        db:session
+            Open SQLAlchemy session
+
+        Returns
+        -------
+        AllTeamResults
+            All Team Results object
         """
-        # SqlAlchemy (maybe?) converts "True" to 1 in the database, which means no extra translation needs
-        # to be done. I suspect this may be brittle.
-        # Safest solution is to ensure the scoring code sends a "1" for a true, and a "0" for a false
-        # Either way, we can just pass this through
+        return AllTeamResults.model_validate(self.aggregateResultsAsDictInSession(db))
 
-        self.processTallyScore(score)
-        
-    def getAggregrateResults(self) -> ResultsForTeam:
-        # Get all scores for this team number and event
+    def getAggregrateResultsAsDict(self) -> dict:
+        """
+        Same as getAggregrateResults, as plain dictionaries for the API response
+
+        Returns
+        -------
+        dict
+            AllTeamResults layout, ready for FastJSONResponse
+        """
         with RCSA_DB.getSQLSession() as db:
-            self.count_of_scored_events = db.scalars(select(func.count(distinct(ScoresForEvent.matchNumber))).filter_by(teamNumber=self.teamNumber, eventCode=self.eventCode, scoring_page_id=self.scoring_page_id)).one()
-            self.initializeDataStructures()
-            all_scores_for_team = db.scalars(select(ScoresForEvent).filter_by(teamNumber=self.teamNumber, eventCode=self.eventCode, scoring_page_id=self.scoring_page_id)).all()
-            # Route the math per the scoring item type
-            for score in all_scores_for_team:
-                scoring_type = self.scoring_items_by_id[score.scoring_item_id].type
-                match scoring_type:
-                    case "score_tally":
-                        self.processTallyScore(score)
-                    case "score_flag":
-                        self.processFlagScore(score)
-                    case _:
-                        # Really need a logging capability here
-                        raise ValueError(f"Score ID {score.score_id} has type {scoring_type} and I do not know how to process it")
-                    
-
-        toreturn = ResultsForTeam(
-            teamNumber=self.teamNumber,
-            by_mode_results=self.by_mode_results,
-            totals=self.totals
-        )
-        return toreturn
-        
+            return self.aggregateResultsAsDictInSession(db)
+
+    async def getAggregrateResultsAsDictAsync(self) -> dict:
+        """
+        getAggregrateResultsAsDict using the asyncio database engine
+
+        Returns
+        -------
+        dict
+            AllTeamResults layout, ready for FastJSONResponse
+        """
+        async with RCSA_DB.getAsyncSQLSession() as db:
+            return await db.run_sync(self.aggregateResultsAsDictInSession)
+
+    def loadTeamsCountsAndSums(self, db) -> tuple:
+        """
+        Loads everything the results are built from
+
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session
+
+        Returns
+        -------
+        tuple
+            (team numbers at the event, getCountsOfScoredEvents, getSumsByTeamModeAndItem)
+        """
+        self.loadModesAndItems(db)
+        all_teams = db.scalars(select(TeamsForEvent.teamNumber).where(
+            TeamsForEvent.eventCode == self.eventCode,
+            *self.teamFilter(TeamsForEvent.teamNumber)
+        )).all()
+        return all_teams, self.getCountsOfScoredEvents(db), self.getSumsByTeamModeAndItem(db)
+
+    def checkItemType(self, an_item:ScoringItem):
+        """
+        Raises ValueError for a scoring item type the results can't be worked out for
+        """
+        if an_item.type not in ScoringClassTypes.list():
+            raise ValueError(f"Scoring item {an_item.name} has type {an_item.type} and I do not know how to process it")
+
+    def emptyResultForItem(self, mode_name:str, name:str, count_of_scored_events:int) -> dict:
+        """
+        A ScoredItemAggregateResult with nothing scored, as a dictionary
+        """
+        return {
+            "mode_name":mode_name,
+            "name":name,
+            "count_of_scored_events":count_of_scored_events,
+            "total":0,
+            "average":0.0,
+            "agg_result1":None,
+            "agg_result2":None
+        }
+
+    def emptyResultsForTeam(self, teamNumber:int, count_of_scored_events:int) -> dict:
+        """
+        Sets up empty results for all score types for one team
+
+        Parameters
+        ----------
+        teamNumber:int
+            Official team number
+        count_of_scored_events:int
+            Number of distinct matches scored for this team
+
+        Returns
+        -------
+        dict
+            ResultsForTeam layout with all totals at zero
+        """
+        by_mode_results = {}
+        for a_mode in self.modes_by_mode_id.values():
+            by_mode_results[a_mode.mode_name] = {
+                "mode_name":a_mode.mode_name,
+                "scores":{i.name:self.emptyResultForItem(a_mode.mode_name, i.name, count_of_scored_events) for i in self.scoring_items_by_id.values()}
+            }
+        totals = {i.name:self.emptyResultForItem("Total", i.name, count_of_scored_events) for i in self.scoring_items_by_id.values()}
+        return {"teamNumber":teamNumber, "by_mode_results":by_mode_results, "totals":totals}
+
+    def aggregateResultsAsDictInSession(self, db) -> dict:
+        """
+        Produces the results for all teams at the event as plain dictionaries in the AllTeamResults layout.
+        Building thousands of result models only to serialize them again is most of the cost of /api/getAllScores, so the
+        endpoint sends this as it is
+
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session
+
+        Returns
+        -------
+        dict
+            {"data":{teamNumber:ResultsForTeam layout}}
+        """
+        all_teams, counts, sums = self.loadTeamsCountsAndSums(db)
+
+        data = {teamNumber:self.emptyResultsForTeam(teamNumber, counts.get(teamNumber, 0)) for teamNumber in all_teams}
+        for teamNumber, mode_id, scoring_item_id, total in sums:
+            team_results = data.get(teamNumber)
+            a_mode = self.modes_by_mode_id.get(mode_id)
+            an_item = self.scoring_items_by_id.get(scoring_item_id)
+            if (team_results is None) or (a_mode is None) or (an_item is None):
+                # Scores for a team not at this event, or for a mode/item not on this page, are not reported
+                continue
+            self.checkItemType(an_item)
+            # Tally and flag scores are both simple sums, flags are stored as 0 or 1
+            for current in [team_results["by_mode_results"][a_mode.mode_name]["scores"][an_item.name], team_results["totals"][an_item.name]]:
+                current["total"] += total
+                if current["count_of_scored_events"] > 0:
+                    current["average"] = current["total"]/current["count_of_scored_events"]
+
+        return {"data":data}
+
+    def getAggregrateResultsColumnar(self) -> dict:
+        """
+        Produces the results for all teams at the event in the ColumnarTeamResults layout
+
+        Returns
+        -------
+        dict
+            ColumnarTeamResults layout, ready for FastJSONResponse
+        """
+        with RCSA_DB.getSQLSession() as db:
+            return self.aggregateResultsColumnarInSession(db)
+
+    async def getAggregrateResultsColumnarAsync(self) -> dict:
+        """
+        getAggregrateResultsColumnar using the asyncio database engine
+
+        Returns
+        -------
+        dict
+            ColumnarTeamResults layout, ready for FastJSONResponse
+        """
+        async with RCSA_DB.getAsyncSQLSession() as db:
+            return await db.run_sync(self.aggregateResultsColumnarInSession)
+
+    def aggregateResultsColumnarInSession(self, db) -> dict:
+        """
+        Produces the results for all teams at the event in the ColumnarTeamResults layout, filling the lists straight from the sums
+
+        Parameters
+        ----------
+        db:session
+            Open SQLAlchemy session
+
+        Returns
+        -------
+        dict
+            ColumnarTeamResults layout
+        """
+        all_teams, counts, sums = self.loadTeamsCountsAndSums(db)
+        teams = sorted(all_teams)
+        team_index = {teamNumber:n for n, teamNumber in enumerate(teams)}
+        mode_index = {mode_id:n for n, mode_id in enumerate(self.modes_by_mode_id)}
+        item_index = {scoring_item_id:n for n, scoring_item_id in enumerate(self.scoring_items_by_id)}
+        item_count = len(item_index)
+        totals_offset = len(mode_index)*item_count
+        per_team = totals_offset + item_count
+
+        total = [0]*(len(teams)*per_team)
+        for teamNumber, mode_id, scoring_item_id, value in sums:
+            t = team_index.get(teamNumber)
+            m = mode_index.get(mode_id)
+            i = item_index.get(scoring_item_id)
+            if (t is None) or (m is None) or (i is None):
+                # Scores for a team not at this event, or for a mode/item not on this page, are not reported
+                continue
+            self.checkItemType(self.scoring_items_by_id[scoring_item_id])
+            total[t*per_team + m*item_count + i] += value
+            total[t*per_team + totals_offset + i] += value
+
+        count_of_scored_events = [counts.get(teamNumber, 0) for teamNumber in teams]
+        average = [0.0]*len(total)
+        for t, count in enumerate(count_of_scored_events):
+            if count > 0:
+                start = t*per_team
+                average[start:start + per_team] = [value/count for value in total[start:start + per_team]]
+
+        return {
+            "teams":teams,
+            "modes":[a_mode.mode_name for a_mode in self.modes_by_mode_id.values()],
+            "items":[an_item.name for an_item in self.scoring_items_by_id.values()],
+            "count_of_scored_events":count_of_scored_events,
+            "total":total,
+            "average":average
+        }
 
 def getAggregrateResultsForAllTeams(eventCode:str, scoring_page_id:int) -> AllTeamResults:
     """
@@ -569,18 +1739,97 @@ def getAggregrateResultsForAllTeams(eventCode:str, scoring_page_id:int) -> AllTe
     AllTeamResults
         All Team Results object
     """
-    data = {}
-    with RCSA_DB.getSQLSession() as db:
-        all_teams = db.scalars(select(TeamsForEvent).filter_by(eventCode=eventCode)).all()
-        for team in all_teams:
-            score_gen = GenerateResultsForTeam(
-                eventCode=eventCode,
-                teamNumber=team.teamNumber,
-                scoring_page_id=scoring_page_id
-            )
-            data[team.teamNumber] = score_gen.getAggregrateResults()
+    return GenerateResultsForAllTeams(eventCode=eventCode, scoring_page_id=scoring_page_id).getAggregrateResults()
+
+async def getAggregrateResultsForAllTeamsAsync(eventCode:str, scoring_page_id:int) -> AllTeamResults:
+    """
+    getAggregrateResultsForAllTeams using the asyncio database engine
+
+    Parameters
+    ----------
+    eventCode:str
+        The event we are gathering data for
+    scoring_page_id:int
+        The ID for the scoring page
+
+    Returns
+    -------
+    AllTeamResults
+        All Team Results object
+    """
+    return await GenerateResultsForAllTeams(eventCode=eventCode, scoring_page_id=scoring_page_id).getAggregrateResultsAsync()
+
+def getAggregrateResultsForAllTeamsAsDict(eventCode:str, scoring_page_id:int) -> dict:
+    """
+    getAggregrateResultsForAllTeams as plain dictionaries, for the API response
+
+    Parameters
+    ----------
+    eventCode:str
+        The event we are gathering data for
+    scoring_page_id:int
+        The ID for the scoring page
+
+    Returns
+    -------
+    dict
+        AllTeamResults layout
+    """
+    return GenerateResultsForAllTeams(eventCode=eventCode, scoring_page_id=scoring_page_id).getAggregrateResultsAsDict()
+
+async def getAggregrateResultsForAllTeamsAsDictAsync(eventCode:str, scoring_page_id:int) -> dict:
+    """
+    getAggregrateResultsForAllTeamsAsDict using the asyncio database engine
+
+    Parameters
+    ----------
+    eventCode:str
+        The event we are gathering data for
+    scoring_page_id:int
+        The ID for the scoring page
+
+    Returns
+    -------
+    dict
+        AllTeamResults layout
+    """
+    return await GenerateResultsForAllTeams(eventCode=eventCode, scoring_page_id=scoring_page_id).getAggregrateResultsAsDictAsync()
 
-    return AllTeamResults(data=data)
+def getAggregrateResultsForAllTeamsColumnar(eventCode:str, scoring_page_id:int) -> dict:
+    """
+    getAggregrateResultsForAllTeamsAsDict in the ColumnarTeamResults layout
+
+    Parameters
+    ----------
+    eventCode:str
+        The event we are gathering data for
+    scoring_page_id:int
+        The ID for the scoring page
+
+    Returns
+    -------
+    dict
+        ColumnarTeamResults layout
+    """
+    return GenerateResultsForAllTeams(eventCode=eventCode, scoring_page_id=scoring_page_id).getAggregrateResultsColumnar()
+
+async def getAggregrateResultsForAllTeamsColumnarAsync(eventCode:str, scoring_page_id:int) -> dict:
+    """
+    getAggregrateResultsForAllTeamsColumnar using the asyncio database engine
+
+    Parameters
+    ----------
+    eventCode:str
+        The event we are gathering data for
+    scoring_page_id:int
+        The ID for the scoring page
+
+    Returns
+    -------
+    dict
+        ColumnarTeamResults layout
+    """
+    return await GenerateResultsForAllTeams(eventCode=eventCode, scoring_page_id=scoring_page_id).getAggregrateResultsColumnarAsync()
 
 class PageIDUsedForEvent(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -617,9 +1866,18 @@ class MigratePageResults(BaseModel):
     error_message:List[str] = Field(default=[])
     
 
-def migrateDataForEventToNewPage(eventCode:str, old_scoring_page_id:int, new_scoring_page_id:int) -> MigratePageResults:
+def migrateDataForEventToNewPage(
+        eventCode:str,
+        old_scoring_page_id:int,
+        new_scoring_page_id:int,
+        dry_run:bool = False,
+        progress_callback:Callable[[int, int], None] = None,
+        matches_per_batch:int = 20
+    ) -> MigratePageResults:
     """
     Attempts to migrate data for an event to a new scoring page ID.  Used if teams change scoring pages in the middle of an event.
+    The copy is done in the database with INSERT ... SELECT, using CASE expressions to map old mode and scoring item IDs to the new ones.
+    Batches of matches are copied in one transaction so a failure migrates nothing.
 
     Parameters
     ----------
@@ -629,13 +1887,18 @@ def migrateDataForEventToNewPage(eventCode:str, old_scoring_page_id:int, new_sco
         Page migrating from
     new_scoring_page_id:int
         Page migrating to
+    dry_run:bool
+        Only count the records that would be migrated, nothing is written
+    progress_callback:Callable[[int, int], None]
+        Optional function called after each batch with (records migrated so far, total records to migrate)
+    matches_per_batch:int
+        Number of matches copied per INSERT ... SELECT
 
     Returns
     -------
     MigratePageResults
         Object with messages to pass along
     """
-    # NEED TO TRANSFER MODE IDs also
     to_return = MigratePageResults()
     # Get scoring item names from new page number
     new_modes_and_items = getGameModeAndScoringElements(new_scoring_page_id)
@@ -662,55 +1925,61 @@ def migrateDataForEventToNewPage(eventCode:str, old_scoring_page_id:int, new_sco
         msg = f"Matches scored before using this page will not have these mode(s): {', '.join(brand_new_modes)}.  They did not previously exist."
         to_return.warning_messages.append(msg)
     modes_to_migrate = list(set(new_modes_and_items.modes.keys()).intersection(set(old_modes_and_items.modes.keys())))
-    
-    
-    with RCSA_DB.getSQLSession() as db:        
-        # Iterate over common names
-        # Convert old names to scoring_item_ids for SQL
-        item_ids = [old_modes_and_items.scoring_items[item_name].scoring_item_id for item_name in names_to_migrate]
-        # make dict for lookups for new item ids from old item ids
-        new_item_lookup = {
-            old_modes_and_items.scoring_items[item_name].scoring_item_id:new_modes_and_items.scoring_items[item_name].scoring_item_id
-            for item_name in names_to_migrate
-        }
-        # Convert old modes to mode_ids for SQL
-        mode_ids = [old_modes_and_items.modes[mode_name].mode_id for mode_name in modes_to_migrate]
-        # make mode dict lookup old_mode_id:new_mode_id
-        new_mode_lookup = {
-            old_modes_and_items.modes[mode_name].mode_id:new_modes_and_items.modes[mode_name].mode_id
-            for mode_name in modes_to_migrate
-        }
+
+    # make dict for lookups for new item ids from old item ids
+    new_item_lookup = {
+        old_modes_and_items.scoring_items[item_name].scoring_item_id:new_modes_and_items.scoring_items[item_name].scoring_item_id
+        for item_name in names_to_migrate
+    }
+    # make mode dict lookup old_mode_id:new_mode_id
+    new_mode_lookup = {
+        old_modes_and_items.modes[mode_name].mode_id:new_modes_and_items.modes[mode_name].mode_id
+        for mode_name in modes_to_migrate
+    }
+    records_to_migrate = (
+        ScoresForEvent.eventCode == eventCode,
+        ScoresForEvent.scoring_page_id == old_scoring_page_id,
+        ScoresForEvent.scoring_item_id.in_(list(new_item_lookup.keys())),
+        ScoresForEvent.mode_id.in_(list(new_mode_lookup.keys()))
+    )
+
+    with RCSA_DB.getSQLSession() as db:
         try:
-            old_records = db.scalars(
-                select(ScoresForEvent).
-                where(
-                    ScoresForEvent.eventCode == eventCode, 
-                    ScoresForEvent.scoring_page_id == old_scoring_page_id,
-                    ScoresForEvent.scoring_item_id.in_(item_ids),
-                    ScoresForEvent.mode_id.in_(mode_ids)
-                )
-            ).all()
-            for old_rec in old_records:
-                new_rec = ScoresForEvent(
-                    scoring_page_id = new_scoring_page_id,
-                    mode_id = new_mode_lookup[old_rec.mode_id],
-                    matchNumber = old_rec.matchNumber,
-                    eventCode = eventCode,
-                    teamNumber =  old_rec.teamNumber,
-                    scoring_item_id = new_item_lookup[old_rec.scoring_item_id],
-                    value = old_rec.value
-                )
-                db.add(new_rec)
+            total = db.scalars(select(func.count(ScoresForEvent.score_id)).where(*records_to_migrate)).one()
+            if dry_run:
+                msg = f"Would migrate {total} {', '.join(names_to_migrate)} records for modes {', '.join(modes_to_migrate)} to new scoring page."
+                to_return.success_messages.append(msg)
+                return to_return
+
+            migrated = 0
+            if total > 0:
+                match_numbers = db.scalars(select(ScoresForEvent.matchNumber).where(*records_to_migrate).distinct().order_by(ScoresForEvent.matchNumber)).all()
+                for batch_start in range(0, len(match_numbers), matches_per_batch):
+                    batch = match_numbers[batch_start:batch_start + matches_per_batch]
+                    new_records = select(
+                        literal(new_scoring_page_id),
+                        case(new_mode_lookup, value=ScoresForEvent.mode_id),
+                        ScoresForEvent.matchNumber,
+                        ScoresForEvent.eventCode,
+                        ScoresForEvent.teamNumber,
+                        case(new_item_lookup, value=ScoresForEvent.scoring_item_id),
+                        ScoresForEvent.value
+                    ).where(*records_to_migrate, ScoresForEvent.matchNumber.in_(batch))
+                    result = db.execute(insert(ScoresForEvent).from_select(
+                        ["scoring_page_id", "mode_id", "matchNumber", "eventCode", "teamNumber", "scoring_item_id", "value"],
+                        new_records
+                    ))
+                    migrated += result.rowcount
+                    if progress_callback is not None:
+                        progress_callback(migrated, total)
+                rebuildTeamAggregates(db, eventCode=eventCode, scoring_page_id=new_scoring_page_id)
             db.commit()
-            msg = f"Successfuly migrated {len(old_records)} {', '.join(names_to_migrate)} records for modes {', '.join(modes_to_migrate)} to new scoring page."
+            DataVersion.bump()
+            msg = f"Successfuly migrated {migrated} {', '.join(names_to_migrate)} records for modes {', '.join(modes_to_migrate)} to new scoring page."
             to_return.success_messages.append(msg)
         except Exception as badnews:
+            db.rollback()
             msg = f"Failed to migrate data because {type(badnews).__name__}: {badnews}"
             to_return.error_message.append(msg)
 
         return to_return
-         
-    
-    
-
-
@@ -6,6 +6,7 @@ from typing_extensions import Annotated
 
 from robocompscoutingapp.AppExceptions import ScoringPageParseError, ScoringPageParseWarning
 from robocompscoutingapp.BaseParsingModel import BaseParsingModel, ParsingFunctionToCall
+from robocompscoutingapp.ParsedHTMLDocument import soupFor
 from robocompscoutingapp.GlobalItems import ScoringClassTypes
 from robocompscoutingapp.GlobalItems import FancyText as ft
 
@@ -17,7 +18,11 @@ class ScoringParseResult(BaseParsingModel):
 class ScoringPageParser:
 
     def __init__(self, input_html_or_file_handle) -> None:
-        self.soup = BeautifulSoup(input_html_or_file_handle, features="html.parser")
+        # A ParsedHTMLDocument is shared with the other parsers instead of parsing the page again
+        self.soup = soupFor(input_html_or_file_handle)
+        # Elements found by the last walk of the tree, and the soup that was walked
+        self._classified = None
+        self._classified_soup = None
 
     def scoringDivPresent(self) -> bool:
         """
@@ -40,11 +45,33 @@ class ScoringPageParser:
         self.soup = scoring_div[0]
         return True
 
+    def classifyElements(self) -> Dict[str, List]:
+        """
+        Walks the tree once and sorts out the elements the checks below need: game_mode_group, game_mode, report_submit
+        and each of the ScoringClassTypes.  Later calls reuse the walk until the soup is reset to the scoring div
+
+        Returns
+        -------
+        Dict[str, List]
+            Class name:elements with that class, in document order
+        """
+        if (self._classified is not None) and (self._classified_soup is self.soup):
+            return self._classified
+        classified = {key:[] for key in ["game_mode_group", "game_mode", "report_submit"] + ScoringClassTypes.list()}
+        for element in self.soup.find_all(class_=True):
+            for css_class in set(element.get("class")):
+                found = classified.get(css_class)
+                if found is not None:
+                    found.append(element)
+        self._classified = classified
+        self._classified_soup = self.soup
+        return classified
+
     def gameModeGroupPresent(self) -> bool:
         """
         Returns true if the div is present, raise exception if not
         """
-        selection = self.soup.select(".game_mode_group")
+        selection = self.classifyElements()["game_mode_group"]
         if len(selection) == 0:
             warnings.warn(ScoringPageParseWarning("No element with 'game_mode_group' class present.  It's not mandatory but it's a good idea to keep your game_mode selectors in one area of UI"))
             return False
@@ -56,18 +83,20 @@ class ScoringPageParser:
         """
         Returns list of discovered game modes
         """
-        selection = self.soup.select(".game_mode")
+        selection = self.classifyElements()["game_mode"]
         game_modes = []
+        found_modes = set()
         for gm in selection:
             try:
                 mode_name = gm["data-modename"]
             except KeyError:
                 raise ScoringPageParseError(f"This line: '{gm}' does not declare the mode name in 'data-modename' attribute.")
             
-            if mode_name in game_modes:
+            if mode_name in found_modes:
                 raise ScoringPageParseError(f"Game mode {mode_name} has been used more than once.  Mode names must be unique")
             
             game_modes.append(mode_name)
+            found_modes.add(mode_name)
 
         if len(game_modes) == 0:
             raise ScoringPageParseError(f"No elements with 'game_mode' class detected.  At least one is required.")
@@ -82,16 +111,18 @@ class ScoringPageParser:
         scoring_class_markers = ScoringClassTypes.list()
 
         scoring_dict = {key:[] for key in scoring_class_markers}
-        found_score_names = []
+        found_score_names = set()
 
         # Collect game modes in case a "data-onlyForMode" is applied
         # Suppress the warning from game_modes though, as already caught under normal parsing activity
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
             game_modes = self.collectGameModes()
+        available_modes = set(game_modes)
 
+        classified = self.classifyElements()
         for score_class in scoring_class_markers:
-            selection = self.soup.select(f".{score_class}")
+            selection = classified[score_class]
             for element in selection:
                 try:
                     activity_name = element["data-scorename"]
@@ -99,13 +130,13 @@ class ScoringPageParser:
                         raise ScoringPageParseError(f"Duplicate scoring activity {activity_name} found.  Please use unique names for all scoring activities.")
                     try:
                         only_mode = element["data-onlyformode"]
-                        if only_mode not in game_modes:
+                        if only_mode not in available_modes:
                             raise ScoringPageParseError(f"This element {element} declares it is only for mode {only_mode} however that mode is not defined as an available mode.  The only available modes detected are {game_modes}")
                     except KeyError:
                         # Its okay if this attr is not set, and other exceptions need to be passed
                         pass
 
-                    found_score_names.append(activity_name)
+                    found_score_names.add(activity_name)
                     scoring_dict[score_class].append(activity_name)
                 except KeyError:
                     raise ScoringPageParseError(f"This element {element} does not define the scoring activity name id 'data-scorename' attribute")
@@ -116,7 +147,7 @@ class ScoringPageParser:
         return scoring_dict
     
     def checkForReportSubmit(self) -> bool:
-        selection = self.soup.select(".report_submit")
+        selection = self.classifyElements()["report_submit"]
         if len(selection) == 0:
             raise ScoringPageParseError("No report_submit element found.  This is required. It's usually a button at the bottom of the scoring element.")
             return False
@@ -3,7 +3,7 @@ from contextlib import contextmanager
 from pathlib import Path
 import time
 import shutil
-from sqlalchemy import select, distinct, func, delete, desc
+from sqlalchemy import select, distinct, func, delete, desc, text
 
 
 from robocompscoutingapp.GlobalItems import RCSA_Config
@@ -24,6 +24,8 @@ def configure_for_testing(cleanup:bool = True):
             src_db = RCSA_Config.getConfig().ServerConfig.scoring_database
             dst_db = Path(f"testing_database_{int(time.time())}.db").absolute()
             if src_db.exists():
+                # In WAL mode recent commits may only be in the -wal file, move them into the database file before copying
+                orig_db.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
                 shutil.copy(str(src_db), str(dst_db))
             RCSA_Config.getConfig().ServerConfig.scoring_database = dst_db
             RCSA_Config.getConfig().ServerConfig.log_level = "INFO"
@@ -40,8 +42,13 @@ def configure_for_testing(cleanup:bool = True):
                 orig_sps.tested = from_temp_db_sps.tested
                 orig_db.commit()
             if cleanup:
-                if RCSA_Config.getConfig().ServerConfig.scoring_database.exists():
-                    RCSA_Config.getConfig().ServerConfig.scoring_database.unlink()
+                temp_db = RCSA_Config.getConfig().ServerConfig.scoring_database
+                if temp_db.exists():
+                    # Release the connections so the WAL files are cleaned up too
+                    RCSA_DB.closeAll()
+                    temp_db.unlink()
+                    for wal_file in [Path(f"{temp_db}-wal"), Path(f"{temp_db}-shm")]:
+                        wal_file.unlink(missing_ok=True)
                     ft.print("Temporary database deleted")
             else:
                 ft.print(f"Data from this test can be found in {RCSA_Config.getConfig().ServerConfig.scoring_database}")
@@ -11,9 +11,15 @@ from sqlalchemy import select
 from robocompscoutingapp.ScoringPageParser import ScoringPageParser, ScoringParseResult
 from robocompscoutingapp.MatchAndTeamSelectionParser import MatchAndTeamSelectionParser, MatchAndTeamSelectionParseResult
 from robocompscoutingapp.JSScriptParser import JSScriptParser
-from robocompscoutingapp.ORMDefinitionsAndDBAccess import ScoringPageStatus, RCSA_DB
+from robocompscoutingapp.ParsedHTMLDocument import ParsedHTMLDocument
+from robocompscoutingapp.GlobalItems import RCSA_Config
+from robocompscoutingapp.__about__ import __version__
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import ScoringPageStatus, ScoringPageParseResults, RCSA_DB
 from robocompscoutingapp.Initialize import Initialize
 
+# Hashes already computed this process: resolved path -> (st_mtime_ns, st_size, hexdigest)
+_file_hash_cache = {}
+
 
 class UserHTMLProcessing:
 
@@ -63,23 +69,66 @@ class UserHTMLProcessing:
             HTML Validation was successful
         """
         errors = []
-        with self.html_file.open() as f:
-            self.scoring_parse_result = ScoringPageParser(f).validateScoringElement()
-            errors.append(self.scoring_parse_result.hasErrors())
-
-            # Need to reset the file handle between parsing
-            f.seek(0)
+        # One parse feeds all three parsers
+        document = self.getParsedDocument()
+        self.scoring_parse_result = ScoringPageParser(document).validateScoringElement()
+        errors.append(self.scoring_parse_result.hasErrors())
+        self.storeScoringParseResult(self.scoring_parse_result)
 
-            self.match_team_element_parse_result = MatchAndTeamSelectionParser(f).validate()
-            errors.append(self.match_team_element_parse_result.hasErrors())
+        self.match_team_element_parse_result = MatchAndTeamSelectionParser(document).validate()
+        errors.append(self.match_team_element_parse_result.hasErrors())
 
-            f.seek(0)
-
-            self.js_parse_result = JSScriptParser(f).validate()
-            errors.append(self.js_parse_result.hasErrors())
+        self.js_parse_result = JSScriptParser(document).validate()
+        errors.append(self.js_parse_result.hasErrors())
 
         return not max(errors)  # If any hasErrors is True this will return False as in "not good"
     
+    def getParsedDocument(self) -> ParsedHTMLDocument:
+        """
+        Parses the page with the configured html_parser.  The document is not kept, callers share the one they get and
+        later runs read the stored ScoringPageParseResults instead of parsing again
+
+        Returns
+        -------
+        ParsedHTMLDocument
+            Parsed page
+        """
+        with self.html_file.open() as f:
+            return ParsedHTMLDocument(f, html_parser=RCSA_Config.getConfig().ServerConfig.html_parser)
+
+    def getScoringParseResult(self) -> ScoringParseResult:
+        """
+        Returns the game modes and scoring elements for the page.  Pages seen before are read from the database
+        by their hash without parsing the HTML
+
+        Returns
+        -------
+        ScoringParseResult
+            Parse result for the scoring element
+        """
+        stored = self.dbsession.get(ScoringPageParseResults, self.getFileHash())
+        if (stored is not None) and (stored.parser_version == __version__):
+            return ScoringParseResult.model_validate_json(stored.parse_result)
+        spr = ScoringPageParser(self.getParsedDocument()).parseScoringElement()
+        self.storeScoringParseResult(spr)
+        return spr
+
+    def storeScoringParseResult(self, spr:ScoringParseResult):
+        """
+        Saves the parse result for this page so later runs don't need to parse it again
+
+        Parameters
+        ----------
+        spr:ScoringParseResult
+            Parse result for the scoring element
+        """
+        self.dbsession.merge(ScoringPageParseResults(
+            scoring_page_hash=self.getFileHash(),
+            parser_version=__version__,
+            parse_result=spr.model_dump_json()
+        ))
+        self.dbsession.commit()
+
     def createValidatedPageEntry(self):
         """
         Adds a validated page entry to the database for tracking
@@ -108,8 +157,15 @@ class UserHTMLProcessing:
     def getFileHash(self) -> str:
         """
         Returns the SHA256 hash of the file
+        The hash is only recomputed if the file modification time or size has changed since the last call
         """
+        file_stat = self.html_file.stat()
+        cache_key = self.html_file.resolve()
+        cached = _file_hash_cache.get(cache_key)
+        if (cached is not None) and (cached[0] == file_stat.st_mtime_ns) and (cached[1] == file_stat.st_size):
+            return cached[2]
         with self.html_file.open(mode="rb") as f:
-            digest = hashlib.file_digest(f, "sha256")
-            return digest.hexdigest()
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        _file_hash_cache[cache_key] = (file_stat.st_mtime_ns, file_stat.st_size, digest)
+        return digest
 
@@ -201,6 +201,24 @@ def prepare_event(
         sys.exit()
 
 
+from robocompscoutingapp.ScoringData import rebuildAggregates
+
+@cli_app.command()
+def rebuild_aggregates(
+    all_events: Annotated[bool, typer.Option(help="Rebuild every event in the database, not just the configured one", show_default=False)] = False
+):
+    """
+    Recalculates the stored team totals used by the analysis page from the raw scores.  Only needed if scores were edited outside the app
+    """
+    eventCode = None if all_events else RCSA_Config.getConfig().FRCEvents.first_event_id
+    if eventCode == False:
+        ft.error("Please specify a valid FRC Event code in the configuration file or use '--all-events'.")
+        return
+    try:
+        rebuildAggregates(eventCode=eventCode)
+        ft.success(f"Team totals rebuilt for {'all events' if eventCode is None else eventCode}")
+    except Exception as badnews:
+        ft.error(f"Unable to rebuild team totals because {badnews}")
 from robocompscoutingapp.SetupForTest import configure_for_testing
 
 @cli_app.command()
@@ -253,7 +271,8 @@ def test(
                     ft.error(str(badnews))
                     return
 
-            server = RunAPIServer()
+            # One in-process worker: the test results and the shutdown request from /test/testingComplete have to reach this process
+            server = RunAPIServer(workers=1)
             with GracefulInterruptHandler() as pause:
                 server.run()
                 scoring_page = RCSA_Config.getConfig().ServerConfig.scoring_page.name
@@ -284,7 +303,8 @@ def test(
 
 @cli_app.command()
 def run(
-    season: Annotated[int, typer.Option(help="For testing purposes, you may want to choose a season in the past to ensure there are matches to test with.  Otherwise the current season will be used.", show_default=False)] = None
+    season: Annotated[int, typer.Option(help="For testing purposes, you may want to choose a season in the past to ensure there are matches to test with.  Otherwise the current season will be used.", show_default=False)] = None,
+    workers: Annotated[int, typer.Option(help="Number of server worker processes, overrides 'workers' in the config file.  More workers serve more analytics requests at once on a multi-core machine.  Live updates only reach clients connected to the worker that received the scores", min=1, show_default=False)] = None
 ):
     """
     Run the app server.
@@ -315,12 +335,23 @@ def run(
                 if len(used_scoring_pages) > 0:
                     ft.warning("You have already scored matches for this event with at least one other scoring page.  This data will not be visible in the analytics page.")
                     ft.warning("If you just made a UI change and kept some of the scoring items the same names, I can attempt to migrate the previous scored data to this page")
+                    # We are only going to migrate the first page on the list.
+                    # "Hopefully" if the users migrate every time it should keep the most recent data updated
+                    old_scoring_page_id = used_scoring_pages[0].scoring_page_id
+                    # Show what a migration would do before asking
+                    preview = migrateDataForEventToNewPage(eventCode, old_scoring_page_id, new_scoring_page_id=spr.scoring_page_id, dry_run=True)
+                    for msg in preview.warning_messages:
+                        ft.warning(msg)
+                    for msg in preview.success_messages:
+                        ft.info(msg)
                     migrate = Confirm.ask("Would you like me to attempt to migrate the data?")
                     if migrate:
-                        # We are only going to migrate the first page on the list.
-                        # "Hopefully" if the users migrate every time it should keep the most recent data updated
-                        old_scoring_page_id = used_scoring_pages[0].scoring_page_id
-                        migrate_results = migrateDataForEventToNewPage(eventCode, old_scoring_page_id, new_scoring_page_id=spr.scoring_page_id)
+                        migrate_results = migrateDataForEventToNewPage(
+                            eventCode,
+                            old_scoring_page_id,
+                            new_scoring_page_id=spr.scoring_page_id,
+                            progress_callback=lambda done, total: ft.info(f"Migrated {done} of {total} records")
+                        )
                         if len(migrate_results.error_message) > 0:
                             for msg in migrate_results.error_message:
                                 ft.error(msg)
@@ -347,7 +378,7 @@ def run(
             RCSA_Config.getConfig().ServerConfig.IP_Address = "0.0.0.0"
         
         # We make it here, time to run the app
-        server = RunAPIServer()
+        server = RunAPIServer(workers=workers)
         with GracefulInterruptHandler() as pause:
             server.run()
             ft.success(f"Server is running at http://{RCSA_Config.getConfig().ServerConfig.FQDN}:{RCSA_Config.getConfig().ServerConfig.port}/")
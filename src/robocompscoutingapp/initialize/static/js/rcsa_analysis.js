@@ -200,17 +200,67 @@ function getScoringItems () {
     })
 }
 
+function indexColumnarScores(columnar) {
+    /*
+        Adds name to position lookups to the columnar /api/getAllScores response.
+        total and average hold one value per team, mode slot and scoring item:
+            index = (team position * (number of modes + 1) + mode position) * number of items + item position
+        The slot after the last mode holds the match totals
+    */
+    columnar.team_index = {};
+    columnar.teams.forEach(function (teamNumber, t) { columnar.team_index[teamNumber] = t; });
+    columnar.mode_index = {};
+    columnar.modes.forEach(function (mode_name, m) { columnar.mode_index[mode_name] = m; });
+    columnar.item_index = {};
+    columnar.items.forEach(function (item_name, i) { columnar.item_index[item_name] = i; });
+    columnar.totals_slot = columnar.modes.length;
+    columnar.per_team = (columnar.modes.length + 1) * columnar.items.length;
+    return columnar;
+}
+
+function statIndex(team_position, mode_name, item_name) {
+    // "Match" is the match totals
+    let slot = (mode_name == "Match") ? team_scores.totals_slot : team_scores.mode_index[mode_name];
+    return team_position * team_scores.per_team + slot * team_scores.items.length + team_scores.item_index[item_name];
+}
+
+function applyTeamResults(team_results) {
+    // Writes one team's results from a live update (nested layout) into the columnar scores
+    let t = team_scores.team_index[team_results.teamNumber];
+    if (t === undefined) {
+        t = team_scores.teams.length;
+        team_scores.teams.push(team_results.teamNumber);
+        team_scores.team_index[team_results.teamNumber] = t;
+        team_scores.count_of_scored_events.push(0);
+        for (let n = 0; n < team_scores.per_team; n++) {
+            team_scores.total.push(0);
+            team_scores.average.push(0);
+        }
+    }
+    for (item_name of team_scores.items) {
+        let mode_names = team_scores.modes.concat(["Match"]);
+        for (mode_name of mode_names) {
+            let result = (mode_name == "Match") ? team_results.totals[item_name] : team_results.by_mode_results[mode_name].scores[item_name];
+            let index = statIndex(t, mode_name, item_name);
+            team_scores.total[index] = result.total;
+            team_scores.average[index] = result.average;
+            team_scores.count_of_scored_events[t] = result.count_of_scored_events;
+        }
+    }
+}
+
 function getCurrentScores () {
     // Call for DB answer
     $.ajax({
         type: "GET",
-        url: "/api/getAllScores",
+        // The columnar form sends each name once, so it is much smaller and quicker to parse on tablets
+        url: "/api/getAllScores?format=columnar",
         dataType: "json",
         contentType: 'application/json',
         success: function (recvd_scores, text_status, jqXHR) {
             // Give the data to the display code
             console.log("Team scores received");
-            team_scores = recvd_scores;
+            team_scores = indexColumnarScores(recvd_scores);
             // Show stats table
             showSelectedStats();
         },
@@ -361,7 +411,7 @@ function showSelectedStats() {
 
         let the_data = [];
 
-        for (const [teamNumber, team_results] of Object.entries(team_scores.data)) {
+        for (const [team_position, teamNumber] of team_scores.teams.entries()) {
             let this_data = {"teamNumber":teamNumber}
             let cell_count = 0;
             for (const [stat_name, stat_info] of Object.entries(current_stored_stat_info.chosen_stats)) {
@@ -372,11 +422,7 @@ function showSelectedStats() {
                     for (chosen_type of chosen_types) {
                         let _type = chosen_type.toLowerCase();
                         let cellname = `cell_${cell_count}`;
-                        if (mode_name == "Match") {
-                            this_data[cellname] = team_results.totals[stat_name][_type];
-                        } else {
-                            this_data[cellname] = team_results.by_mode_results[mode_name].scores[stat_name][_type];
-                        }
+                        this_data[cellname] = team_scores[_type][statIndex(team_position, mode_name, stat_name)];
                         cell_count += 1;
                     }
                 }
@@ -417,13 +463,32 @@ function showSelectedStats() {
         // dom: "Bfrtip",
         data: statsData(),
         columns: statsColumns(),
-        pageLength: Object.keys(team_scores.data).length
+        pageLength: team_scores.teams.length
     });
     
     $("#stats_display_table_row").show();
 }
 
+function listenForLiveUpdates() {
+    if (typeof(EventSource) === "undefined") {
+        return;
+    }
+    // New aggregates arrive one team at a time, so the full score payload is only fetched once
+    let live_updates = new EventSource("/api/events/stream");
+    live_updates.addEventListener("team_results", function (e) {
+        let update = JSON.parse(e.data);
+        if (team_scores == null || update.scoring_page_id != scoring_page_id) {
+            return;
+        }
+        applyTeamResults(update.results);
+        if (stat_display_table != null) {
+            showSelectedStats();
+        }
+    });
+}
+
 $(document).ready(function () {
+    listenForLiveUpdates();
     const urlParams = new URLSearchParams(window.location.search);
     if (urlParams.has("clear_cache")) {
         clearStoredStatInfo();
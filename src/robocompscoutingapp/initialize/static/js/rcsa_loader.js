@@ -156,6 +156,7 @@ let rcsa = {
     matches_and_teams: undefined,
     modes_and_items: undefined,     
     scoringDB: {},
+    schedule_changed: false,
 
     startup: function (match_callback, error_callback) {
         console.info("rcsa startup called");
@@ -170,6 +171,37 @@ let rcsa = {
         rcsa.getScoringItems();
         // check if testing
         rcsa.activateTesting();
+        // Keep the match list current as other tablets score
+        rcsa.listenForLiveUpdates();
+    },
+
+    listenForLiveUpdates: function () {
+        if (typeof(EventSource) === "undefined") {
+            return;
+        }
+        // EventSource reconnects on its own if the server goes away
+        let live_updates = new EventSource("/api/events/stream");
+        live_updates.addEventListener("match_scored", function (e) {
+            let update = JSON.parse(e.data);
+            if (rcsa.matches_and_teams === undefined) {
+                return;
+            }
+            // Leave the match being scored alone, nextMatch takes care of it
+            if (String(update.matchNumber) == $(`.match_selector`).val()) {
+                return;
+            }
+            delete rcsa.matches_and_teams.matches[update.matchNumber];
+            $(`.match_selector option[value=${update.matchNumber}]`).remove();
+        });
+        live_updates.addEventListener("schedule_refreshed", function (e) {
+            let chosen_match = $(`.match_selector`).val();
+            if (chosen_match === undefined || chosen_match == -1) {
+                rcsa.loadMatches();
+            } else {
+                // Don't pull the match out from under the scout, reload after this score
+                rcsa.schedule_changed = true;
+            }
+        });
     },
 
     loadMatches: function () {
@@ -255,6 +287,11 @@ let rcsa = {
         var matchNumber = $(`.match_selector`).val();
         delete rcsa.matches_and_teams.matches[matchNumber];
         rcsa.scoringDB.resetDB();        
+        if (rcsa.schedule_changed) {
+            rcsa.schedule_changed = false;
+            rcsa.loadMatches();
+            return;
+        }
         rcsa.match_callback(rcsa.matches_and_teams);
     },
 
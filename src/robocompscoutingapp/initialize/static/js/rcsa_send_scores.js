@@ -83,39 +83,35 @@ function submitStoredScores() {
         force_fail = true;
     }
 
-    function checkForMoreScores() {
-        if (stored_scores.length > 0) {
-            sendNextScore();
-        } else {
-            rcsa.clearSavedScores();
-            for (score_to_save of failed_sends) {
-                rcsa.addSavedScore(score_to_save, eventCode);
-            }
-            stored_scores = failed_sends;
-            $("#data_modal_buttons").show();
-            scoresReady(scores_set = true);
+    function finishSending() {
+        rcsa.clearSavedScores();
+        for (score_to_save of failed_sends) {
+            rcsa.addSavedScore(score_to_save, eventCode);
         }
+        stored_scores = failed_sends;
+        $("#data_modal_buttons").show();
+        scoresReady(scores_set = true);
     }
     
     function scoreSentSuccessfully(score_that_was_sent) {
         successful_sends.push(score_that_was_sent);
         $("#successful_send_count").text(successful_sends.length);
-        checkForMoreScores();
-        
     }
 
     function scoreFailedToSend(score_that_was_sent, err_msg) {
         failed_sends.push(score_that_was_sent);
         $("#failed_send_count").text(failed_sends.length);
-        $("#send_error_messages").show();
-        $("#send_error_messages").append(`${err_msg}<br>`);
-        checkForMoreScores();  
+        if (err_msg != null) {
+            $("#send_error_messages").show();
+            $("#send_error_messages").append(`${err_msg}<br>`);
+        }
     }    
 
-    function sendNextScore() {
-        // Get score to send
-        var score_to_send = stored_scores.shift();
-        var url = "/api/addScores";
+    function sendAllScores() {
+        // All the saved scores go in one request and are saved in one transaction on the server
+        var scores_to_send = stored_scores;
+        stored_scores = [];
+        var url = "/api/addScoresBatch";
         if (force_fail) {
             // Force a failure
             url = "/errorcheck";
@@ -123,32 +119,42 @@ function submitStoredScores() {
         $.ajax({
             type: "POST",
             url: url,
-            data: JSON.stringify(score_to_send),
+            data: JSON.stringify(scores_to_send),
             dataType: "json",
             contentType: 'application/json',
             processData: false,
             success: function (response) {
-                console.log("Score successfully sent");
-                scoreSentSuccessfully(score_to_send);
+                // Results come back in the same order the scores were sent
+                for (const [index, result] of response.results.entries()) {
+                    let score_that_was_sent = scores_to_send[index];
+                    if ((result.status === "stored") || (result.status === "duplicate")) {
+                        // A duplicate means this team aleady scored for this match, which means it was "successfully" stored
+                        scoreSentSuccessfully(score_that_was_sent);
+                    } else {
+                        console.log("Score send failed with " + result.detail);
+                        scoreFailedToSend(score_that_was_sent, `Score not saved to central database because ${result.detail}`);
+                    }
+                }
+                console.log("Scores sent");
+                finishSending();
             },
             error: function( jqXHR, textStatus, errorThrown ) {
-                if (jqXHR.status === 409) {
-                    // This team aleady scored for this match, which means it was "successfully" stored
-                    scoreSentSuccessfully(score_to_send);
-                } else {
-                    console.log("Score send failed with " + errorThrown);
-                    if (errorThrown.length == 0) {
-                        errorThrown = "the server could not be reached";
-                    }
-                    err_msg = `Score not saved to central database because ${errorThrown}`;
-                    scoreFailedToSend(score_to_send, err_msg);
+                console.log("Score send failed with " + errorThrown);
+                if (errorThrown.length == 0) {
+                    errorThrown = "the server could not be reached";
+                }
+                err_msg = `Scores not saved to central database because ${errorThrown}`;
+                // The whole batch failed, only show the reason once
+                for (const [index, score_that_was_sent] of scores_to_send.entries()) {
+                    scoreFailedToSend(score_that_was_sent, index == 0 ? err_msg : null);
                 }
+                finishSending();
             },
         })
 
     }
 
-    checkForMoreScores();
+    sendAllScores();
 }
 
 function setupSubmitModal() {
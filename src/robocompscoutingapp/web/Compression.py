@@ -0,0 +1,252 @@
+"""
+Response compression.  API responses are compressed as they are sent, the static files are compressed once before the
+server starts and the saved copies are served from then on.  The copies go in a cache folder next to the scoring database
+(see staticCacheFolder), the user static folder is only read.
+Brotli is used when the optional brotli package is installed (pip install robocompscoutingapp[brotli]) and the browser
+accepts it, otherwise gzip
+"""
+import gzip
+import mimetypes
+import os
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Folder for the saved copies, next to the scoring database
+static_cache_folder_name = "static_cache"
+# Suffix of the saved copy for each encoding, in order of preference, i.e. rcsa_analysis.js.br
+encoding_suffixes = {"br":".br", "gzip":".gz"}
+# Static files worth compressing.  Images are already compressed
+precompressed_suffixes = {".html", ".css", ".js", ".json", ".svg", ".txt", ".map"}
+# Static files smaller than this are sent as they are
+precompress_minimum_size = 1024
+# Bodies at least this big are compressed off the event loop
+thread_minimum_size = 128 * 1024
+
+def availableEncodings() -> list:
+    """
+    Encodings this server can compress with, in order of preference
+    """
+    if brotli is not None:
+        return ["br", "gzip"]
+    return ["gzip"]
+
+def acceptedEncodings(accept_encoding:str) -> set:
+    """
+    The encodings named in an Accept-Encoding header, leaving out any refused with q=0
+    """
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        encoding, _, params = part.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        if encoding.strip():
+            accepted.add(encoding.strip())
+    return accepted
+
+def compressBytes(data:bytes, encoding:str, best:bool = False) -> bytes:
+    """
+    Parameters
+    ----------
+    data:bytes
+        What to compress
+    encoding:str
+        "br" or "gzip"
+    best:bool
+        Use the smallest, slowest settings.  For files compressed once, responses use settings fast enough to run per request
+
+    Returns
+    -------
+    bytes
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 4)
+    # mtime=0 so the same file always compresses to the same bytes
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+def staticCacheFolder(scoring_database:Path) -> Path:
+    """
+    The folder the compressed copies of the static files are saved in, next to the scoring database
+
+    Parameters
+    ----------
+    scoring_database:Path
+        The scoring_database from the server config
+
+    Returns
+    -------
+    Path
+    """
+    return Path(scoring_database).absolute().parent/static_cache_folder_name
+
+def copyPath(cache_folder:Path, relative_path:Path, encoding:str) -> Path:
+    """
+    Where the compressed copy of a static file is saved, i.e. static_cache/js/rcsa_analysis.js.br
+    """
+    relative_path = Path(relative_path)
+    return Path(cache_folder)/relative_path.with_name(relative_path.name + encoding_suffixes[encoding])
+
+def precompressStaticFiles(static_folder:Path, cache_folder:Path) -> int:
+    """
+    Saves a compressed copy of each text file in the static folder for every available encoding, under the same relative
+    path in the cache folder.  The copy gets the modification time of its file, so only new and changed files are compressed again
+
+    Parameters
+    ----------
+    static_folder:Path
+        The user static folder
+    cache_folder:Path
+        Where the copies are saved, see staticCacheFolder
+
+    Returns
+    -------
+    int
+        Number of copies written
+    """
+    written = 0
+    static_folder = Path(static_folder)
+    for path in static_folder.rglob("*"):
+        if path.suffix.lower() not in precompressed_suffixes or not path.is_file():
+            continue
+        stat_result = path.stat()
+        if stat_result.st_size < precompress_minimum_size:
+            continue
+        data = None
+        for encoding in availableEncodings():
+            copy_path = copyPath(cache_folder, path.relative_to(static_folder), encoding)
+            if copy_path.exists() and copy_path.stat().st_mtime_ns == stat_result.st_mtime_ns:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            copy_path.parent.mkdir(parents=True, exist_ok=True)
+            copy_path.write_bytes(compressBytes(data, encoding, best=True))
+            os.utime(copy_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+            written += 1
+    return written
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that sends the saved compressed copy of a file from cache_directory (see precompressStaticFiles) when the
+    browser accepts its encoding.  Copies older or newer than their file are ignored, the file is sent as it is
+    """
+
+    def __init__(self, *, directory:Path, cache_directory:Path, **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.cache_directory = Path(cache_directory)
+        # lookup_path gives the real path of the file
+        self.real_directory = Path(os.path.realpath(directory))
+
+    def file_response(self, full_path, stat_result:os.stat_result, scope:Scope, status_code:int = 200):
+        file_path = Path(full_path)
+        if file_path.suffix.lower() not in precompressed_suffixes or not file_path.is_relative_to(self.real_directory):
+            return super().file_response(full_path, stat_result, scope, status_code)
+        request_headers = Headers(scope=scope)
+        accepted = acceptedEncodings(request_headers.get("accept-encoding", ""))
+        for encoding in encoding_suffixes:
+            if encoding not in accepted:
+                continue
+            copy_path = copyPath(self.cache_directory, file_path.relative_to(self.real_directory), encoding)
+            try:
+                copy_stat = os.stat(copy_path)
+            except OSError:
+                continue
+            if copy_stat.st_mtime_ns != stat_result.st_mtime_ns:
+                continue
+            media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+            response = FileResponse(copy_path, status_code=status_code, media_type=media_type, stat_result=copy_stat,
+                                    headers={"Content-Encoding":encoding})
+            response.headers.add_vary_header("Accept-Encoding")
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+class ResponseCompression:
+    """
+    Settings for CompressionMiddleware, set from the server config when the app starts
+    """
+    enabled = True
+    minimum_size = 1024
+
+    @classmethod
+    def configure(cls, enabled:bool, minimum_size:int):
+        cls.enabled = enabled
+        cls.minimum_size = minimum_size
+
+class CompressionMiddleware:
+    """
+    Compresses JSON responses of at least ResponseCompression.minimum_size bytes with the best encoding the client accepts.
+    Only paths under the given prefixes are looked at.  Streamed bodies (the live update stream) and responses
+    that are already encoded are sent as they are
+    """
+
+    def __init__(self, app:ASGIApp, path_prefixes:tuple = ("/api/",)) -> None:
+        self.app = app
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope:Scope, receive:Receive, send:Send) -> None:
+        if scope["type"] != "http" or not ResponseCompression.enabled or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        accepted = acceptedEncodings(Headers(scope=scope).get("accept-encoding", ""))
+        encoding = next((e for e in availableEncodings() if e in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSend(send, encoding, ResponseCompression.minimum_size))
+
+class CompressingSend:
+    """
+    Holds back the start of a JSON response until its body arrives, then sends both, compressed if the body is big enough
+    """
+
+    def __init__(self, send:Send, encoding:str, minimum_size:int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.passthrough = False
+
+    async def __call__(self, message:Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+        elif message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if headers.get("content-type", "").startswith("application/json") and "content-encoding" not in headers:
+                self.start_message = message
+            else:
+                self.passthrough = True
+                await self.send(message)
+        elif message["type"] == "http.response.body" and self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            self.passthrough = True
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                if len(body) >= thread_minimum_size:
+                    body = await run_in_threadpool(compressBytes, body, self.encoding)
+                else:
+                    body = compressBytes(body, self.encoding)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(body))
+                message = {**message, "body":body}
+            await self.send(start_message)
+            await self.send(message)
+        else:
+            await self.send(message)
@@ -0,0 +1,23 @@
+"""
+JSON response for the large API responses, which are built as plain dictionaries instead of pydantic models.
+orjson is used if it is installed (pip install robocompscoutingapp[orjson]), otherwise the standard json module
+"""
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """
+    Serializes the content as it is.  There is no validation, the content must already be in the response layout.
+    Dictionary keys that are not strings (i.e. team numbers) are written as strings, the same as the standard path
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -3,27 +3,166 @@ Taken from: https://github.com/zauberzeug/nicegui/issues/1956
 Discussed at: https://github.com/encode/uvicorn/discussions/1103
 """
 
-import asyncio
+import multiprocessing
 import threading
+import time
 import uvicorn
 from uvicorn.config import Config
 
+from robocompscoutingapp.LiveUpdates import LiveUpdateBroadcaster
+
+class SignalledServer(uvicorn.Server):
+    """
+    uvicorn Server that sets an event once startup is done, so nothing has to poll server.started
+    """
+
+    def __init__(self, config: Config, startup_done: threading.Event):
+        super().__init__(config)
+        self.startup_done = startup_done
+
+    async def startup(self, sockets=None):
+        try:
+            await super().startup(sockets=sockets)
+        finally:
+            # Also set if startup failed, start() checks server.started
+            self.startup_done.set()
+
 class ThreadedUvicorn:
+    # Seconds to wait for a graceful shutdown before forcing open connections closed
+    stop_timeout = 10
+
     def __init__(self, config: Config):
-        self.server = uvicorn.Server(config)
-        self.thread = threading.Thread(daemon=True, target=self.server.run)
+        self.startup_done = threading.Event()
+        self.server = SignalledServer(config, self.startup_done)
+        self.thread = threading.Thread(daemon=True, target=self.run)
+
+    def run(self):
+        try:
+            self.server.run()
+        finally:
+            # Wake start() if the server exited before starting, i.e. the port was in use
+            self.startup_done.set()
 
     def start(self):
         self.thread.start()
-        asyncio.run(self.wait_for_started())
+        self.wait_for_started()
 
-    async def wait_for_started(self):
-        while not self.server.started:
-            await asyncio.sleep(0.1)
+    def wait_for_started(self):
+        self.startup_done.wait()
+        if not self.server.started:
+            raise RuntimeError("The server did not start, check the log for the reason")
 
     def stop(self):
         if self.thread.is_alive():
+            # Open event streams never finish on their own and would hold up the shutdown
+            LiveUpdateBroadcaster.close()
             self.server.should_exit = True
-            while self.thread.is_alive():
-                continue
+            self.thread.join(self.stop_timeout)
+            if self.thread.is_alive():
+                self.server.force_exit = True
+                self.thread.join()
+
+class WorkerServer(uvicorn.Server):
+    """
+    uvicorn Server for a worker process that sets a process shared event once its startup has succeeded
+    """
+
+    def __init__(self, config: Config, ready):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started:
+            self.ready.set()
+
+def runWorker(config: Config, sockets: list, ready):
+    """
+    Worker process entry point.  Serves the app on the sockets bound by ThreadedMultiprocessUvicorn until it is sent SIGTERM
+    """
+    config.configure_logging()
+    WorkerServer(config, ready).run(sockets=sockets)
+
+class WorkerProcess:
+    """
+    One worker process and the event it sets when it is ready to take requests
+    """
+
+    def __init__(self, context, config: Config, sockets: list):
+        self.ready = context.Event()
+        self.process = context.Process(target=runWorker, args=(config, sockets, self.ready), daemon=True)
 
+    def start(self):
+        self.process.start()
+
+    def wait_until_ready(self, timeout: float) -> bool:
+        """
+        Returns True once the worker has finished startup, False if it exited or timeout seconds went by first
+        """
+        deadline = time.monotonic() + timeout
+        while not self.ready.wait(0.1):
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                return False
+        return True
+
+class ThreadedMultiprocessUvicorn:
+    """
+    Runs several uvicorn worker processes on one listening socket, with a supervisor thread in this process that starts
+    a new worker if one dies.  Only public uvicorn API is used: Config.bind_socket and Server.run(sockets), the same way
+    uvicorn.run does it.  The supervisor installs no signal handlers, so the CLI's GracefulInterruptHandler still decides when to stop.
+    The app must be an import string in the config, each worker imports it for itself
+    """
+    # Seconds to wait for each worker to finish startup
+    startup_timeout = 30
+    # Seconds to wait for the workers to shut down before killing them
+    stop_timeout = 10
+    # Seconds between checks for dead workers
+    check_interval = 0.5
+
+    def __init__(self, config: Config, workers: int):
+        self.config = config
+        self.workers = workers
+        # spawn is the only start method on every platform, and does not copy this process's threads and open database
+        self.context = multiprocessing.get_context("spawn")
+        self.socket = config.bind_socket()
+        self.processes = []
+        self.should_exit = threading.Event()
+        self.thread = threading.Thread(daemon=True, target=self.run)
+
+    def startWorker(self) -> WorkerProcess:
+        worker = WorkerProcess(self.context, self.config, [self.socket])
+        worker.start()
+        return worker
+
+    def run(self):
+        """
+        Supervisor thread.  Replaces workers that exit until stop() is called
+        """
+        while not self.should_exit.wait(self.check_interval):
+            for index, worker in enumerate(self.processes):
+                if not worker.process.is_alive() and not self.should_exit.is_set():
+                    worker.process.join()
+                    self.processes[index] = self.startWorker()
+
+    def start(self):
+        self.processes = [self.startWorker() for _ in range(self.workers)]
+        if not all(worker.wait_until_ready(self.startup_timeout) for worker in self.processes):
+            self.stop()
+            raise RuntimeError("The server workers did not start, check the log for the reason")
+        self.thread.start()
+
+    def stop(self):
+        self.should_exit.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        # SIGTERM starts uvicorn's graceful shutdown in each worker
+        for worker in self.processes:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + self.stop_timeout
+        for worker in self.processes:
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        self.socket.close()
@@ -1,27 +1,33 @@
 from enum import Enum
-from fastapi import FastAPI, Query, HTTPException, Response, Depends, status
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, status
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.concurrency import run_in_threadpool
 import secrets
 from pydantic import BaseModel, Field, field_validator 
 import platform
 from time import sleep
-from typing import Annotated, List
+from typing import Annotated, List, Union
 from importlib_resources import files
-# import asyncio
+import asyncio
 import logging
 from contextlib import asynccontextmanager, contextmanager
 
 from robocompscoutingapp.GlobalItems import (
     RCSA_Config,
-    AutomatedTestMessage
+    AutomatedTestMessage,
+    ShutdownRequest
 )
+from robocompscoutingapp.LiveUpdates import LiveUpdateBroadcaster
+from robocompscoutingapp.web.Compression import PrecompressedStaticFiles, CompressionMiddleware, ResponseCompression, staticCacheFolder
+from robocompscoutingapp.ORMDefinitionsAndDBAccess import RCSA_DB
 
 from robocompscoutingapp.ScoringData import (
     getCurrentScoringPageData,
     setScoringPageTestResult,
-    ScoringPageStatus_pyd
+    ScoringPageStatus_pyd,
+    DataVersion,
+    ScoreWriteQueue
 )
 
 # auto_error = False allows no auth requests to go through to next stage
@@ -65,25 +71,72 @@ def authorized_user(
         )
     return True
 
+def data_version_etag(request:Request, response:Response) -> dict:
+    """
+    Conditional GET support for the read APIs.  The ETag is the current data version, so when the client already has it
+    a 304 is sent before the endpoint runs and the database is not touched.  The ETag is weak as the same data may be sent compressed or not.
+    Returns the caching headers, endpoints that build their own Response need to add them.
+    """
+    version_tag = f'"{DataVersion.current()}"'
+    headers = {"ETag":f"W/{version_tag}", "Cache-Control":"no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match uses the weak comparison, so ignore any W/ prefix
+        client_etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if version_tag in client_etags or "*" in client_etags:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return headers
+
 _scoring_page_id = None
 _eventCode = None
+# Hot routes use the asyncio database engine when set, otherwise scores go through the single writer ScoreWriteQueue
+_async_database = False
 
 @asynccontextmanager
 async def lifespan(app:FastAPI):
-    # Set up the static pages
-    rcsa_api_app.mount(f"/app", StaticFiles(directory=RCSA_Config.getConfig().ServerConfig.user_static_folder), name="app")
+    # Set up the static pages, RunAPIServer has saved compressed copies of them
+    rcsa_api_app.mount("/app", PrecompressedStaticFiles(
+        directory=RCSA_Config.getConfig().ServerConfig.user_static_folder,
+        cache_directory=staticCacheFolder(RCSA_Config.getConfig().ServerConfig.scoring_database)
+    ), name="app")
+    ResponseCompression.configure(RCSA_Config.getConfig().ServerConfig.compress_responses,
+                                  RCSA_Config.getConfig().ServerConfig.compression_minimum_size)
     # establish scoring page ID
     global _scoring_page_id
     global _eventCode
+    global _async_database
     _scoring_page_id = getCurrentScoringPageData().scoring_page_id
     _eventCode = RCSA_Config.getConfig().FRCEvents.first_event_id
+    _async_database = RCSA_Config.getConfig().ServerConfig.async_database
+    # Live updates are delivered on the server's loop
+    LiveUpdateBroadcaster.attach(asyncio.get_running_loop())
+    if not _async_database:
+        ScoreWriteQueue.start()
     yield
+    LiveUpdateBroadcaster.close()
+    if _async_database:
+        await RCSA_DB.disposeAsync()
+    else:
+        # Finish queued writes without blocking the loop
+        await asyncio.to_thread(ScoreWriteQueue.stop)
     
 
 rcsa_api_app = FastAPI(title="RoboCompScoutingApp", 
                        lifespan=lifespan,
                        dependencies=[Depends(authorized_user)]
 )
+rcsa_api_app.add_middleware(CompressionMiddleware)
+
+def workerApp() -> FastAPI:
+    """
+    uvicorn app factory for server worker processes.  Loads the configuration of the process that started the workers,
+    the lifespan then sets up the scoring page and event for this worker as usual
+    """
+    RCSA_Config.getWorkerConfig()
+    # Other workers write to the same database, so this worker's caches have to notice their commits
+    DataVersion.watchDatabase(RCSA_Config.getConfig().ServerConfig.scoring_database)
+    return rcsa_api_app
 
 @rcsa_api_app.get("/lifecheck")
 def lifecheck():
@@ -100,15 +153,14 @@ from robocompscoutingapp.ScoringData import (
     ModesAndItems
 ) 
 
-@rcsa_api_app.get("/api/gameModesAndScoringElements")
+@rcsa_api_app.get("/api/gameModesAndScoringElements", dependencies=[Depends(data_version_etag)])
 def gameModeAndScoringElements() -> ModesAndItems:
     return getGameModeAndScoringElements(_scoring_page_id)
 
 ########################
 
 from robocompscoutingapp.ScoringData import (
-    getMatchesAndTeams,
-    getMatches,
+    EventReadModel,
     MatchesAndTeams
 )
 
@@ -149,8 +201,8 @@ def goToScoring():
     """
     return HTMLResponse(tosend)
 
-@rcsa_api_app.get("/api/getMatchesAndTeams")
-def matchesAndTeams(unscored_only:bool = True) -> MatchesAndTeams:
+@rcsa_api_app.get("/api/getMatchesAndTeams", response_model=MatchesAndTeams)
+def matchesAndTeams(data_version_headers:Annotated[dict, Depends(data_version_etag)], unscored_only:bool = True) -> Response:
     """
     Retrieve all the matches and teams for this event.  By default only returns the remaining unscored matches.
     This is in place to allow for faster match selection during the event.
@@ -166,13 +218,13 @@ def matchesAndTeams(unscored_only:bool = True) -> MatchesAndTeams:
         Filled matches and team JSON object
     """
     try:
-        data = getMatchesAndTeams(_eventCode, unscored_only=unscored_only)
-        return data
+        # Served from memory, already serialized
+        return Response(content=EventReadModel.getSerialized(_eventCode, unscored_only=unscored_only), media_type="application/json", headers=data_version_headers)
     except Exception as badnews:
         raise HTTPException(status_code=500, detail=f"Unable to get matches and teams because {type(badnews).__name__}: {badnews}")
 
-@rcsa_api_app.get("/api/getMatches")
-def justMatches(unscored_only:bool = True) -> MatchesAndTeams:
+@rcsa_api_app.get("/api/getMatches", response_model=MatchesAndTeams)
+def justMatches(data_version_headers:Annotated[dict, Depends(data_version_etag)], unscored_only:bool = True) -> Response:
     """
     Retrieve the matches for this event.  By default only returns the remaining unscored matches.
     This is in place to allow for faster match selection during the event.
@@ -188,18 +240,22 @@ def justMatches(unscored_only:bool = True) -> MatchesAndTeams:
         Filled matches and team JSON object.  The "teams" element will be an empty dictionary.
     """
     try:
-        return getMatches(_eventCode, unscored_only=unscored_only)
+        return Response(content=EventReadModel.getSerialized(_eventCode, unscored_only=unscored_only, include_teams=False), media_type="application/json", headers=data_version_headers)
     except Exception as badnews:
         raise HTTPException(status_code=500, detail=f"Unable to get matches because {type(badnews).__name__}: {badnews}")
 
 from robocompscoutingapp.ScoringData import (
-    addScoresToDB,
-    teamAlreadyScoredForThisMatch,
+    addScoresQueued,
+    addScoresBatchQueued,
+    addScoresToDBAsync,
+    addScoresBatchToDBAsync,
     ScoredMatchForTeam,
+    BatchScoreSubmissionResult,
 )
+from robocompscoutingapp.AppExceptions import ScoresAlreadySubmitted
 
 @rcsa_api_app.post("/api/addScores")
-def addScores(team_score_for_match:ScoredMatchForTeam):
+async def addScores(team_score_for_match:ScoredMatchForTeam):
     """
     Add recorded scores for a team for a given match.  Will return an error if this team already scored for this match.
 
@@ -208,43 +264,121 @@ def addScores(team_score_for_match:ScoredMatchForTeam):
     team_score_for_match:ScoredMatchForTeam
         Filled out ScoredMatchForTeam object
     """
-    # Check to see if already scored
-    if teamAlreadyScoredForThisMatch(
-        teamNumber=team_score_for_match.teamNumber,
-        matchNumber=team_score_for_match.matchNumber,
-        eventCode=_eventCode
-    ):
-        raise HTTPException(status_code=409, detail=f"Match #{team_score_for_match.matchNumber} data for team {team_score_for_match.teamNumber} already submitted for this match")
-    
-    # Store it
+    if team_score_for_match.scoring_page_id is None:
+        team_score_for_match.scoring_page_id = _scoring_page_id
+    # Store it.  Already scored is detected as part of the same transaction
     try:
-        addScoresToDB(eventCode=_eventCode, match_score=team_score_for_match)
+        if _async_database:
+            await addScoresToDBAsync(eventCode=_eventCode, match_score=team_score_for_match)
+        else:
+            await addScoresQueued(eventCode=_eventCode, match_score=team_score_for_match)
         return 
+    except ScoresAlreadySubmitted as badnews:
+        raise HTTPException(status_code=409, detail=str(badnews)) from badnews
+    except Exception as badnews:
+        raise HTTPException(status_code=500, detail=f"Unable to save score because {type(badnews).__name__}: {badnews}") from badnews
+
+@rcsa_api_app.post("/api/addScoresBatch")
+async def addScoresBatch(team_scores_for_matches:List[ScoredMatchForTeam]) -> BatchScoreSubmissionResult:
+    """
+    Add a list of recorded scores in one request and one transaction.  Used to send scores saved while offline.
+
+    Parameters
+    ----------
+    team_scores_for_matches:List[ScoredMatchForTeam]
+        List of filled out ScoredMatchForTeam objects
+
+    Returns
+    -------
+    BatchScoreSubmissionResult
+        Status for each submitted score: stored, duplicate (already submitted, same as a 409 from /api/addScores) or error
+    """
+    for team_score_for_match in team_scores_for_matches:
+        if team_score_for_match.scoring_page_id is None:
+            team_score_for_match.scoring_page_id = _scoring_page_id
+    try:
+        if _async_database:
+            return await addScoresBatchToDBAsync(eventCode=_eventCode, match_scores=team_scores_for_matches)
+        return await addScoresBatchQueued(eventCode=_eventCode, match_scores=team_scores_for_matches)
     except Exception as badnews:
-        raise HTTPException(status_code=500, detail=f"Unable to save score because {type(badnews).__name__}: {badnews}")
+        raise HTTPException(status_code=500, detail=f"Unable to save scores because {type(badnews).__name__}: {badnews}") from badnews
 
 from robocompscoutingapp.ScoringData import (
-    getAggregrateResultsForAllTeams,
+    getAggregrateResultsForAllTeamsAsDict,
+    getAggregrateResultsForAllTeamsAsDictAsync,
+    getAggregrateResultsForAllTeamsColumnar,
+    getAggregrateResultsForAllTeamsColumnarAsync,
     AllTeamResults,
+    ColumnarTeamResults,
+    AllScoresFormat
 )
+from robocompscoutingapp.web.FastJSONResponse import FastJSONResponse
 
-@rcsa_api_app.get("/api/getAllScores")
-def getAllScores() -> AllTeamResults:
+@rcsa_api_app.get("/api/getAllScores", response_model=Union[AllTeamResults, ColumnarTeamResults])
+async def getAllScores(data_version_headers:Annotated[dict, Depends(data_version_etag)], format:AllScoresFormat = AllScoresFormat.nested) -> Response:
     """
     Get aggregrate results for this event
 
+    Parameters
+    ----------
+    format:AllScoresFormat
+        "nested" (the default) for AllTeamResults, "columnar" for the smaller ColumnarTeamResults
+
     Returns
     -------
-    AllTeamResults
-        Layered data object with all results for all teams, organized by mode and total
+    AllTeamResults or ColumnarTeamResults
+        Layered data object with all results for all teams, organized by mode and total.
+        Built as dictionaries and sent without going through the models
     """
     try:
-        return getAggregrateResultsForAllTeams(eventCode=_eventCode, scoring_page_id=_scoring_page_id)
+        if format == AllScoresFormat.columnar:
+            sync_results, async_results = getAggregrateResultsForAllTeamsColumnar, getAggregrateResultsForAllTeamsColumnarAsync
+        else:
+            sync_results, async_results = getAggregrateResultsForAllTeamsAsDict, getAggregrateResultsForAllTeamsAsDictAsync
+        if _async_database:
+            results = await async_results(eventCode=_eventCode, scoring_page_id=_scoring_page_id)
+        else:
+            results = await run_in_threadpool(sync_results, eventCode=_eventCode, scoring_page_id=_scoring_page_id)
+        return FastJSONResponse(content=results, headers=data_version_headers)
     except Exception as badnews:
         raise HTTPException(status_code=500, detail=f"Unable to get scores {type(badnews).__name__}: {badnews}")
     
 
-@rcsa_api_app.get("/api/currentPageStatus")
+# Seconds between comments sent on an idle stream, keeps proxies from closing it and notices clients that went away
+EVENT_STREAM_KEEPALIVE = 15
+
+@rcsa_api_app.get("/api/events/stream")
+async def eventStream(request:Request) -> StreamingResponse:
+    """
+    Server-Sent Events stream of small live updates, so pages can update without re-fetching full payloads.
+    Events are "match_scored" (eventCode, matchNumber), "team_results" (eventCode, scoring_page_id, results for one team)
+    and "schedule_refreshed" (eventCode).  Every message also carries the data version used as the ETag of the read APIs.
+    """
+    subscriber = LiveUpdateBroadcaster.subscribe()
+
+    async def messages():
+        try:
+            yield f"retry: 5000\nevent: connected\ndata: {{\"version\":\"{DataVersion.current()}\"}}\n\n"
+            while True:
+                if subscriber.dropped and subscriber.queue.empty():
+                    # Client fell behind or the server is stopping, it will reconnect and re-fetch
+                    break
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=EVENT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            LiveUpdateBroadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(messages(), media_type="text/event-stream", headers={"Cache-Control":"no-cache", "X-Accel-Buffering":"no"})
+
+@rcsa_api_app.get("/api/currentPageStatus", dependencies=[Depends(data_version_etag)])
 def getAllScores() -> ScoringPageStatus_pyd:
     """
     Get scoring page data
@@ -294,6 +428,8 @@ def testingComplete(success:bool):
         RCSA_Config.getConfig().ServerConfig.test_success = success
         setScoringPageTestResult(success, _scoring_page_id)
         RCSA_Config.getConfig().ServerConfig.testing_complete = True
+        # Wakes the CLI waiting to stop the server
+        ShutdownRequest.request()
 
     return {}
 
@@ -6,7 +6,11 @@ from contextlib import contextmanager
 import os
 import yaml
 import requests
+from requests.adapters import HTTPAdapter
 import datetime
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from time import sleep
 
 from robocompscoutingapp.GlobalItems import RCSA_Config
@@ -17,6 +21,7 @@ from robocompscoutingapp.FirstEventsAPI import (
     FirstEventsAPI, 
     FirstTeam
 )
+from robocompscoutingapp.AppExceptions import OfflineResponseNotCached, FirstEventsAPIUnavailable
 
 @contextmanager
 def gen_test_env_and_enter(temp_dir_path:Path):
@@ -102,4 +107,214 @@ def test_badEventCode(tmpdir):
         config = RCSA_Config.getConfig(reset=True)
         fapi = FirstEventsAPI(config=config, season=2023)
         with pytest.raises(ValueError):
-            matches = fapi.getMatchesAtEvent(eventCode="NOTEVENT")
\ No newline at end of file
+            fapi.getMatchesAtEvent(eventCode="NOTEVENT")
+
+class FakeFRCEventsAPI(BaseHTTPRequestHandler):
+    """
+    Serves canned FRC Events API responses with an ETag, and counts what it was asked for
+    """
+    responses = {
+        "/v3.0/2023/": {},
+        "/v3.0/2023/teams": {"teams":[{"nameShort":"Flame of The West", "teamNumber":2584}]},
+        "/v3.0/2023/schedule/CALA": {"Schedule":[{"description":"Qualification 1", "matchNumber":1, "teams":[
+            {"station":station, "teamNumber":2584} for station in ["Red1", "Red2", "Red3", "Blue1", "Blue2", "Blue3"]
+        ]}]}
+    }
+    requests_seen = []
+    # Seconds to wait before answering, and path:number of 503s to send before answering
+    delay = 0
+    failures = {}
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        with self.lock:
+            FakeFRCEventsAPI.in_flight += 1
+            FakeFRCEventsAPI.max_in_flight = max(FakeFRCEventsAPI.max_in_flight, FakeFRCEventsAPI.in_flight)
+        try:
+            sleep(self.delay)
+            if self.failures.get(path, 0) > 0:
+                self.failures[path] -= 1
+                self.requests_seen.append((path, "failed"))
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.answer(path)
+        finally:
+            with self.lock:
+                FakeFRCEventsAPI.in_flight -= 1
+
+    def answer(self, path:str):
+        body = json.dumps(self.responses.get(path, {})).encode()
+        etag = f'"{len(body)}"'
+        not_modified = self.headers.get("If-None-Match") == etag
+        self.requests_seen.append((path, not_modified))
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def fake_frc_api():
+    FakeFRCEventsAPI.requests_seen = []
+    FakeFRCEventsAPI.delay = 0
+    FakeFRCEventsAPI.failures = {}
+    FakeFRCEventsAPI.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeFRCEventsAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v3.0/"
+    server.shutdown()
+    server.server_close()
+
+class InvalidEventAdapter(HTTPAdapter):
+    """
+    Answers every request the way the FRC Events API answers an invalid event code
+    """
+    calls = 0
+
+    def send(self, request, **kwargs):
+        InvalidEventAdapter.calls += 1
+        response = requests.Response()
+        response.status_code = 500
+        response._content = b'"Invalid Event Requested"'
+        response.url = request.url
+        response.request = request
+        return response
+
+def test_invalidEventAnswered500(tmpdir, monkeypatch):
+    with gen_test_env_and_enter(tmpdir):
+        config = RCSA_Config.getConfig(reset=True)
+        config.Secrets.FRC_Events_API_Username = "testuser"
+        config.Secrets.FRC_Events_API_Auth_Token = "testtoken"
+        make_session = FirstEventsAPI.makeSession
+
+        def mockedSession(self):
+            session = make_session(self)
+            assert 500 not in session.get_adapter(config.FRCEvents.URL_Root).max_retries.status_forcelist
+            session.mount("https://", InvalidEventAdapter())
+            session.mount("http://", InvalidEventAdapter())
+            return session
+        monkeypatch.setattr(FirstEventsAPI, "makeSession", mockedSession)
+
+        for response_cache in [Path(tmpdir)/"frc_events_cache", False]:
+            config.FRCEvents.response_cache = response_cache
+            fapi = FirstEventsAPI(config=config, season=2023)
+            InvalidEventAdapter.calls = 0
+            # Not retried and not reported as the API being unavailable
+            with pytest.raises(ValueError):
+                fapi.getTeamsAtEvent(eventCode="BADCODE")
+            with pytest.raises(ValueError):
+                fapi.getMatchesAtEvent(eventCode="BADCODE")
+            assert InvalidEventAdapter.calls == 2
+
+def test_responseCacheFolder(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        config = RCSA_Config.getConfig(reset=True)
+        database_folder = Path(config.ServerConfig.scoring_database).absolute().parent
+        # A relative folder, like the default, goes next to the database rather than the current directory
+        config.FRCEvents.response_cache = Path("frc_events_cache")
+        assert config.responseCacheFolder() == database_folder/"frc_events_cache"
+        config.FRCEvents.response_cache = True
+        assert config.responseCacheFolder() == database_folder/"frc_events_cache"
+        config.FRCEvents.response_cache = Path(tmpdir)/"elsewhere"
+        assert config.responseCacheFolder() == Path(tmpdir)/"elsewhere"
+        config.FRCEvents.response_cache = False
+        assert config.responseCacheFolder() is None
+
+def test_responseCache(tmpdir, fake_frc_api):
+    with gen_test_env_and_enter(tmpdir):
+        config = RCSA_Config.getConfig(reset=True)
+        config.Secrets.FRC_Events_API_Username = "testuser"
+        config.Secrets.FRC_Events_API_Auth_Token = "testtoken"
+        config.FRCEvents.URL_Root = fake_frc_api
+        config.FRCEvents.response_cache = Path(tmpdir)/"frc_events_cache"
+
+        fapi = FirstEventsAPI(config=config, season=2023)
+        teams = fapi.getTeamsAtEvent(eventCode="CALA")
+        assert FirstTeam(nameShort="Flame of The West", teamNumber=2584, eventCode="CALA") in teams
+        assert len(fapi.getMatchesAtEvent(eventCode="CALA")) == 1
+        assert all(not_modified == False for path, not_modified in FakeFRCEventsAPI.requests_seen)
+
+        # Asking again sends conditional requests and uses the saved bodies
+        FakeFRCEventsAPI.requests_seen = []
+        fapi = FirstEventsAPI(config=config, season=2023)
+        assert fapi.getTeamsAtEvent(eventCode="CALA") == teams
+        assert [not_modified for path, not_modified in FakeFRCEventsAPI.requests_seen] == [True, True]
+
+        # Offline replays without any requests
+        FakeFRCEventsAPI.requests_seen = []
+        config.FRCEvents.offline = True
+        fapi = FirstEventsAPI(config=config, season=2023)
+        assert fapi.getTeamsAtEvent(eventCode="CALA") == teams
+        assert len(fapi.getMatchesAtEvent(eventCode="CALA")) == 1
+        assert FakeFRCEventsAPI.requests_seen == []
+        with pytest.raises(OfflineResponseNotCached):
+            fapi.getDistricts()
+
+def test_concurrentFetchWithRetry(tmpdir, fake_frc_api):
+    with gen_test_env_and_enter(tmpdir):
+        config = RCSA_Config.getConfig(reset=True)
+        config.Secrets.FRC_Events_API_Username = "testuser"
+        config.Secrets.FRC_Events_API_Auth_Token = "testtoken"
+        config.FRCEvents.URL_Root = fake_frc_api
+        config.FRCEvents.response_cache = False
+
+        fapi = FirstEventsAPI(config=config, season=2023)
+        FakeFRCEventsAPI.requests_seen = []
+        FakeFRCEventsAPI.delay = 0.2
+        # The schedule fails twice before it works
+        FakeFRCEventsAPI.failures = {"/v3.0/2023/schedule/CALA":2}
+        teams, matches = fapi.getTeamsAndMatchesAtEvent(eventCode="CALA")
+        assert [t.teamNumber for t in teams] == [2584]
+        assert [m.matchNumber for m in matches] == [1]
+        # Both were asked for at the same time
+        assert FakeFRCEventsAPI.max_in_flight == 2
+        assert [seen for path, seen in FakeFRCEventsAPI.requests_seen if path == "/v3.0/2023/schedule/CALA"] == ["failed", "failed", False]
+
+        # Each thread has its own Session, set up the same way
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(fapi.api_session)) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sessions[0] is not sessions[1]
+        assert sessions[0] is not fapi.api_session
+        assert all(session.auth == ("testuser", "testtoken") for session in sessions)
+
+def test_failingAPIAfterRetries(tmpdir, fake_frc_api, monkeypatch):
+    with gen_test_env_and_enter(tmpdir):
+        config = RCSA_Config.getConfig(reset=True)
+        config.Secrets.FRC_Events_API_Username = "testuser"
+        config.Secrets.FRC_Events_API_Auth_Token = "testtoken"
+        config.FRCEvents.URL_Root = fake_frc_api
+        config.FRCEvents.response_cache = Path(tmpdir)/"frc_events_cache"
+        monkeypatch.setattr(FirstEventsAPI, "backoff_factor", 0)
+
+        fapi = FirstEventsAPI(config=config, season=2023)
+        teams = fapi.getTeamsAtEvent(eventCode="CALA")
+        # Still failing after the retries: the saved response is used
+        FakeFRCEventsAPI.failures = {"/v3.0/2023/teams":FirstEventsAPI.retries + 1, "/v3.0/2023/schedule/CALA":FirstEventsAPI.retries + 1}
+        assert fapi.getTeamsAtEvent(eventCode="CALA") == teams
+        # Never saved: a clear error instead of the 503 body
+        with pytest.raises(FirstEventsAPIUnavailable):
+            fapi.getMatchesAtEvent(eventCode="CALA")
+
+        # The same without the response cache
+        config.FRCEvents.response_cache = False
+        fapi = FirstEventsAPI(config=config, season=2023)
+        FakeFRCEventsAPI.failures = {"/v3.0/2023/teams":FirstEventsAPI.retries + 1}
+        with pytest.raises(FirstEventsAPIUnavailable):
+            fapi.getTeamsAtEvent(eventCode="CALA")
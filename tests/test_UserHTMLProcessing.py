@@ -59,3 +59,19 @@ def test_with_database(tmpdir):
         # Check to make sure its there
         existing = uhp.checkForValidatedPageEntry()
         assert existing is not None
+
+def test_stored_parse_result(tmpdir, monkeypatch):
+    with gen_test_env_and_enter(tmpdir):
+        config = RCSA_Config.getConfig()
+        RCSA_DB.getSQLSession(reset=True)
+        uhp = UserHTMLProcessing(config.ServerConfig.scoring_page)
+        assert uhp.validate() == True
+        parsed = uhp.scoring_parse_result
+
+        # A page seen before comes back from the database without touching the HTML
+        def noParsing(self):
+            raise AssertionError("The page should not be parsed again")
+        monkeypatch.setattr(UserHTMLProcessing, "getParsedDocument", noParsing)
+        stored = UserHTMLProcessing(config.ServerConfig.scoring_page).getScoringParseResult()
+        assert stored == parsed
+        assert "cone" in stored.scoring_elements["score_tally"]
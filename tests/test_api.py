@@ -1,3 +1,8 @@
+import gzip
+import json
+import signal
+import threading
+import time
 import tempfile
 import pytest
 from pathlib import Path
@@ -6,12 +11,13 @@ from contextlib import contextmanager
 import os
 import yaml
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from uvicorn import Config
 from robocompscoutingapp.FirstEventsAPI import FirstMatch, FirstTeam
 
-from robocompscoutingapp.GlobalItems import RCSA_Config, temp_chdir
-from robocompscoutingapp.ScoringData import Score, ScoredMatchForTeam, storeMatches, storeTeams
+from robocompscoutingapp.GlobalItems import RCSA_Config, GracefulInterruptHandler, ShutdownRequest, rcsa_worker_config_env
+from robocompscoutingapp.ScoringData import Score, ScoredMatchForTeam, storeMatches, storeTeams, CurrentScoringPageCache, EventReadModel
 from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
 from robocompscoutingapp.Initialize import Initialize
 from robocompscoutingapp.Integrate import Integrate
@@ -23,6 +29,7 @@ from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
 )
 from robocompscoutingapp.web.ThreadedUvicorn import ThreadedUvicorn
 from robocompscoutingapp.RunAPIServer import RunAPIServer
+from robocompscoutingapp.web.Compression import precompressStaticFiles, staticCacheFolder
 
 # https://stackoverflow.com/questions/49753085/python-configure-logger-with-yaml-to-open-logfile-in-write-mode
 # https://docs.python.org/3/howto/logging.html#configuring-logging
@@ -75,6 +82,11 @@ class SingletonTestEnv:
             # Update the location of the scoring page
             init.updateTOML(["ServerConfig", "scoring_page"], f"{cls._temp_dir_obj.name}/static/scoring_sample.html", tgt_dir = cls._temp_dir_obj.name)
             os.chdir(cls._temp_dir_obj.name)
+            # Start from this module's config and an empty database, nothing left over from other tests
+            RCSA_Config.getConfig(reset=True)
+            RCSA_DB.closeAll()
+            CurrentScoringPageCache.invalidate()
+            EventReadModel.invalidate()
             uhp = UserHTMLProcessing(f"{cls._temp_dir_obj.name}/static/scoring_sample.html")
             uhp.validate()
             # Integrate it to set the data
@@ -98,6 +110,7 @@ class SingletonTestEnv:
             if cls._instance_count == 0:
                 if cls._shutdown_received:
                     cls._server.stop()
+                    RCSA_DB.closeAll()
                     if cls._success:
                         cls._temp_dir_obj.cleanup()
                     os.chdir(cls._original_wd)
@@ -119,7 +132,11 @@ def gen_test_env_and_enter(temp_dir_path:Path):
     # Validate the page
     try:
         os.chdir(temp_dir_path)
+        # Start from this test's config and an empty database, nothing left over from other tests
         RCSA_Config.getConfig(reset=True)
+        RCSA_DB.closeAll()
+        CurrentScoringPageCache.invalidate()
+        EventReadModel.invalidate()
         uhp = UserHTMLProcessing(f"{temp_dir_path}/static/scoring_sample.html")
         uhp.validate()
         # Integrate it to set the data
@@ -273,6 +290,264 @@ def test_scoring_and_retrieval():
         assert sc["data"]["2"]["totals"]["cone"]["count_of_scored_events"] == 0
         assert sc["data"]["3"]["totals"]["cone"]["total"] == 1
 
+def test_addScoresBatch():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        score_obj = ScoredMatchForTeam(
+            matchNumber=1,
+            teamNumber=2,
+            scoring_page_id=1,
+            scores=[Score(scoring_item_id=1, mode_id=1, value=1)]
+        )
+        r = requests.post(baseurl+"/api/addScoresBatch", json=[score_obj.model_dump(), score_obj.model_dump()])
+        assert r.status_code == 200
+        results = r.json()["results"]
+        assert results[0]["status"] == "stored"
+        assert results[1]["status"] == "duplicate"
+
+        # The single score endpoint reports the same duplicate as a 409
+        r = requests.post(baseurl+"/api/addScores", json=score_obj.model_dump())
+        assert r.status_code == 409
+
+def test_duplicate_rule_same_for_both_routes():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        def submission(matchNumber, items):
+            return ScoredMatchForTeam(
+                matchNumber=matchNumber,
+                teamNumber=1,
+                scoring_page_id=1,
+                scores=[Score(scoring_item_id=item, mode_id=1, value=1) for item in items]
+            ).model_dump()
+
+        def statusFromSingle(sub):
+            r = requests.post(baseurl+"/api/addScores", json=sub)
+            assert r.status_code in [200, 409]
+            return "stored" if r.status_code == 200 else "duplicate"
+
+        def statusFromBatch(sub):
+            r = requests.post(baseurl+"/api/addScoresBatch", json=[sub])
+            assert r.status_code == 200
+            return r.json()["results"][0]["status"]
+
+        # Resubmissions after items 1 and 2 were stored, each tried against its own fresh match through each route.
+        # Any score already stored makes it a duplicate (the ScoresForEvent unique constraint)
+        resubmissions = {"same items":([1, 2], "duplicate"), "one item again":([2, 3], "duplicate"), "other items":([3, 4], "stored")}
+        match_numbers = iter(range(201, 201 + 2 * len(resubmissions)))
+        storeMatches(match_list=[
+            FirstMatch(eventCode="CALA", description=f"Match {m}", matchNumber=m, Red1=1, Red2=2, Red3=3, Blue1=1, Blue2=2, Blue3=3)
+            for m in range(201, 201 + 2 * len(resubmissions))
+        ])
+        for name, (items, expected) in resubmissions.items():
+            for route in [statusFromSingle, statusFromBatch]:
+                matchNumber = next(match_numbers)
+                assert route(submission(matchNumber, [1, 2])) == "stored"
+                assert route(submission(matchNumber, items)) == expected, f"{name} through {route.__name__}"
+
+def test_conditional_get():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        for endpoint in ["/api/getMatchesAndTeams", "/api/getMatches", "/api/getAllScores", "/api/gameModesAndScoringElements", "/api/currentPageStatus"]:
+            r = requests.get(baseurl+endpoint)
+            assert r.status_code == 200
+            etag = r.headers["ETag"]
+            r = requests.get(baseurl+endpoint, headers={"If-None-Match":etag})
+            assert r.status_code == 304
+            assert r.content == b""
+            assert r.headers["ETag"] == etag
+
+        # A write moves the data version on
+        r = requests.get(baseurl+"/api/getMatchesAndTeams")
+        etag = r.headers["ETag"]
+        score_obj = ScoredMatchForTeam(
+            matchNumber=2,
+            teamNumber=3,
+            scoring_page_id=1,
+            scores=[Score(scoring_item_id=1, mode_id=1, value=1)]
+        )
+        r = requests.post(baseurl+"/api/addScores", json=score_obj.model_dump())
+        assert r.status_code == 200
+        r = requests.get(baseurl+"/api/getMatchesAndTeams", headers={"If-None-Match":etag})
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+        assert "2" not in r.json()["matches"]
+
+def test_columnar_scores():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        nested = requests.get(baseurl+"/api/getAllScores").json()
+        r = requests.get(baseurl+"/api/getAllScores", params={"format":"columnar"})
+        assert r.status_code == 200
+        columnar = r.json()
+        assert columnar["teams"] == sorted(int(t) for t in nested["data"])
+        assert columnar["modes"] == ["Auton", "Teleop"]
+        assert len(columnar["items"]) == 6
+        assert len(columnar["total"]) == len(columnar["teams"]) * 3 * 6
+        # Same ETag as the nested form, the data is the same
+        assert r.headers["ETag"] == requests.get(baseurl+"/api/getAllScores").headers["ETag"]
+        r = requests.get(baseurl+"/api/getAllScores", params={"format":"rows"})
+        assert r.status_code == 422
+
+def test_compression():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        plain = requests.get(baseurl+"/api/getAllScores", headers={"Accept-Encoding":"identity"})
+        assert "Content-Encoding" not in plain.headers
+        assert len(plain.content) >= 1024
+        r = requests.get(baseurl+"/api/getAllScores", headers={"Accept-Encoding":"gzip"})
+        assert r.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in r.headers["Vary"]
+        assert r.json() == plain.json()
+        # Compressed or not, it is the same data version
+        r = requests.get(baseurl+"/api/getAllScores", headers={"Accept-Encoding":"gzip", "If-None-Match":plain.headers["ETag"]})
+        assert r.status_code == 304
+        # Small responses are sent as they are
+        r = requests.get(baseurl+"/api/currentPageStatus", headers={"Accept-Encoding":"gzip"})
+        assert "Content-Encoding" not in r.headers
+
+        # Static files are sent from the copies made when the server started
+        static_folder = Path(RCSA_Config.getConfig().ServerConfig.user_static_folder)
+        cache_folder = staticCacheFolder(RCSA_Config.getConfig().ServerConfig.scoring_database)
+        js = static_folder/"js/rcsa_analysis.js"
+        r = requests.get(baseurl+"/app/js/rcsa_analysis.js", headers={"Accept-Encoding":"gzip"}, stream=True)
+        assert r.headers["Content-Encoding"] == "gzip"
+        assert r.headers["Content-Type"].startswith("text/javascript")
+        raw = r.raw.read()
+        assert raw == (cache_folder/"js/rcsa_analysis.js.gz").read_bytes()
+        # Nothing is written to the user static folder
+        assert not any(p.suffix in {".gz", ".br"} for p in static_folder.rglob("*"))
+        assert gzip.decompress(raw) == js.read_bytes()
+        r = requests.get(baseurl+"/app/js/rcsa_analysis.js", headers={"Accept-Encoding":"identity"})
+        assert "Content-Encoding" not in r.headers
+        assert r.content == js.read_bytes()
+        # Only new and changed files are compressed again, until then a changed file is sent as it is
+        assert precompressStaticFiles(static_folder, cache_folder) == 0
+        extra = static_folder/"js/extra.js"
+        extra.write_text("var x = 1;\n" * 200)
+        assert precompressStaticFiles(static_folder, cache_folder) >= 1
+        assert (cache_folder/"js/extra.js.gz").exists()
+        extra.write_text("var y = 2;\n" * 200)
+        r = requests.get(baseurl+"/app/js/extra.js", headers={"Accept-Encoding":"gzip"})
+        assert "Content-Encoding" not in r.headers
+        assert r.text == "var y = 2;\n" * 200
+
+def test_event_stream():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        with requests.get(baseurl+"/api/events/stream", stream=True, timeout=10) as stream:
+            assert stream.headers["content-type"].startswith("text/event-stream")
+            lines = stream.iter_lines(decode_unicode=True)
+
+            def nextEvent():
+                event = {}
+                for line in lines:
+                    if line == "" and "event" in event:
+                        return event
+                    if line.startswith("event: "):
+                        event["event"] = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        event["data"] = json.loads(line[len("data: "):])
+
+            # Subscribed once the connected event arrives
+            assert nextEvent()["event"] == "connected"
+            score_obj = ScoredMatchForTeam(
+                matchNumber=1,
+                teamNumber=3,
+                scoring_page_id=1,
+                scores=[Score(scoring_item_id=1, mode_id=1, value=2)]
+            )
+            r = requests.post(baseurl+"/api/addScores", json=score_obj.model_dump())
+            assert r.status_code == 200
+            match_scored = nextEvent()
+            assert match_scored["event"] == "match_scored"
+            assert match_scored["data"]["matchNumber"] == 1
+            team_results = nextEvent()
+            assert team_results["event"] == "team_results"
+            assert team_results["data"]["results"]["teamNumber"] == 3
+            # Matches the full payload
+            all_scores = requests.get(baseurl+"/api/getAllScores").json()
+            assert all_scores["data"]["3"] == team_results["data"]["results"]
+
+def test_idle_cpu():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        # What the CLI does while the server runs: sleep until a shutdown is requested
+        with GracefulInterruptHandler() as pause:
+            threading.Timer(1.0, ShutdownRequest.request).start()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            pause.wait()
+            cpu_used = time.process_time() - cpu_start
+            wall = time.perf_counter() - wall_start
+        assert wall >= 0.9
+        # The whole process, server thread included, is close to idle
+        assert cpu_used < 0.1 * wall
+
+        # Interrupt signals wake the wait too
+        with GracefulInterruptHandler() as pause:
+            threading.Timer(0.2, os.kill, args=(os.getpid(), signal.SIGINT)).start()
+            pause.wait()
+            assert pause.interrupted == True
+
+def test_multiple_workers():
+    with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
+        fake_game_data()
+        server_config = RCSA_Config.getConfig().ServerConfig
+        original_port = server_config.port
+        server_config.port = original_port + 1
+        # The workers must not depend on this process already having the database open
+        RCSA_DB.closeAll()
+        server = RunAPIServer(workers=2)
+        try:
+            server.run()
+            workers_url = serverBaseURL()
+            # The workers use the event code set above, it is not in the TOML file
+            r = requests.get(workers_url+"/api/getMatchesAndTeams")
+            assert r.status_code == 200
+            assert "3" in r.json()["teams"]
+            # Both workers write to the same database
+            match_numbers = range(101, 117)
+            storeMatches(match_list=[
+                FirstMatch(eventCode="CALA", description=f"Match {m}", matchNumber=m, Red1=1, Red2=2, Red3=3, Blue1=1, Blue2=2, Blue3=3)
+                for m in match_numbers
+            ])
+            # Load the matches into every worker's in-memory copy
+            for _ in range(6):
+                assert "101" in requests.get(workers_url+"/api/getMatches").json()["matches"]
+            def send(matchNumber):
+                score_obj = ScoredMatchForTeam(
+                    matchNumber=matchNumber,
+                    teamNumber=3,
+                    scoring_page_id=1,
+                    scores=[Score(scoring_item_id=1, mode_id=1, value=1)]
+                )
+                with requests.Session() as session:
+                    return session.post(workers_url+"/api/addScores", json=score_obj.model_dump()).status_code
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                assert set(pool.map(send, match_numbers)) == {200}
+            # No worker still lists matches another worker scored
+            for _ in range(6):
+                unscored = requests.get(workers_url+"/api/getMatches").json()["matches"]
+                assert not any(str(m) in unscored for m in match_numbers)
+            r = requests.get(workers_url+"/api/getAllScores")
+            assert r.status_code == 200
+            assert "3" in r.json()["data"]
+            # The single process server sees the same data
+            assert requests.get(baseurl+"/api/getAllScores").json()["data"]["3"] == r.json()["data"]["3"]
+            # A worker that dies is replaced
+            dead_worker = server.server.processes[0]
+            dead_worker.process.kill()
+            dead_worker.process.join()
+            deadline = time.monotonic() + 30
+            while server.server.processes[0] is dead_worker and time.monotonic() < deadline:
+                time.sleep(0.1)
+            assert server.server.processes[0].wait_until_ready(30)
+            assert requests.get(workers_url+"/lifecheck").json() == {"alive":True}
+        finally:
+            server.stop()
+            server_config.port = original_port
+            os.environ.pop(rcsa_worker_config_env, None)
+        assert not any(worker.process.is_alive() for worker in server.server.processes)
+
 def test_error():
      with SingletonTestEnv.activateTestEnv() as (baseurl, temp_dir):
          r = requests.get(baseurl+"/errorcheck")
@@ -13,6 +13,7 @@ from robocompscoutingapp.GlobalItems import RCSA_Config, temp_chdir
 from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
 from robocompscoutingapp.Initialize import Initialize
 from robocompscoutingapp.Integrate import Integrate
+from robocompscoutingapp.ScoringData import CurrentScoringPageCache, EventReadModel
 from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     ScoringPageStatus,
     ModesForScoringPage,
@@ -65,6 +66,11 @@ class SingletonTestEnv:
             with open("fake_secrets.toml", "w") as f:
                 f.write(fake_secrets_toml)
             init.updateTOML(["Secrets", "secrets_file"], f"{cls._temp_dir_obj.name}/fake_secrets.toml", tgt_dir = cls._temp_dir_obj.name)
+            # Start from this module's config (with the fake credentials) and an empty database, nothing left over from other tests
+            RCSA_Config.getConfig(reset=True)
+            RCSA_DB.closeAll()
+            CurrentScoringPageCache.invalidate()
+            EventReadModel.invalidate()
             uhp = UserHTMLProcessing(f"{cls._temp_dir_obj.name}/static/scoring_sample.html")
             uhp.validate()
             # Integrate it to set the data
@@ -87,6 +93,7 @@ class SingletonTestEnv:
             if cls._instance_count == 0:
                 if cls._shutdown_received:
                     cls._server.stop()
+                    RCSA_DB.closeAll()
                     if cls._success:
                         cls._temp_dir_obj.cleanup()
                     os.chdir(cls._original_wd)
@@ -108,7 +115,11 @@ def gen_test_env_and_enter(temp_dir_path:Path):
     # Validate the page
     try:
         os.chdir(temp_dir_path)
+        # Start from this test's config and an empty database, nothing left over from other tests
         RCSA_Config.getConfig(reset=True)
+        RCSA_DB.closeAll()
+        CurrentScoringPageCache.invalidate()
+        EventReadModel.invalidate()
         uhp = UserHTMLProcessing(f"{temp_dir_path}/static/scoring_sample.html")
         uhp.validate()
         # Integrate it to set the data
@@ -163,3 +174,8 @@ def test_server_alive_authed():
         life = life.json()
         assert life["alive"] == True
 
+
+def test_shutdown():
+    # Not really a test
+    with SingletonTestEnv.activateTestEnv():
+        SingletonTestEnv.shutdown()
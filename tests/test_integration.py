@@ -11,6 +11,7 @@ from robocompscoutingapp.Initialize import Initialize
 from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
 from robocompscoutingapp.AppExceptions import IntegrationPageNotValidated
 from robocompscoutingapp.Integrate import Integrate
+from robocompscoutingapp.ScoringData import CurrentScoringPageCache, EventReadModel, DataVersion
 from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     ScoringPageStatus,
     ModesForScoringPage,
@@ -40,7 +41,11 @@ def gen_test_env_and_enter(temp_dir_path:Path):
     # Validate the page
     try:
         os.chdir(temp_dir_path)
+        # Start from this test's config and an empty database, nothing left over from other tests
         RCSA_Config.getConfig(reset=True)
+        RCSA_DB.closeAll()
+        CurrentScoringPageCache.invalidate()
+        EventReadModel.invalidate()
         uhp = UserHTMLProcessing(f"{temp_dir_path}/static/scoring_sample.html")
         uhp.validate()
         # Go do what the test needs
@@ -72,6 +77,23 @@ def test_not_validated_error(tmp_path):
             integration = Integrate()
             integration.verifyScoringPageValidated()
 
+def test_failed_integration_is_atomic(tmpdir, monkeypatch):
+    with gen_test_env_and_enter(tmpdir):
+        scoring_page_id = getScoringPageID()
+        integrate = Integrate()
+        # Good modes but scoring items it can't handle, so integration fails after the modes are added
+        spr = integrate.getScoringPageResult()
+        spr.scoring_elements = {"score_tally":["cone"], "score_flag":42}
+        monkeypatch.setattr(integrate, "getScoringPageResult", lambda: spr)
+        with pytest.raises(TypeError):
+            integrate.integrate()
+
+        with RCSA_DB.getSQLSession() as db:
+            assert len(db.scalars(select(ModesForScoringPage).filter_by(scoring_page_id=scoring_page_id)).all()) == 0
+            assert len(db.scalars(select(ScoringItemsForScoringPage).filter_by(scoring_page_id=scoring_page_id)).all()) == 0
+            this_page = db.scalars(select(ScoringPageStatus).filter_by(scoring_page_id=scoring_page_id)).one()
+            assert this_page.integrated == False
+
 def test_full_integration(tmpdir):
     with gen_test_env_and_enter(tmpdir):
         scoring_page_id = getScoringPageID()
@@ -81,7 +103,10 @@ def test_full_integration(tmpdir):
         expected_items = {'score_tally': ['cone', 'cube'], 'score_flag': ['Attempted charge', 'Succeeded charge', 'Auton Mobility', 'Broke']}
 
         integrate = Integrate()
+        version = DataVersion.current()
         (mode_id_dict,  scoring_item_id_dict) = integrate.integrate()
+        # One new data version, made after the commit
+        assert DataVersion.current() == f"{version.rsplit('-', 1)[0]}-{int(version.rsplit('-', 1)[1]) + 1}"
         assert mode_id_dict is not None
         assert scoring_item_id_dict is not None
 
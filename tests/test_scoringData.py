@@ -1,4 +1,7 @@
 import tempfile
+import asyncio
+import json
+import importlib
 import pytest
 from pathlib import Path
 # from tomlkit import TOMLDocument, table
@@ -6,7 +9,7 @@ from contextlib import contextmanager
 import os
 import yaml
 import requests
-from sqlalchemy import select
+from sqlalchemy import select, text, create_engine
 
 from uvicorn import Config
 
@@ -15,9 +18,13 @@ from robocompscoutingapp.UserHTMLProcessing import UserHTMLProcessing
 from robocompscoutingapp.Initialize import Initialize
 from robocompscoutingapp.Integrate import Integrate
 from robocompscoutingapp.ScoringData import (
-    GenerateResultsForTeam,
+    GenerateResultsForAllTeams,
     getGameModeAndScoringElements,
     getCurrentScoringPageData, 
+    setScoringPageTestResult,
+    CurrentScoringPageCache,
+    EventReadModel,
+    setMatchToScored,
     storeTeams,
     storeMatches,
     deleteMatchesFromEvent,
@@ -25,14 +32,24 @@ from robocompscoutingapp.ScoringData import (
     MatchesAndTeams,
     getMatchesAndTeams,
     addScoresToDB,
+    addScoresBatchToDB,
+    addScoresToDBAsync,
+    addScoresBatchToDBAsync,
+    ScoreWriteQueue,
+    getAggregrateResultsForAllTeamsAsync,
+    ScoreSubmissionStatus,
     deleteScoresFromDB,
     Score,
     ScoredMatchForTeam,
     teamAlreadyScoredForThisMatch,
     getAggregrateResultsForAllTeams,
+    getAggregrateResultsForAllTeamsAsDict,
+    getAggregrateResultsForAllTeamsColumnar,
     getPageIDsUsedForThisEvent,
-    migrateDataForEventToNewPage
+    migrateDataForEventToNewPage,
+    rebuildAggregates
 )
+from robocompscoutingapp.web.FastJSONResponse import FastJSONResponse
 from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     ScoringPageStatus,
     ModesForScoringPage,
@@ -40,8 +57,12 @@ from robocompscoutingapp.ORMDefinitionsAndDBAccess import (
     TeamsForEvent,
     MatchesForEvent,
     RCSA_DB,
-    ScoresForEvent
+    ScoresForEvent,
+    TeamAggregatesForEvent,
+    TeamMatchCountsForEvent,
+    rcsa_scoring_tables
 )
+from robocompscoutingapp.AppExceptions import ScoresAlreadySubmitted
 from robocompscoutingapp.FirstEventsAPI import (
     FirstTeam,
     FirstMatch
@@ -58,6 +79,11 @@ def gen_test_env_and_enter(temp_dir_path:Path):
     # Validate the page
     try:
         os.chdir(temp_dir_path)
+        # Start from this test's config and an empty database, nothing left over from other tests
+        RCSA_Config.getConfig(reset=True)
+        RCSA_DB.closeAll()
+        CurrentScoringPageCache.invalidate()
+        EventReadModel.invalidate()
         uhp = UserHTMLProcessing(f"{temp_dir_path}/static/scoring_sample.html")
         uhp.validate()
         # Integrate it to set the data
@@ -102,6 +128,69 @@ def test_scoring_page_id(tmpdir):
     with gen_test_env_and_enter(tmpdir):
         assert getCurrentScoringPageData().scoring_page_id == 1
 
+def test_sqlite_performance_profile(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        with RCSA_DB.getSQLSession() as db:
+            assert db.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+            # NORMAL is 1
+            assert db.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert db.execute(text("PRAGMA cache_size")).scalar() == RCSA_Config.getConfig().ServerConfig.sqlite_cache_size
+            # MEMORY is 2
+            assert db.execute(text("PRAGMA temp_store")).scalar() == 2
+
+def test_upgradeDatabaseAddsIndexes(tmpdir):
+    # A database made before the secondary indexes were declared
+    engine = create_engine(f"sqlite:///{tmpdir}/old_version.db")
+    rcsa_scoring_tables.metadata.create_all(engine)
+    index_names = ["ScoresForEvent_event_page_team", "ScoresForEvent_event_team_match", "MatchesForEvent_event_scored_match"]
+    with engine.begin() as conn:
+        for index_name in index_names:
+            conn.execute(text(f'DROP INDEX "{index_name}"'))
+    RCSA_DB.upgradeDatabase(engine)
+    with engine.connect() as conn:
+        found = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+    engine.dispose()
+    assert set(index_names).issubset(found)
+
+def test_upgradeDatabaseFillsAggregates(tmpdir):
+    # A database with scores made before the aggregate tables existed
+    engine = create_engine(f"sqlite:///{tmpdir}/old_version.db")
+    rcsa_scoring_tables.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE "TeamAggregatesForEvent"'))
+        conn.execute(text('DROP TABLE "TeamMatchCountsForEvent"'))
+        conn.execute(text('INSERT INTO "ScoresForEvent" (scoring_page_id, mode_id, "matchNumber", "eventCode", "teamNumber", scoring_item_id, value) '
+                          "VALUES (1, 1, 1, 'OLD', 5, 1, '3'), (1, 1, 2, 'OLD', 5, 1, '2'), (1, 2, 2, 'OLD', 5, 1, '1')"))
+    existing_tables = {"ScoresForEvent"}
+    rcsa_scoring_tables.metadata.create_all(engine)
+    RCSA_DB.upgradeDatabase(engine, existing_tables)
+    with engine.connect() as conn:
+        aggregates = conn.execute(text('SELECT mode_id, count_of_scores, total, sum_of_squares FROM "TeamAggregatesForEvent" ORDER BY mode_id')).all()
+        matches = conn.execute(text('SELECT "teamNumber", scored_matches FROM "TeamMatchCountsForEvent"')).all()
+    engine.dispose()
+    assert [tuple(row) for row in aggregates] == [(1, 2, 5, 13), (2, 1, 1, 1)]
+    assert [tuple(row) for row in matches] == [(5, 2)]
+
+def test_scoring_page_cache(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        first = getCurrentScoringPageData()
+        assert CurrentScoringPageCache._status is not None
+        # Status changes are picked up after the cache is invalidated
+        setScoringPageTestResult(True, first.scoring_page_id)
+        assert getCurrentScoringPageData().tested == True
+        setScoringPageTestResult(False, first.scoring_page_id)
+        assert getCurrentScoringPageData().tested == False
+        # A different page drops the cached status, and the changed page is not validated
+        original_page = RCSA_Config.getConfig().ServerConfig.scoring_page
+        changed_page = original_page.parent/"changed_scoring_sample.html"
+        changed_page.write_text(original_page.read_text() + "<!-- changed -->")
+        try:
+            RCSA_Config.getConfig().ServerConfig.scoring_page = changed_page
+            assert getCurrentScoringPageData() is None
+        finally:
+            RCSA_Config.getConfig().ServerConfig.scoring_page = original_page
+        assert getCurrentScoringPageData().scoring_page_id == first.scoring_page_id
+
 def test_storeTeams(tmpdir):
     with gen_test_env_and_enter(tmpdir):
         # Quick fake team
@@ -111,10 +200,13 @@ def test_storeTeams(tmpdir):
             teamNumber=2584
         )
         # save it
-        storeTeams([team])
+        counts = storeTeams([team])
+        assert counts.inserted == 1
         # If we make it here, really no reason why it wouldn't work
         # Try it again to see if integrity error fails smoothly
-        storeTeams([team])
+        counts = storeTeams([team])
+        assert counts.inserted == 0
+        assert counts.skipped == 1
 
         # Now make sure it wasn't added twice
         with RCSA_DB.getSQLSession() as db:
@@ -134,13 +226,18 @@ def test_storeMatches(tmpdir):
             Blue2 = 5,
             Blue3 = 6
         )
-        storeMatches([match])
+        counts = storeMatches([match])
+        assert counts.inserted == 1
         # Test integrity error
-        storeMatches([match])
+        other_event_match = match.model_copy(update={"eventCode":"BULK"})
+        counts = storeMatches([match, other_event_match])
+        assert counts.inserted == 1
+        assert counts.skipped == 1
+        deleteMatchesFromEvent("BULK")
 
         # Make sure it was stored once
         with RCSA_DB.getSQLSession() as db:
-            db_match = db.scalars(select(MatchesForEvent)).one()
+            db_match = db.scalars(select(MatchesForEvent).filter_by(matchNumber=1)).one()
             assert db_match.scored == False
 
 def test_getMatchesAndTeams(tmpdir):
@@ -172,6 +269,45 @@ def test_getMatchesAndTeams(tmpdir):
         assert len(result.matches) == 1
         assert len(result.teams) == 1
 
+def test_eventReadModel(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        matches = [FirstMatch(
+            eventCode = "READ",
+            description = f"Test {number}",
+            matchNumber = number,
+            Red1 = 1,
+            Red2 = 2,
+            Red3 = 3,
+            Blue1 = 4,
+            Blue2 = 5,
+            Blue3 = 6
+        ) for number in [1, 2]]
+        storeMatches(matches)
+        storeTeams([FirstTeam(eventCode="READ", nameShort="Reader", teamNumber=1)])
+        body = EventReadModel.getSerialized("READ")
+        # Serialized once and reused
+        assert EventReadModel.getSerialized("READ") is body
+        assert MatchesAndTeams.model_validate_json(body) == getMatchesAndTeams("READ")
+        assert MatchesAndTeams.model_validate_json(EventReadModel.getSerialized("READ", include_teams=False)).teams == {}
+
+        # Scoring a match updates the read model without a reload
+        setMatchToScored("READ", 1)
+        assert list(getMatchesAndTeams("READ").matches.keys()) == [2]
+        assert list(MatchesAndTeams.model_validate_json(EventReadModel.getSerialized("READ")).matches.keys()) == [2]
+        assert getMatchesAndTeams("READ", unscored_only=False).matches[1].scored == True
+
+        # Copies handed out don't change the stored data
+        getMatchesAndTeams("READ").matches[2].scored = True
+        assert 2 in getMatchesAndTeams("READ").matches
+
+        # Deleting drops the stored event
+        deleteMatchesFromEvent("READ")
+        assert getMatchesAndTeams("READ", unscored_only=False).matches == {}
+        with RCSA_DB.getSQLSession() as db:
+            db.execute(text("DELETE FROM \"TeamsForEvent\" WHERE \"eventCode\" = 'READ'"))
+            db.commit()
+        EventReadModel.invalidate("READ")
+
 def test_addScores(tmpdir):
     with gen_test_env_and_enter(tmpdir):
         match1 = FirstMatch(
@@ -222,6 +358,12 @@ def test_addScores(tmpdir):
         # Also verify this works
         assert teamAlreadyScoredForThisMatch(2584, 1, "CALA") == True
 
+        # Submitting again is caught by the unique constraint and nothing more is stored
+        with pytest.raises(ScoresAlreadySubmitted):
+            addScoresToDB("CALA", score_obj)
+        with RCSA_DB.getSQLSession() as db:
+            assert len(db.scalars(select(ScoresForEvent).filter_by(matchNumber=1, eventCode="CALA", teamNumber=2584)).all()) == 2
+
         # Now check that match was marked as scored
         data = getMatchesAndTeams(eventCode="CALA", unscored_only=False)
         print(data.matches)
@@ -286,8 +428,7 @@ def test_scoreAggregation(tmpdir):
         addScoresToDB(eventCode="CALA", match_score=score_obj)
 
         # retrieve
-        agg_object = GenerateResultsForTeam("CALA", 1, 1)
-        results = agg_object.getAggregrateResults()
+        results = GenerateResultsForAllTeams("CALA", 1, [1]).getAggregrateResults().data[1]
         assert results.by_mode_results["Auton"].scores["cone"].count_of_scored_events == 1
         assert results.totals["cone"].total == 3 # 1 in auton, 2 in teleop
         assert results.totals["cone"].average == 3 # Only 1 event so far
@@ -306,8 +447,7 @@ def test_scoreAggregation(tmpdir):
         addScoresToDB(eventCode="CALA", match_score=score_obj)
 
         # retrieve
-        agg_object = GenerateResultsForTeam("CALA", 1, 1)
-        results = agg_object.getAggregrateResults()
+        results = GenerateResultsForAllTeams("CALA", 1, [1]).getAggregrateResults().data[1]
         assert results.by_mode_results["Auton"].scores["cone"].count_of_scored_events == 2
         assert results.totals["cone"].count_of_scored_events == 2
         assert results.by_mode_results["Auton"].scores["cone"].average == 1
@@ -316,8 +456,7 @@ def test_scoreAggregation(tmpdir):
         assert results.by_mode_results["Auton"].scores["Auton Mobility"].total == 1
 
         # Check zero scores
-        zero_obj = GenerateResultsForTeam("CALA", 2, 1)
-        results = zero_obj.getAggregrateResults()
+        results = GenerateResultsForAllTeams("CALA", 1, [2]).getAggregrateResults().data[2]
         assert results.by_mode_results["Auton"].scores["cone"].count_of_scored_events == 0
         assert results.totals["cone"].count_of_scored_events == 0
         assert results.by_mode_results["Auton"].scores["cone"].average == 0
@@ -347,6 +486,295 @@ def test_scoreAggregation(tmpdir):
 
         # Verify in DB
 
+def test_allTeamAggregationMatchesPerTeam(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        addScoresToDB(eventCode="CALA", match_score=ScoredMatchForTeam(
+            matchNumber=1,
+            teamNumber=1,
+            scores=[
+                Score(scoring_item_id=1, mode_id=1, value=1),
+                Score(scoring_item_id=1, mode_id=2, value=2),
+                Score(scoring_item_id=5, mode_id=1, value=True)
+            ]
+        ))
+        addScoresToDB(eventCode="CALA", match_score=ScoredMatchForTeam(
+            matchNumber=2,
+            teamNumber=1,
+            scores=[
+                Score(scoring_item_id=1, mode_id=1, value=3),
+                Score(scoring_item_id=2, mode_id=2, value=4)
+            ]
+        ))
+        addScoresToDB(eventCode="CALA", match_score=ScoredMatchForTeam(
+            matchNumber=2,
+            teamNumber=3,
+            scores=[Score(scoring_item_id=1, mode_id=1, value=1)]
+        ))
+
+        all_team_results = getAggregrateResultsForAllTeams("CALA", 1)
+        assert {1, 2, 3}.issubset(all_team_results.data.keys())
+        for teamNumber, team_results in all_team_results.data.items():
+            expected = GenerateResultsForAllTeams("CALA", 1, [teamNumber]).getAggregrateResults().data[teamNumber]
+            assert team_results == expected
+        assert all_team_results.data[1].totals["cone"].average == 3
+        assert all_team_results.data[1].by_mode_results["Teleop"].scores["cube"].total == 4
+
+        deleteScoresFromDB("CALA")
+
+def test_aggregateResultsAsDict(tmpdir, monkeypatch):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        addScoresBatchToDB("CALA", [
+            ScoredMatchForTeam(matchNumber=1, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=3), Score(scoring_item_id=5, mode_id=1, value=True)]),
+            ScoredMatchForTeam(matchNumber=2, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=2)]),
+            ScoredMatchForTeam(matchNumber=2, teamNumber=2, scores=[Score(scoring_item_id=2, mode_id=2, value=4)])
+        ])
+        # The API response is the same JSON the AllTeamResults model gives
+        expected = json.loads(getAggregrateResultsForAllTeams("CALA", 1).model_dump_json())
+        results = getAggregrateResultsForAllTeamsAsDict("CALA", 1)
+        assert json.loads(FastJSONResponse(content=results).body) == expected
+        assert expected["data"]["1"]["totals"]["cone"]["average"] == 2.5
+        # Also without orjson
+        monkeypatch.setattr(importlib.import_module("robocompscoutingapp.web.FastJSONResponse"), "orjson", None)
+        assert json.loads(FastJSONResponse(content=results).body) == expected
+
+        deleteScoresFromDB("CALA")
+
+def test_aggregateResultsColumnar(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        addScoresBatchToDB("CALA", [
+            ScoredMatchForTeam(matchNumber=1, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=3), Score(scoring_item_id=5, mode_id=1, value=True)]),
+            ScoredMatchForTeam(matchNumber=2, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=2, value=2)]),
+            ScoredMatchForTeam(matchNumber=2, teamNumber=2, scores=[Score(scoring_item_id=2, mode_id=2, value=4)])
+        ])
+        nested = getAggregrateResultsForAllTeams("CALA", 1)
+        columnar = getAggregrateResultsForAllTeamsColumnar("CALA", 1)
+        assert columnar["teams"] == sorted(nested.data.keys())
+        assert columnar["modes"] == ["Auton", "Teleop"]
+        assert len(columnar["total"]) == len(columnar["average"]) == len(columnar["teams"]) * 3 * len(columnar["items"])
+        # Every value is where the layout says it is
+        for t, teamNumber in enumerate(columnar["teams"]):
+            team_results = nested.data[teamNumber]
+            for m, mode_name in enumerate(columnar["modes"] + ["Total"]):
+                for i, item_name in enumerate(columnar["items"]):
+                    if mode_name == "Total":
+                        expected = team_results.totals[item_name]
+                    else:
+                        expected = team_results.by_mode_results[mode_name].scores[item_name]
+                    index = (t*(len(columnar["modes"]) + 1) + m)*len(columnar["items"]) + i
+                    assert columnar["total"][index] == expected.total
+                    assert columnar["average"][index] == expected.average
+                    assert columnar["count_of_scored_events"][t] == expected.count_of_scored_events
+        assert columnar["total"][columnar["items"].index("cone") + 2*len(columnar["items"])] == 5
+
+        deleteScoresFromDB("CALA")
+
+def test_materializedAggregates(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        addScoresToDB(eventCode="CALA", match_score=ScoredMatchForTeam(
+            matchNumber=1,
+            teamNumber=1,
+            scores=[Score(scoring_item_id=1, mode_id=1, value=3), Score(scoring_item_id=5, mode_id=1, value=True)]
+        ))
+        addScoresBatchToDB("CALA", [
+            ScoredMatchForTeam(matchNumber=2, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=2)]),
+            ScoredMatchForTeam(matchNumber=2, teamNumber=2, scores=[Score(scoring_item_id=1, mode_id=2, value=4)])
+        ])
+
+        def materialized():
+            with RCSA_DB.getSQLSession() as db:
+                aggregates = db.execute(select(
+                    TeamAggregatesForEvent.teamNumber,
+                    TeamAggregatesForEvent.mode_id,
+                    TeamAggregatesForEvent.scoring_item_id,
+                    TeamAggregatesForEvent.count_of_scores,
+                    TeamAggregatesForEvent.total,
+                    TeamAggregatesForEvent.sum_of_squares
+                ).where(TeamAggregatesForEvent.eventCode == "CALA").order_by(
+                    TeamAggregatesForEvent.teamNumber, TeamAggregatesForEvent.mode_id, TeamAggregatesForEvent.scoring_item_id
+                )).all()
+                matches = db.execute(select(TeamMatchCountsForEvent.teamNumber, TeamMatchCountsForEvent.scored_matches).where(
+                    TeamMatchCountsForEvent.eventCode == "CALA").order_by(TeamMatchCountsForEvent.teamNumber)).all()
+            return [tuple(row) for row in aggregates], [tuple(row) for row in matches]
+
+        aggregates, matches = materialized()
+        assert aggregates == [(1, 1, 1, 2, 5, 13), (1, 1, 5, 1, 1, 1), (2, 2, 1, 1, 4, 16)]
+        assert matches == [(1, 2), (2, 1)]
+        # Rebuilding from the raw scores gives the same answer
+        rebuildAggregates("CALA")
+        assert materialized() == (aggregates, matches)
+
+        all_team_results = getAggregrateResultsForAllTeams("CALA", 1)
+        assert all_team_results.data[1].totals["cone"].total == 5
+        assert all_team_results.data[1].totals["cone"].average == 2.5
+
+        deleteScoresFromDB("CALA")
+        assert materialized() == ([], [])
+
+def test_addScoresBatch(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        good_score = ScoredMatchForTeam(
+            matchNumber=1,
+            teamNumber=1,
+            scores=[
+                Score(scoring_item_id=1, mode_id=1, value=1),
+                Score(scoring_item_id=1, mode_id=2, value=2)
+            ]
+        )
+        repeated_item = ScoredMatchForTeam(
+            matchNumber=2,
+            teamNumber=2,
+            scores=[
+                Score(scoring_item_id=1, mode_id=1, value=1),
+                Score(scoring_item_id=1, mode_id=1, value=2)
+            ]
+        )
+        no_such_match = ScoredMatchForTeam(
+            matchNumber=99,
+            teamNumber=3,
+            scores=[Score(scoring_item_id=1, mode_id=1, value=1)]
+        )
+        batch_result = addScoresBatchToDB("CALA", [good_score, good_score, repeated_item, no_such_match])
+        assert [r.status for r in batch_result.results] == [
+            ScoreSubmissionStatus.stored,
+            ScoreSubmissionStatus.duplicate,
+            ScoreSubmissionStatus.error,
+            ScoreSubmissionStatus.error
+        ]
+        assert teamAlreadyScoredForThisMatch(1, 1, "CALA") == True
+        assert teamAlreadyScoredForThisMatch(2, 2, "CALA") == False
+        assert getMatchesAndTeams(eventCode="CALA", unscored_only=False).matches[1].scored == True
+
+        # Sending the saved scores again only reports duplicates
+        batch_result = addScoresBatchToDB("CALA", [good_score])
+        assert batch_result.results[0].status == ScoreSubmissionStatus.duplicate
+        with RCSA_DB.getSQLSession() as db:
+            assert len(db.scalars(select(ScoresForEvent).filter_by(eventCode="CALA")).all()) == 2
+
+        deleteScoresFromDB("CALA")
+
+def test_nonIntegerScoresRejected(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        half_score = ScoredMatchForTeam(
+            matchNumber=1,
+            teamNumber=1,
+            scores=[Score(scoring_item_id=1, mode_id=1, value=1.5)]
+        )
+        text_score = ScoredMatchForTeam(
+            matchNumber=2,
+            teamNumber=1,
+            scores=[Score(scoring_item_id=1, mode_id=1, value="abc")]
+        )
+        # Whole numbers sent as text are fine
+        form_score = ScoredMatchForTeam(
+            matchNumber=2,
+            teamNumber=3,
+            scores=[Score(scoring_item_id=1, mode_id=1, value="2")]
+        )
+        for bad_score in [half_score, text_score]:
+            with pytest.raises(ValueError):
+                addScoresToDB(eventCode="CALA", match_score=bad_score)
+        batch_result = addScoresBatchToDB("CALA", [half_score, text_score, form_score])
+        assert [r.status for r in batch_result.results] == [
+            ScoreSubmissionStatus.error,
+            ScoreSubmissionStatus.error,
+            ScoreSubmissionStatus.stored
+        ]
+        with RCSA_DB.getSQLSession() as db:
+            assert len(db.scalars(select(ScoresForEvent).filter_by(eventCode="CALA")).all()) == 1
+        assert getAggregrateResultsForAllTeams("CALA", 1).data[3].totals["cone"].total == 2
+
+        deleteScoresFromDB("CALA")
+
+def test_asyncScoring(tmpdir):
+    pytest.importorskip("aiosqlite")
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+
+        async def scoreAsync():
+            await addScoresToDBAsync(eventCode="CALA", match_score=ScoredMatchForTeam(
+                matchNumber=1,
+                teamNumber=1,
+                scores=[Score(scoring_item_id=1, mode_id=1, value=3)]
+            ))
+            with pytest.raises(ScoresAlreadySubmitted):
+                await addScoresToDBAsync(eventCode="CALA", match_score=ScoredMatchForTeam(
+                    matchNumber=1,
+                    teamNumber=1,
+                    scores=[Score(scoring_item_id=1, mode_id=1, value=3)]
+                ))
+            batch_result = await addScoresBatchToDBAsync("CALA", [
+                ScoredMatchForTeam(matchNumber=2, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=2)]),
+                ScoredMatchForTeam(matchNumber=1, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=2)])
+            ])
+            results = await getAggregrateResultsForAllTeamsAsync("CALA", 1)
+            await RCSA_DB.disposeAsync()
+            return batch_result, results
+
+        batch_result, results = asyncio.run(scoreAsync())
+        assert [r.status for r in batch_result.results] == [ScoreSubmissionStatus.stored, ScoreSubmissionStatus.duplicate]
+        # Same answer as the sync engine
+        assert results == getAggregrateResultsForAllTeams("CALA", 1)
+        assert results.data[1].totals["cone"].total == 5
+        assert getMatchesAndTeams(eventCode="CALA", unscored_only=False).matches[2].scored == True
+
+        deleteScoresFromDB("CALA")
+
+def test_scoreWriteQueue(tmpdir):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+        # Not started, written by the calling thread
+        direct = ScoreWriteQueue.submit("CALA", [ScoredMatchForTeam(matchNumber=1, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=1)])])
+        assert direct.result().results[0].status == ScoreSubmissionStatus.stored
+
+        ScoreWriteQueue.start()
+        try:
+            futures = [ScoreWriteQueue.submit("CALA", [ScoredMatchForTeam(
+                matchNumber=2,
+                teamNumber=teamNumber,
+                scores=[Score(scoring_item_id=1, mode_id=1, value=teamNumber)]
+            )]) for teamNumber in range(1, 7)]
+            # Same team and match as the first queued submission
+            repeat = ScoreWriteQueue.submit("CALA", [ScoredMatchForTeam(matchNumber=2, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=1)])])
+            bad_match = ScoreWriteQueue.submit("CALA", [ScoredMatchForTeam(matchNumber=99, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=1)])])
+        finally:
+            ScoreWriteQueue.stop()
+        assert [f.result().results[0].status for f in futures] == [ScoreSubmissionStatus.stored] * 6
+        assert repeat.result().results[0].status == ScoreSubmissionStatus.duplicate
+        assert bad_match.result().results[0].status == ScoreSubmissionStatus.error
+        with RCSA_DB.getSQLSession() as db:
+            assert len(db.scalars(select(ScoresForEvent).filter_by(eventCode="CALA")).all()) == 7
+
+        deleteScoresFromDB("CALA")
+
+def test_scoreWriteQueueAfterCommit(tmpdir, monkeypatch):
+    with gen_test_env_and_enter(tmpdir):
+        fake_game_data()
+        deleteScoresFromDB("CALA")
+
+        def failingScoresStored(*args, **kwargs):
+            raise RuntimeError("publish failed")
+        # The scores are committed before this runs, so the submitter still gets its results
+        monkeypatch.setattr("robocompscoutingapp.ScoringData.scoresStored", failingScoresStored)
+        stored = ScoreWriteQueue.submit("CALA", [ScoredMatchForTeam(matchNumber=1, teamNumber=1, scores=[Score(scoring_item_id=1, mode_id=1, value=1)])])
+        assert stored.result().results[0].status == ScoreSubmissionStatus.stored
+        assert teamAlreadyScoredForThisMatch(1, 1, "CALA") == True
+
+        deleteScoresFromDB("CALA")
+
 def test_datamanagement(tmpdir):
     with gen_test_env_and_enter(tmpdir):
         fake_game_data()
@@ -416,8 +844,7 @@ def test_match_data_reset(tmpdir):
         )
         addScoresToDB(eventCode="CALA", match_score=score_obj)
         # Make sure they are there
-        agg_object = GenerateResultsForTeam("CALA", 2584, 1)
-        results = agg_object.getAggregrateResults()
+        results = GenerateResultsForAllTeams("CALA", 1, [2584]).getAggregrateResults().data[2584]
         assert results.by_mode_results["Auton"].scores["cone"].count_of_scored_events == 1
         assert results.totals["cone"].total == 3 # 1 in auton, 2 in teleop
         assert results.totals["cone"].average == 3 # Only 1 event so far
@@ -426,8 +853,7 @@ def test_match_data_reset(tmpdir):
         # "refresh" the data
         loadEventData("CALA", refresh_match_data=True, season=2023)
         # Make sure the scores are still there
-        agg_object = GenerateResultsForTeam("CALA", 2584, 1)
-        results = agg_object.getAggregrateResults()
+        results = GenerateResultsForAllTeams("CALA", 1, [2584]).getAggregrateResults().data[2584]
         assert results.by_mode_results["Auton"].scores["cone"].count_of_scored_events == 1
         assert results.totals["cone"].total == 3 # 1 in auton, 2 in teleop
         assert results.totals["cone"].average == 3 # Only 1 event so far
@@ -441,8 +867,7 @@ def test_match_data_reset(tmpdir):
         loadEventData("CALA", reset_all_data=True, season=2023)
         mat = getMatchesAndTeams("CALA", unscored_only=True)
         assert 5 in mat.matches.keys()
-        agg_object = GenerateResultsForTeam("CALA", 2584, 1)
-        results = agg_object.getAggregrateResults()
+        results = GenerateResultsForAllTeams("CALA", 1, [2584]).getAggregrateResults().data[2584]
         assert results.by_mode_results["Auton"].scores["cone"].count_of_scored_events == 0
 
 @pytest.mark.skip("Some sort of test environ conflict is breaking this test when run in series, but it runs correctly by itself")          
@@ -608,8 +1033,17 @@ def test_DataMigrate(tmpdir):
             used_ids = getPageIDsUsedForThisEvent("CALA")
             assert len(used_ids) == 1
 
+            # A dry run reports but writes nothing
+            dry_run_results = migrateDataForEventToNewPage("CALA", 1, 2, dry_run=True)
+            assert len(dry_run_results.success_messages) == 1
+            assert "Would migrate 1 " in dry_run_results.success_messages[0]
+            assert len(dry_run_results.warning_messages) == 4
+            assert db.scalars(select(ScoresForEvent).where(ScoresForEvent.eventCode == "CALA", ScoresForEvent.scoring_page_id == 2)).first() is None
+
             # migrate the data
-            migrate_results = migrateDataForEventToNewPage("CALA", 1, 2)
+            progress = []
+            migrate_results = migrateDataForEventToNewPage("CALA", 1, 2, progress_callback=lambda done, total: progress.append((done, total)))
+            assert progress == [(1, 1)]
             assert len(migrate_results.success_messages) == 1
             assert len(migrate_results.warning_messages) == 4
             assert len(migrate_results.error_message) == 0
@@ -1,7 +1,11 @@
 from pathlib import Path
 import pytest
 
+from importlib.util import find_spec
 from robocompscoutingapp.ScoringPageParser import ScoringPageParser
+from robocompscoutingapp.MatchAndTeamSelectionParser import MatchAndTeamSelectionParser
+from robocompscoutingapp.JSScriptParser import JSScriptParser
+from robocompscoutingapp.ParsedHTMLDocument import ParsedHTMLDocument
 from robocompscoutingapp.AppExceptions import ScoringPageParseError, ScoringPageParseWarning
 from robocompscoutingapp.GlobalItems import ScoringClassTypes, getFullTemplateFile
 
@@ -177,4 +181,41 @@ def test_template_validation(capfd, getFullTemplateFile):
         assert result.hasWarnings() == False
         out, err = capfd.readouterr()
         assert out == "[+] Scoring element passed validation!\n"
-    
\ No newline at end of file
+    
+
+def test_shared_parsed_document(get_test_data_path: Path):
+    test_file = get_test_data_path/"scoring_sample.html"
+    html = test_file.read_text()
+    document = ParsedHTMLDocument(html)
+    # Every parser searches the one tree and gets the same answers as parsing the page itself
+    scoring_result = ScoringPageParser(html).parseScoringElement()
+    assert ScoringPageParser(document).parseScoringElement() == scoring_result
+    assert MatchAndTeamSelectionParser(document).parseElement() == MatchAndTeamSelectionParser(html).parseElement()
+    assert JSScriptParser(document).parseElement() == JSScriptParser(html).parseElement()
+    # Running a parser leaves the shared tree alone
+    assert ScoringPageParser(document).parseScoringElement() == scoring_result
+
+    with pytest.raises(ValueError):
+        ParsedHTMLDocument(html, html_parser="not_a_parser")
+    lxml_document = ParsedHTMLDocument(html, html_parser="lxml")
+    if find_spec("lxml") is None:
+        assert lxml_document.html_parser == "html.parser"
+    else:
+        assert lxml_document.html_parser == "lxml"
+    assert ScoringPageParser(lxml_document).parseScoringElement() == scoring_result
+
+def test_single_pass_classification():
+    html = "<button data-scorename='outside' class='score_tally'></button>" + \
+           "<div class='scoring'><div data-modename='Auton' class='game_mode'></div>" + \
+           "<button data-scorename='cone' class='score_tally button-primary'></button>" + \
+           "<button data-scorename='broke' data-onlyformode='Auton' class='score_flag'></button></div>"
+    spp = ScoringPageParser(html)
+    assert len(spp.classifyElements()["score_tally"]) == 2
+    # Narrowing the soup to the scoring div walks the tree again
+    spp.scoringDivPresent()
+    assert spp.collectScoringItems() == {"score_tally":["cone"], "score_flag":["broke"]}
+    assert spp.collectGameModes() == ["Auton"]
+
+    with pytest.raises(ScoringPageParseError):
+        spp = ScoringPageParser("<div data-modename='Auton' class='game_mode'></div><div class='score_tally score_flag' data-scorename='twice'></div>")
+        spp.collectScoringItems()